@@ -1,4 +1,3 @@
-import azure.cognitiveservices.speech as speechsdk
 import logging
 import os
 import asyncio
@@ -10,7 +9,6 @@ from fastapi.security import HTTPBasic, HTTPBasicCredentials
 import uvicorn
 import time
 import atexit
-from threading import Timer
 import unittest
 import schedule
 import json
@@ -20,6 +18,26 @@ import sounddevice as sd
 import textwrap
 from dotenv import load_dotenv
 import webbrowser
+from caption_metrics import METRICS
+from caption_logging import HotPathLog, setup_logging
+from caption_dispatch import LoopDispatcher, OrderedDispatcher
+from caption_fanout import ClientHub, PRODUCTION_CHANNEL, profile_channel, user_channel
+from caption_encoding import FrameEncoder
+from caption_protocol import CaptionStreams, DELTA_PROTOCOL, LEGACY_PROTOCOL
+from caption_corrections import CorrectionRegistry
+from caption_dictionary import DictionaryStore
+from caption_layout import DisplayProfile, LineLayoutCache
+from caption_timers import CaptionScheduler
+from caption_session import CaptionSession
+from caption_pipeline import CaptionPipeline, CaptionUpdate
+from caption_control import ExponentialBackoff, LoopLagMonitor, RecognizerControl, StandbyRecognizers, start_all
+from caption_phrase_lists import PhraseLists
+from caption_targets import TranslationTargets
+from caption_watchdog import AudioLevelMeter, RecognitionWatchdog, CANCELED, NOT_RECOGNIZING
+from caption_backends import (
+    AzureBackend, StubBackend, ReplayBackend, EventRecorder, RecognitionEvent,
+    SPEECH, TRANSLATION, RECOGNIZING, RECOGNIZED, NO_MATCH, CANCEL_ERROR, CANCEL_END_OF_STREAM
+)
 
 # Load environment variables from .env file
 load_dotenv()
@@ -30,15 +48,19 @@ load_dotenv()
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 LOG_FILE = os.path.join(CURRENT_DIR, "caption_log.txt")
 
-logging.basicConfig(
-    filename=LOG_FILE,
-    level=logging.DEBUG,
-    format='%(asctime)s [%(levelname)s] [SpeechCaption] %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
+# Records are written, rotated and gzipped by a background thread (see caption_logging)
+log_listener = setup_logging(
+    LOG_FILE,
+    level=getattr(logging, os.getenv("LOG_LEVEL", "DEBUG").upper(), logging.DEBUG),
+    max_bytes=int(os.getenv("LOG_MAX_MB", "50")) * 1024 * 1024,
+    backups=int(os.getenv("LOG_BACKUPS", "3"))
 )
+# Debug messages logged on every recognizer event: at most one per key per second
+hot_log = HotPathLog(interval=1.0)
 
-def log_message(level, message):
-    logging.log(level, f"[SpeechCaption] {message}")
+def log_message(level, message, *args):
+    """Log with %-style args, which are only formatted if the record is written"""
+    logging.log(level, "[SpeechCaption] " + message, *args)
 
 # -------------------------------------------------------------------
 # Configuration
@@ -51,6 +73,8 @@ def load_config():
             config = json.load(f)
         # Override speech_key with environment variable if set
         config["speech_key"] = os.getenv("AZURE_SPEECH_KEY", config.get("speech_key", ""))
+        # ...and the recognizer backend (e.g. RECOGNIZER_BACKEND=stub for tests and demos)
+        config["recognizer_backend"] = os.getenv("RECOGNIZER_BACKEND", config.get("recognizer_backend", "azure"))
         log_message(logging.INFO, "Configuration loaded successfully")
         return config
     except FileNotFoundError:
@@ -65,8 +89,11 @@ def load_config():
 
 CONFIG = load_config()
 
+# "azure" (live microphone), "stub" (scripted captions) or "replay" (recorded recognizer events)
+RECOGNIZER_BACKEND = CONFIG.get("recognizer_backend", "azure")
+
 # Validate Azure key
-if not CONFIG["speech_key"]:
+if RECOGNIZER_BACKEND == "azure" and not CONFIG["speech_key"]:
     raise ValueError("AZURE_SPEECH_KEY environment variable or config.speech_key not set")
 
 # -------------------------------------------------------------------
@@ -138,29 +165,27 @@ DICTIONARY_PAGE_TEMPLATE = load_html_template("dictionary_page.html")
 # -------------------------------------------------------------------
 # Dictionary Persistence
 # -------------------------------------------------------------------
-def load_dictionary():
-    try:
-        if not os.path.exists(DICTIONARY_FILE):
-            log_message(logging.WARNING, f"Dictionary file not found at {DICTIONARY_FILE}")
-            return {"bible_books": [], "spelling_corrections": {}, "custom_phrases": [], "supported_languages": []}
-        with open(DICTIONARY_FILE, 'r') as f:
-            data = json.load(f)
-            log_message(logging.INFO, "Dictionary loaded successfully")
-            return data
-    except json.JSONDecodeError as e:
-        log_message(logging.ERROR, f"Failed to parse dictionary JSON: {e}")
-        return {"bible_books": [], "spelling_corrections": {}, "custom_phrases": [], "supported_languages": []}
-    except Exception as e:
-        log_message(logging.ERROR, f"Failed to load dictionary: {e}")
-        return {"bible_books": [], "spelling_corrections": {}, "custom_phrases": [], "supported_languages": []}
+# Parsed once; every later read comes from memory and every edit is written atomically
+dictionary_store = DictionaryStore(DICTIONARY_FILE)
 
-def save_dictionary(dictionary):
-    try:
-        with open(DICTIONARY_FILE, 'w') as f:
-            json.dump(dictionary, f, indent=2)
-        log_message(logging.INFO, "Dictionary saved")
-    except Exception as e:
-        log_message(logging.ERROR, f"Failed to save dictionary: {e}")
+def load_dictionary():
+    """Current in-memory dictionary; treat as read-only and change it through dictionary_store.update"""
+    return dictionary_store.snapshot()
+
+_language_options_cache = (None, "")
+
+def language_options_html():
+    """<option> list of supported languages, rebuilt only when the dictionary version changes"""
+    global _language_options_cache
+    version, html = _language_options_cache
+    if version != dictionary_store.version:
+        languages = load_dictionary().get("supported_languages", [])
+        html = "".join([
+            f'<option value="{lang["code"]}"{" selected" if lang["code"] == "en-US" else ""}>{lang["name"]}</option>\n'
+            for lang in languages
+        ])
+        _language_options_cache = (dictionary_store.version, html)
+    return html
 
 # -------------------------------------------------------------------
 # Schedule Persistence
@@ -227,13 +252,43 @@ def save_schedule(schedules):
 # FastAPI Setup
 # -------------------------------------------------------------------
 app = FastAPI()
-clients = []
 security = HTTPBasic()
 
+# Connected WebSocket viewers, each with its own bounded outbound queue
+clients = ClientHub(
+    max_pending=CONFIG.get("client_max_pending_frames", 32),
+    send_timeout=CONFIG.get("client_send_timeout_seconds", 2.0),
+    max_lag_seconds=CONFIG.get("client_max_lag_seconds", 10.0)
+)
+# Serializes each broadcast frame once for all clients ("auto" prefers orjson when installed)
+frame_encoder = FrameEncoder(CONFIG.get("json_encoder", "auto"))
+log_message(logging.INFO, f"Broadcast frame encoder: {frame_encoder.name}")
+
+# Runs coroutines on uvicorn's event loop from other threads
+caption_dispatcher = LoopDispatcher()
+# Samples how late the event loop runs (event_loop_lag_ms), e.g. while a recognizer starts
+loop_lag = LoopLagMonitor()
+# Ingest stage of the caption pipeline: stamps updates from any thread and feeds them in the order posted
+caption_writer = OrderedDispatcher()
+
+@app.on_event("startup")
+async def bind_caption_dispatcher():
+    caption_dispatcher.bind(asyncio.get_running_loop())
+    loop_lag.bind(asyncio.get_running_loop())
+    caption_pipeline.bind(asyncio.get_running_loop())
+    caption_writer.bind(asyncio.get_running_loop())
+
+@app.on_event("shutdown")
+async def unbind_caption_dispatcher():
+    caption_dispatcher.unbind()
+    loop_lag.unbind()
+    caption_writer.unbind()
+    caption_pipeline.unbind()
+
 def get_current_username(credentials: HTTPBasicCredentials = Depends(security)):
     correct_username = os.getenv("ADMIN_USERNAME", "admin")
     correct_password = os.getenv("ADMIN_PASSWORD", "Northway12121")
-    log_message(logging.DEBUG, f"Auth attempt: provided username={credentials.username}")
+    log_message(logging.DEBUG, "Auth attempt: provided username=%s", credentials.username)
     if not (credentials.username == correct_username and credentials.password == correct_password):
         log_message(logging.WARNING, f"Authentication failed for user: {credentials.username}")
         raise HTTPException(status_code=401, detail="Invalid credentials")
@@ -259,12 +314,7 @@ async def get_ip():
 @app.get("/")
 async def get():
     websocket_token = os.getenv("WEBSOCKET_TOKEN", "Northway12121")
-    dictionary = load_dictionary()
-    languages = dictionary.get("supported_languages", [])
-    language_options = "".join([
-        f'<option value="{lang["code"]}"{" selected" if lang["code"] == "en-US" else ""}>{lang["name"]}</option>\n' 
-        for lang in languages
-    ])
+    language_options = language_options_html()
     admin_username = os.getenv("ADMIN_USERNAME", "admin")
     admin_password = os.getenv("ADMIN_PASSWORD", "Northway12121")
     return HTMLResponse(
@@ -288,12 +338,7 @@ async def dashboard():
 @app.get("/user")
 async def preview():
     websocket_token = os.getenv("WEBSOCKET_TOKEN", "Northway12121")
-    dictionary = load_dictionary()
-    languages = dictionary.get("supported_languages", [])
-    language_options = "".join([
-        f'<option value="{lang["code"]}"{" selected" if lang["code"] == "en-US" else ""}>{lang["name"]}</option>\n' 
-        for lang in languages
-    ])
+    language_options = language_options_html()
     
     # Create response with explicit headers to prevent authentication prompts
     response = HTMLResponse(
@@ -380,6 +425,10 @@ async def set_setup(setup: dict):
         try:
             sd.default.device = int(device_index)
             log_message(logging.INFO, f"Set audio device to index {device_index}")
+            if audio_meter.available:
+                # The meter listens to the same device as the recognizers
+                audio_meter.stop()
+                audio_meter.start(int(device_index))
         except Exception as e:
             log_message(logging.ERROR, f"Failed to set audio device: {e}")
             raise HTTPException(status_code=400, detail=f"Failed to set audio device: {e}")
@@ -403,6 +452,9 @@ async def set_settings(new_config: dict):
     valid_config = {k: v for k, v in new_config.items() if k in allowed_keys}
     CONFIG.update(valid_config)
     log_message(logging.INFO, f"Settings updated via API: {valid_config}")
+    if "display_profiles" not in CONFIG and valid_config.keys() & {"font_size", "font_style", "max_lines"}:
+        # The default projector profile follows the production settings
+        reload_display_profiles()
     try:
         await broadcast_settings(valid_config)
         log_message(logging.DEBUG, f"Settings broadcasted to {len(clients)} clients")
@@ -411,13 +463,11 @@ async def set_settings(new_config: dict):
     return {"status": "success"}
 
 async def broadcast_settings(settings):
-    for client in clients:
-        try:
-            await client.send_text(json.dumps({"type": "settings", "settings": settings}))
-            log_message(logging.DEBUG, f"Sent settings to client: {client.client}")
-        except Exception as e:
-            log_message(logging.ERROR, f"WebSocket send error for settings: {e}")
-            clients.remove(client)
+    clients.broadcast(frame_encoder.encode({"type": "settings", "settings": settings}), key="settings")
+
+@app.get("/display_profiles", dependencies=[Depends(get_current_username)])
+async def get_display_profiles():
+    return {name: profile.to_dict() for name, profile in display_profiles.items()}
 
 @app.get("/schedule", dependencies=[Depends(get_current_username)])
 async def get_schedule():
@@ -529,9 +579,9 @@ async def add_spelling_correction(correction: dict):
     correct = correction.get("correct", "").strip()
     if not incorrect or not correct:
         raise HTTPException(status_code=400, detail="Both incorrect and correct fields are required")
-    dictionary = load_dictionary()
-    dictionary["spelling_corrections"][incorrect] = correct
-    save_dictionary(dictionary)
+    def add(dictionary):
+        dictionary["spelling_corrections"][incorrect] = correct
+    dictionary_store.update(add)
     log_message(logging.INFO, f"Added spelling correction: {incorrect} -> {correct}")
     return {"status": "success"}
 
@@ -540,11 +590,13 @@ async def add_custom_phrase(phrase: dict):
     phrase_text = phrase.get("phrase", "").strip()
     if not phrase_text:
         raise HTTPException(status_code=400, detail="Phrase field is required")
-    dictionary = load_dictionary()
-    if phrase_text not in dictionary["custom_phrases"]:
+    def add(dictionary):
+        if phrase_text in dictionary["custom_phrases"]:
+            return False
         dictionary["custom_phrases"].append(phrase_text)
         dictionary["custom_phrases"].sort()
-        save_dictionary(dictionary)
+        return True
+    if dictionary_store.update(add):
         log_message(logging.INFO, f"Added custom phrase: {phrase_text}")
     return {"status": "success"}
 
@@ -553,44 +605,60 @@ async def add_bible_book(book: dict):
     book_name = book.get("book", "").strip()
     if not book_name:
         raise HTTPException(status_code=400, detail="Book name field is required")
-    dictionary = load_dictionary()
-    if book_name not in dictionary["bible_books"]:
+    def add(dictionary):
+        if book_name in dictionary["bible_books"]:
+            return False
         dictionary["bible_books"].append(book_name)
         dictionary["bible_books"].sort()
-        save_dictionary(dictionary)
+        return True
+    if dictionary_store.update(add):
         log_message(logging.INFO, f"Added Bible book: {book_name}")
     return {"status": "success"}
 
 @app.delete("/dictionary/spelling", dependencies=[Depends(get_current_username)])
 async def delete_spelling_correction(incorrect: str = Query(...)):
-    dictionary = load_dictionary()
-    if incorrect in dictionary["spelling_corrections"]:
-        del dictionary["spelling_corrections"][incorrect]
-        save_dictionary(dictionary)
+    def remove(dictionary):
+        return dictionary["spelling_corrections"].pop(incorrect, None) is not None
+    if dictionary_store.update(remove):
         log_message(logging.INFO, f"Deleted spelling correction: {incorrect}")
         return {"status": "success"}
     raise HTTPException(status_code=404, detail=f"Spelling correction not found: {incorrect}")
 
 @app.delete("/dictionary/phrase", dependencies=[Depends(get_current_username)])
 async def delete_custom_phrase(phrase: str = Query(...)):
-    dictionary = load_dictionary()
-    if phrase in dictionary["custom_phrases"]:
+    def remove(dictionary):
+        if phrase not in dictionary["custom_phrases"]:
+            return False
         dictionary["custom_phrases"].remove(phrase)
-        save_dictionary(dictionary)
+        return True
+    if dictionary_store.update(remove):
         log_message(logging.INFO, f"Deleted custom phrase: {phrase}")
         return {"status": "success"}
     raise HTTPException(status_code=404, detail=f"Custom phrase not found: {phrase}")
 
 @app.delete("/dictionary/bible_book", dependencies=[Depends(get_current_username)])
 async def delete_bible_book(book: str = Query(...)):
-    dictionary = load_dictionary()
-    if book in dictionary["bible_books"]:
+    def remove(dictionary):
+        if book not in dictionary["bible_books"]:
+            return False
         dictionary["bible_books"].remove(book)
-        save_dictionary(dictionary)
+        return True
+    if dictionary_store.update(remove):
         log_message(logging.INFO, f"Deleted Bible book: {book}")
         return {"status": "success"}
     raise HTTPException(status_code=404, detail=f"Bible book not found: {book}")
 
+@app.post("/dictionary/reload", dependencies=[Depends(get_current_username)])
+async def reload_dictionary():
+    """Pick up a hand edit of dictionary.json without restarting"""
+    try:
+        changed = dictionary_store.reload()
+    except (OSError, ValueError) as e:
+        log_message(logging.ERROR, f"Dictionary reload failed, keeping the current dictionary: {e}")
+        raise HTTPException(status_code=400, detail=f"Failed to reload dictionary: {e}")
+    log_message(logging.INFO, f"Dictionary reloaded from disk (changed: {', '.join(sorted(changed)) or 'nothing'})")
+    return {"status": "success", "changed": sorted(changed), "version": dictionary_store.version}
+
 @app.get("/dictionary_page", dependencies=[Depends(get_current_username)])
 async def dictionary_page():
     admin_username = os.getenv("ADMIN_USERNAME", "admin")
@@ -603,12 +671,11 @@ async def dictionary_page():
 
 @app.post("/start_recognition", dependencies=[Depends(get_current_username)])
 async def start_recognition_endpoint():
-    global production_caption_history
     log_message(logging.INFO, "Received request to start recognition")
     try:
         await start_recognition()
         # Clear production caption history when starting recognition
-        production_caption_history = ""
+        caption_session.reset_production_history()
         log_message(logging.INFO, "Speech recognition started successfully")
         return {"status": "success", "message": "Speech recognition started"}
     except Exception as e:
@@ -617,12 +684,11 @@ async def start_recognition_endpoint():
 
 @app.post("/stop_recognition", dependencies=[Depends(get_current_username)])
 async def stop_recognition_endpoint():
-    global production_caption_history
     log_message(logging.INFO, "Received request to stop recognition")
     try:
         await stop_recognition()
         # Clear production caption history when stopping recognition
-        production_caption_history = ""
+        caption_session.reset_production_history()
         log_message(logging.INFO, "Speech recognition stopped successfully")
         return {"status": "success", "message": "Speech recognition stopped"}
     except Exception as e:
@@ -635,7 +701,26 @@ async def favicon():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "ok"}
+    return {
+        "status": "ok",
+        "is_recognizing": is_recognizing,
+        "time_since_last_caption": recognition_watchdog.seconds_since_event() or 0.0
+    }
+
+@app.get("/metrics", dependencies=[Depends(get_current_username)])
+async def get_metrics():
+    """Latency histograms and counters for the caption pipeline"""
+    return METRICS.snapshot()
+
+@app.get("/watchdog", dependencies=[Depends(get_current_username)])
+async def get_watchdog():
+    """Recognizer activity, audio level and the recent restarts with their causes"""
+    return recognition_watchdog.status()
+
+@app.get("/translation_targets", dependencies=[Depends(get_current_username)])
+async def get_translation_targets():
+    """Languages the translation recognizer is producing, and the user view viewers per language"""
+    return translation_targets.status()
 
 @app.get("/user_no_auth")
 async def user_no_auth_check():
@@ -654,61 +739,181 @@ async def websocket_endpoint(websocket: WebSocket, token: str = Query(...)):
         await websocket.close(code=1008, reason="Invalid token")
         return
     await websocket.accept()
-    clients.append(websocket)
+    connection = clients.register(websocket)
     log_message(logging.INFO, f"WebSocket client connected: {websocket.client}")
     try:
         while True:
             data = await websocket.receive_text()
             try:
                 message = json.loads(data)
-                if message.get("type") == "language":
-                    log_message(logging.INFO, f"Ignoring language change request from client: {message.get('language')}")
+                message_type = message.get("type")
+                if message_type in ("subscribe", "language"):
+                    subscribe_user_language(connection, message.get("language"))
+                elif message_type == "hello":
+                    connection.protocol = DELTA_PROTOCOL if message.get("protocol") == DELTA_PROTOCOL else LEGACY_PROTOCOL
+                    log_message(logging.INFO, f"WebSocket client {websocket.client} using caption protocol {connection.protocol}")
+                    if message.get("language"):
+                        subscribe_user_language(connection, message.get("language"), message.get("last_seq"))
+                    elif message.get("profile"):
+                        subscribe_display_profile(connection, message.get("profile"), message.get("last_seq"))
+                    else:
+                        catch_up_connection(connection, message.get("last_seq"))
+                elif message_type == "ack":
+                    clients.acknowledge(connection, message.get("stream"), message.get("seq"))
+                elif message_type == "resync" and message.get("stream") == connection.channel:
+                    connection.acked.pop(connection.channel, None)
+                    send_stream_snapshot(connection, connection.channel)
                 else:
-                    for client in clients:
-                        try:
-                            await client.send_text(json.dumps({"type": "caption", "text": message}))
-                            log_message(logging.DEBUG, f"Sent data to client: {client.client}")
-                        except Exception as e:
-                            log_message(logging.ERROR, f"WebSocket send error: {e}")
+                    clients.broadcast(frame_encoder.encode({"type": "caption", "text": message}), key="relay")
             except json.JSONDecodeError:
-                for client in clients:
-                    try:
-                        await client.send_text(json.dumps({"type": "caption", "text": data}))
-                        log_message(logging.DEBUG, f"Sent data to client: {client.client}")
-                    except Exception as e:
-                        log_message(logging.ERROR, f"WebSocket send error: {e}")
+                clients.broadcast(frame_encoder.encode({"type": "caption", "text": data}), key="relay")
     except Exception as e:
         log_message(logging.ERROR, f"WebSocket error: {e}")
     finally:
-        clients.remove(websocket)
+        clients.unregister(connection)
         log_message(logging.INFO, f"WebSocket client disconnected: {websocket.client}")
 
-async def send_caption_to_clients(translations, languages, caption_type="production"):
+def legacy_caption_payload(frame):
+    """Protocol 1 frame: the full text in the structure the original pages expect"""
+    kind, _, name = frame.stream.partition(":")
+    if kind == "user":
+        view, lang = "user", name
+    else:
+        view, lang = "production", "en-US"
+    payload = {
+        "type": "caption",
+        "translations": {view: {lang: frame.text}},
+        "languages": [lang],
+        "seq": frame.seq
+    }
+    if frame.ts is not None:
+        payload["ts"] = frame.ts
+    if kind == "profile":
+        payload["profile"] = name
+        payload["lines"] = frame.text.split("\n") if frame.text else []
+    return payload
+
+# Sequence-numbered caption streams ("production", "user:<lang>", "profile:<name>") with opt-in delta frames
+# and a shared ring buffer of recent frames for reconnect catch-up
+caption_streams = CaptionStreams(
+    frame_encoder.encode,
+    legacy_caption_payload,
+    keyframe_interval=CONFIG.get("caption_keyframe_interval", 50),
+    ring_size=CONFIG.get("caption_ring_size", 512)
+)
+
+def send_stream_snapshot(connection, stream):
+    """Send one connection the latest frame of a stream (a delta if its acknowledged base is still known)"""
+    frame = caption_streams.latest(stream)
+    if frame is None:
+        return
+    connection.enqueue(stream, clients.frame_text(connection, frame, caption_streams), final=frame.final)
+
+def catch_up_connection(connection, last_seq):
     """
-    Send captions to clients with proper structure for frontend
-    caption_type: "production", "user", "translation", or "user_translations"
+    Bring a (re)connecting client up to date on its channel. Clients reporting the last seq
+    they saw get the missed frames from the ring buffer; everyone else gets a snapshot.
     """
-    # Structure the data according to what the frontend expects
-    if caption_type == "production":
-        structured_data = {"production": translations}
-    elif caption_type == "user":
-        structured_data = {"user": translations}
-    elif caption_type == "user_translations":
-        structured_data = {"user_translations": translations}
-    else:  # translation
-        structured_data = {"production": translations}  # Translations go to production view
-    
-    for client in clients:
-        try:
-            await client.send_text(json.dumps({
-                "type": "caption", 
-                "translations": structured_data, 
-                "languages": languages
-            }))
-            log_message(logging.DEBUG, f"Sent {caption_type} caption to client: {client.client}")
-        except Exception as e:
-            log_message(logging.ERROR, f"WebSocket send error: {e}")
-            clients.remove(client)
+    stream = connection.channel
+    connection.acked.pop(stream, None)
+    if not isinstance(last_seq, int) or last_seq <= 0:
+        send_stream_snapshot(connection, stream)
+        return
+    if connection.protocol >= DELTA_PROTOCOL and caption_streams.has_frame(stream, last_seq):
+        # The client still holds the text of last_seq, so catch-up frames can be deltas against it
+        connection.acked[stream] = last_seq
+    missed = caption_streams.missed_frames(stream, last_seq)
+    if missed is None:
+        send_stream_snapshot(connection, stream)
+        return
+    for frame in missed:
+        connection.enqueue(stream, clients.frame_text(connection, frame, caption_streams), final=frame.final)
+    log_message(logging.DEBUG, "Caught up %s on %s: %d frames after seq %s", str(connection.client), stream, len(missed), last_seq)
+
+def publish_caption(stream, text, final, ts=None):
+    """Sequence a stream's new text and fan it out; unchanged text is suppressed"""
+    frame = caption_streams.publish(stream, text, final, ts)
+    if frame is None:
+        return None
+    clients.broadcast_stream(frame, caption_streams)
+    return frame
+
+def subscribe_user_language(connection, language, last_seq=None):
+    """Route a user view's captions to the language it displays and send it the current text"""
+    if not caption_session.has_language(language):
+        log_message(logging.WARNING, f"Ignoring subscription to unsupported language: {language}")
+        return
+    channel = user_channel(language)
+    clients.subscribe(connection, channel)
+    connection.acked.pop(channel, None)
+    log_message(logging.INFO, f"WebSocket client {connection.client} subscribed to {language}")
+    # Nobody may have been watching this language, so bring its stream up to date first
+    if publish_caption(channel, build_user_caption_text(language), final=False) is None:
+        catch_up_connection(connection, last_seq)
+
+# -------------------------------------------------------------------
+# Display profiles: production lines broken once per profile on the server
+# -------------------------------------------------------------------
+def load_display_profiles(config):
+    """config["display_profiles"], or one "projector" profile following the production settings"""
+    settings = config.get("display_profiles") or {
+        "projector": {
+            "font": config.get("font_style", "Arial"),
+            "size_px": config.get("font_size", 45),
+            "width_px": config.get("display_width_px", 1920) - config.get("text_padding_x", 50),
+            "lines": config.get("max_lines", 1)
+        }
+    }
+    return {name: DisplayProfile.from_config(name, profile) for name, profile in settings.items()}
+
+display_profiles = load_display_profiles(CONFIG)
+production_layout_text = ""  # Last production text laid out for the profiles
+
+def reload_display_profiles():
+    """Rebuild the profiles after a settings change and re-send every profile page its lines"""
+    global display_profiles
+    display_profiles = load_display_profiles(CONFIG)
+    for name, profile in display_profiles.items():
+        message = frame_encoder.encode({"type": "profile", "profile": profile.to_dict()})
+        clients.broadcast(message, key="profile", channel=profile_channel(name))
+    publish_display_profiles(production_layout_text, final=True)
+
+def subscribe_display_profile(connection, name, last_seq=None):
+    """Move a production page onto a display profile's pre-laid-out stream and send it the profile"""
+    profile = display_profiles.get(name)
+    if profile is None:
+        log_message(logging.WARNING, f"Ignoring subscription to unknown display profile: {name}")
+        catch_up_connection(connection, last_seq)
+        return
+    channel = profile_channel(name)
+    clients.subscribe(connection, channel)
+    connection.acked.pop(channel, None)
+    connection.enqueue("profile", frame_encoder.encode({"type": "profile", "profile": profile.to_dict()}), final=True)
+    log_message(logging.INFO, f"WebSocket client {connection.client} using display profile {name}")
+    if publish_caption(channel, "\n".join(profile.lay_out(production_layout_text)), final=False) is None:
+        catch_up_connection(connection, last_seq)
+
+def publish_display_profiles(text, final, ts=None):
+    """Lay the production text out once per watched display profile and publish the lines"""
+    for channel, lines in display_profile_streams(text):
+        publish_caption(channel, lines, final, ts)
+
+def queue_captions(translations, languages, caption_type="production", final=True):
+    """
+    Post literal caption text (status messages, clears) to the caption pipeline from any thread;
+    it is published after everything posted earlier
+    caption_type: "user" for the per-language user view streams, anything else for the production stream
+    final: False for interim frames, which slow clients may skip in favour of a newer one
+    """
+    if caption_type == "user":
+        texts = {lang: translations[lang] for lang in languages if lang in translations}
+        return ingest_caption(USER_TEXT, texts, final)
+    # Production view only shows English
+    return ingest_caption(PRODUCTION_TEXT, {"en-US": translations.get("en-US", "")}, final)
+
+async def send_caption_to_clients(translations, languages, caption_type="production", final=True):
+    """Send captions to clients with proper structure for frontend (see queue_captions)"""
+    queue_captions(translations, languages, caption_type, final)
 
 def run_fastapi():
     max_retries = 3
@@ -741,36 +946,98 @@ def run_fastapi():
                 time.sleep(retry_delay)
     log_message(logging.CRITICAL, "FastAPI server failed to start after all retries.")
 
-fastapi_thread = threading.Thread(target=run_fastapi, daemon=True)
-fastapi_thread.start()
-time.sleep(1)
-
 # -------------------------------------------------------------------
 # Azure Speech Service Setup
 # -------------------------------------------------------------------
-speech_config = speechsdk.SpeechConfig(
-    subscription=CONFIG["speech_key"],
-    region=CONFIG["service_region"],
-    speech_recognition_language="en-US"
-)
-speech_config.set_property(speechsdk.PropertyId.SpeechServiceConnection_InitialSilenceTimeoutMs, CONFIG["initial_silence_timeout_ms"])
-speech_config.set_property(speechsdk.PropertyId.SpeechServiceConnection_EndSilenceTimeoutMs, CONFIG["end_silence_timeout_ms"])
+# "dual" runs a SpeechRecognizer for the production view next to the TranslationRecognizer.
+# "single" drives every view from the TranslationRecognizer, whose results already carry the
+# source-language text, halving audio upload, service sessions and callback traffic.
+RECOGNIZER_MODES = ("dual", "single")
+RECOGNIZER_MODE = CONFIG.get("recognizer_mode", "dual")
+if RECOGNIZER_MODE not in RECOGNIZER_MODES:
+    log_message(logging.WARNING, f"Unknown recognizer_mode '{RECOGNIZER_MODE}', using dual")
+    RECOGNIZER_MODE = "dual"
+log_message(logging.INFO, f"Recognizer mode: {RECOGNIZER_MODE}")
+
+def translation_languages(dictionary):
+    """Languages the translation recognizer can target; English comes from the source text"""
+    return [lang["code"] for lang in dictionary.get("supported_languages", []) if lang["code"] != "en-US"]
+
+def build_recognizer_backend():
+    # Every supported language; each translation recognizer is narrowed to the watched ones before it starts
+    target_languages = translation_languages(load_dictionary())
+    if RECOGNIZER_BACKEND == "stub":
+        # Loops the built-in sample sermon so the views keep moving without a microphone
+        return StubBackend(rate=CONFIG.get("recognizer_stub_rate", 8.0), target_languages=target_languages, loop=True)
+    if RECOGNIZER_BACKEND == "replay":
+        return ReplayBackend(CONFIG["recognizer_replay_file"], speed=CONFIG.get("recognizer_replay_speed", 1.0),
+                             loop=CONFIG.get("recognizer_replay_loop", False))
+    if RECOGNIZER_BACKEND != "azure":
+        log_message(logging.WARNING, f"Unknown recognizer_backend '{RECOGNIZER_BACKEND}', using azure")
+    return AzureBackend(
+        CONFIG["speech_key"],
+        CONFIG["service_region"],
+        language="en-US",
+        target_languages=target_languages,
+        initial_silence_timeout_ms=CONFIG["initial_silence_timeout_ms"],
+        end_silence_timeout_ms=CONFIG["end_silence_timeout_ms"]
+    )
 
-# Production recognizer for both production view and user view (English)
-production_recognizer = speechsdk.SpeechRecognizer(speech_config=speech_config)
+recognizer_backend = build_recognizer_backend()
+log_message(logging.INFO, f"Recognizer backend: {recognizer_backend.name}")
+
+# Optionally record every recognizer event for later offline replay
+event_recorder = EventRecorder(CONFIG["recognizer_record_file"]) if CONFIG.get("recognizer_record_file") else None
+
+def create_recognizers():
+    """Build the recognizers for RECOGNIZER_MODE and connect their event handlers"""
+    production = None
+    if RECOGNIZER_MODE == "dual":
+        # Production recognizer for both production view and user view (English)
+        production = recognizer_backend.create(SPEECH)
+        production.recognizing.connect(on_production_speech_recognizing)
+        production.recognized.connect(on_production_speech_recognized)
+        production.canceled.connect(lambda evt: on_canceled(evt, "ProductionRecognizer", production))
+    translation = recognizer_backend.create(TRANSLATION)
+    translation.recognizing.connect(on_translation_recognizing)
+    translation.recognized.connect(on_translation_recognized)
+    translation.canceled.connect(lambda evt: on_canceled(evt, "TranslationRecognizer", translation))
+    for recognizer in (production, translation):
+        if recognizer is not None:
+            recognition_watchdog.watch(recognizer)
+            if event_recorder is not None:
+                event_recorder.attach(recognizer)
+    return production, translation
+
+def active_recognizers():
+    return [recognizer for recognizer in (production_recognizer, translation_recognizer) if recognizer is not None]
+
+def caption_phrases(dictionary):
+    return dictionary["custom_phrases"] + dictionary["bible_books"]
+
+# Custom phrases and Bible books compiled once per dictionary change; recognizers are
+# brought up to date from here on start, rebuild and edit
+phrase_lists = PhraseLists()
+phrase_lists.update(caption_phrases(load_dictionary()))
+
+def apply_phrase_lists(recognizers):
+    """Control thread: push the current phrase list to running recognizers without stopping them"""
+    for recognizer in recognizers:
+        try:
+            phrase_lists.apply(recognizer)
+        except Exception as e:
+            log_message(logging.ERROR, f"Failed to refresh {recognizer.role} phrase list: {e}")
 
-translation_config = speechsdk.translation.SpeechTranslationConfig(
-    subscription=CONFIG["speech_key"],
-    region=CONFIG["service_region"],
-    speech_recognition_language="en-US"
-)
-dictionary = load_dictionary()
-for lang in dictionary.get("supported_languages", []):
-    if lang["code"] != "en-US":
-        translation_config.add_target_language(lang["code"])
-translation_config.set_property(speechsdk.PropertyId.SpeechServiceConnection_InitialSilenceTimeoutMs, CONFIG["initial_silence_timeout_ms"])
-translation_config.set_property(speechsdk.PropertyId.SpeechServiceConnection_EndSilenceTimeoutMs, CONFIG["end_silence_timeout_ms"])
-translation_recognizer = speechsdk.translation.TranslationRecognizer(translation_config=translation_config)
+def refresh_phrase_lists():
+    """Recompile the phrase list after a dictionary edit and update the live and standby recognizers"""
+    added, removed = phrase_lists.update(caption_phrases(load_dictionary()))
+    if not added and not removed:
+        return
+    recognizers = active_recognizers()
+    recognizer_control.submit("phrases", apply_phrase_lists, recognizers)
+    if RECOGNIZER_STANDBY:
+        recognizer_standby.refresh()
+    log_message(logging.INFO, f"Phrase list update ({len(added)} added, {len(removed)} removed) queued for {len(recognizers)} recognizers")
 
 is_recognizing = False
 should_be_recognizing = False
@@ -778,46 +1045,74 @@ should_be_recognizing = False
 # -------------------------------------------------------------------
 # Text Processing
 # -------------------------------------------------------------------
-transcript = []
-last_caption = ""
-
-# Production view caption state (separate from user view)
-production_caption_update_translations = {"en-US": ""}
-production_caption = ""
-production_caption_history = ""  # Store the accumulated production caption text
-production_last_event_time = time.time()  # For pause detection between utterances
-
-# User view caption state (completely separate)
-user_caption = ""
-user_caption_update_pending = False
-user_caption_history = {}  # Dictionary to store history for each language
-user_last_text = {}  # Dictionary to store interim text for each language
-current_user_language = "en-US"  # Track currently selected language in user view
-
-# Auto-finalization timing for user view
-user_auto_finalize_timer = None
-user_speech_start_time = {}  # Dictionary to track when speech started for each language
-
-# Initialize history for all supported languages
+# Production and user view caption state (transcript, production text, per-language
+# user history and interim text); updated only through its methods
 dictionary = load_dictionary()
-for lang in dictionary.get("supported_languages", []):
-    user_caption_history[lang["code"]] = []
-    user_last_text[lang["code"]] = ""
+caption_session = CaptionSession(
+    [lang["code"] for lang in dictionary.get("supported_languages", [])],
+    max_transcript_lines=CONFIG["max_transcript_lines"]
+)
 
-dictionary = load_dictionary()
-bible_books = dictionary["bible_books"]
-spelling_corrections_dict = dictionary["spelling_corrections"]
-custom_phrases = dictionary["custom_phrases"]
+# Caption deadlines (auto-finalize, debounce, pause-clear) share one scheduler thread
+caption_timers = CaptionScheduler()
+USER_AUTO_FINALIZE = "user_auto_finalize"
+USER_CAPTION_DEBOUNCE = "user_caption_debounce"
+USER_CAPTION_DEBOUNCE_SECONDS = 0.1
+PRODUCTION_PAUSE_CLEAR = "production_pause_clear"
+# How late the pause-clear frame is published relative to last event + pause_threshold_seconds
+production_pause_drift = METRICS.histogram("production_pause_clear_drift_ms")
+
+def language_dictionary_file(language):
+    """dictionary.json holds the English rules; other languages use dictionary_<name>.json"""
+    if language["code"] == "en-US":
+        return DICTIONARY_FILE
+    return os.path.join(CURRENT_DIR, f"dictionary_{language['name'].lower()}.json")
+
+def load_language_dictionary(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except json.JSONDecodeError as e:
+        log_message(logging.ERROR, f"Failed to parse language dictionary {path}: {e}")
+    except Exception as e:
+        log_message(logging.ERROR, f"Failed to load language dictionary {path}: {e}")
+    return None
+
+# Each language's spelling corrections, Bible books and custom phrases compiled into its
+# own multi-word matcher with one incremental corrector per caption stream
+correction_registry = CorrectionRegistry()
+
+def compile_corrections(dictionary):
+    correction_registry.set_language("en-US", dictionary)
+    for language in dictionary.get("supported_languages", []):
+        if language["code"] == "en-US":
+            continue
+        path = language_dictionary_file(language)
+        if os.path.exists(path):
+            correction_registry.set_language(language["code"], load_language_dictionary(path))
+        else:
+            correction_registry.remove_language(language["code"])
+    log_message(logging.INFO, f"Caption corrections compiled for: {', '.join(correction_registry.languages()) or 'no languages'}")
+
+compile_corrections(dictionary)
 
-def spelling_corrections(text):
-    words = text.split()
-    return " ".join([spelling_corrections_dict.get(word.lower(), word) for word in words])
+def on_dictionary_changed(store, changed):
+    """Recompile only what an edit touched and push new phrases to the running recognizers"""
+    dictionary = store.snapshot()
+    if "supported_languages" in changed:
+        caption_session.add_languages(lang["code"] for lang in dictionary.get("supported_languages", []))
+        compile_corrections(dictionary)
+        translation_targets.set_languages(translation_languages(dictionary))
+    elif changed & {"spelling_corrections", "bible_books", "custom_phrases"}:
+        entries = correction_registry.set_language("en-US", dictionary)
+        log_message(logging.INFO, f"Recompiled {entries} en-US caption corrections (dictionary version {store.version})")
+    if changed & {"custom_phrases", "bible_books"}:
+        refresh_phrase_lists()
 
-def correct_bible_books(text):
-    return " ".join([word.capitalize() if word.lower() in [b.lower() for b in bible_books] else word for word in text.split()])
+dictionary_store.subscribe(on_dictionary_changed)
 
-def apply_text_corrections(text):
-    return correct_bible_books(spelling_corrections(text))
+def apply_text_corrections(text, language="en-US"):
+    return correction_registry.correct(language, text)
 
 def map_azure_language_code(azure_code):
     """Map Azure Speech language codes to dictionary language codes"""
@@ -835,341 +1130,400 @@ def map_azure_language_code(azure_code):
 
 def auto_finalize_user_speech():
     """Auto-finalize user speech after the specified delay"""
-    global user_auto_finalize_timer, user_last_text, user_caption_history, user_speech_start_time
-    
     auto_finalize_delay = USER_SETTINGS.get("user_auto_finalize_delay", 10.0)
     log_message(logging.INFO, f"Auto-finalizing user speech after {auto_finalize_delay} seconds")
     
-    # Process each language that has interim text
-    for lang, interim_text in user_last_text.items():
-        if interim_text and interim_text.strip() != "":
-            # Add the interim text to history as a finalized caption
-            if not user_caption_history[lang] or interim_text != user_caption_history[lang][-1]:
-                user_caption_history[lang].append(interim_text)
-                # Keep only the last user_max_lines captions
-                user_max_lines = USER_SETTINGS.get("user_lines", 3)
-                if len(user_caption_history[lang]) > user_max_lines:
-                    user_caption_history[lang] = user_caption_history[lang][-user_max_lines:]
-            
-            # Clear the interim text
-            user_last_text[lang] = ""
-            
-            # Reset speech timing for this language
-            if lang in user_speech_start_time:
-                del user_speech_start_time[lang]
-    
-    # Reset the timer
-    user_auto_finalize_timer = None
+    # Every language's interim text becomes a finalized caption (keeping the last user_lines)
+    finalized = caption_session.finalize_user_interims(USER_SETTINGS.get("user_lines", 3))
+    log_message(logging.DEBUG, f"Auto-finalized user captions for: {finalized}")
     
     # Send updated captions to clients
-    if not user_caption_update_pending:
-        user_caption_update_pending = True
-        Timer(0.1, debounce_update_user_caption).start()
-
-def check_and_clear_on_pause():
-    """Check if a pause has been detected and clear the production display if needed"""
-    global production_caption, production_caption_history, production_last_event_time
-    
-    # Get pause threshold from config (default 2 seconds)
-    pause_threshold = CONFIG.get("pause_threshold_seconds", 2.0)
-    
-    # Check if enough time has passed since last speech event
-    time_since_last_event = time.time() - production_last_event_time
-    
-    if time_since_last_event > pause_threshold:
-        # Pause detected - clear the current display
-        if production_caption.strip():  # Only clear if there's something to clear
-            log_message(logging.INFO, f"Pause detected ({time_since_last_event:.1f}s), clearing production display")
-            production_caption = ""
-            # Don't clear history - keep it for transcript purposes
-            # But we could optionally clear it here if you want a complete fresh start
+    caption_timers.schedule(USER_CAPTION_DEBOUNCE, USER_CAPTION_DEBOUNCE_SECONDS, debounce_update_user_caption, reschedule=False)
+
+def clear_production_on_pause():
+    """Pause-clear deadline: blank the production display pause_threshold_seconds after the last speech event"""
+    last_event = caption_session.production_last_event
+    deadline = last_event + CONFIG.get("pause_threshold_seconds", 2.0)
+    if time.monotonic() < deadline:
+        # Speech arrived as the deadline fired; its own deadline is already scheduled
+        return
+    # Only clears if there's something to clear and no speech slipped in meanwhile;
+    # history is kept for transcript purposes
+    if not caption_session.clear_production_after(last_event):
+        return
+    log_message(logging.INFO, f"Pause detected ({time.monotonic() - last_event:.1f}s), clearing production display")
+    ingest_caption(PAUSE_CLEAR, {"last_event": last_event, "deadline": deadline})
 
 # Production view processing (hybrid approach: fresh text + pause detection)
-def process_production_speech_text(text=None, translations=None, is_recognized=False):
-    global transcript, production_caption_update_translations, last_caption, production_caption, production_caption_history, production_last_event_time
+def process_production_speech_text(text=None, translations=None, is_recognized=False, created_at=None):
+    """Hand recognizer text for the production view to the caption pipeline"""
     if translations is None:
         translations = {}
     if text:
         translations["en-US"] = text
-    corrected_translations = {lang: apply_text_corrections(t) for lang, t in translations.items() if t}
-    
-    # Process English captions for production view
-    if "en-US" in corrected_translations:
-        corrected_text = corrected_translations["en-US"]
-        
-        # Update last event time for pause detection (regardless of recognition status)
-        production_last_event_time = time.time()
-        
-        # Use production settings for line wrapping
-        prod_line_length = CONFIG.get("max_line_length", 90)
-        
-        if is_recognized:
-            # For finalized captions, add to transcript and update history
-            transcript.append(corrected_text)
-            if len(transcript) > CONFIG["max_transcript_lines"]:
-                transcript = transcript[-CONFIG["max_transcript_lines"]:]
-            
-            # Update production caption history for context (but don't use for display)
-            if production_caption_history:
-                production_caption_history += " " + corrected_text
-            else:
-                production_caption_history = corrected_text
-            
-            # For production view, show ONLY the current finalized text (fresh approach)
-            wrapped_lines = textwrap.wrap(corrected_text, width=prod_line_length, break_long_words=False, break_on_hyphens=False)
-            production_caption = wrapped_lines[-1] if wrapped_lines else ""
-            
-        else:
-            # For interim captions, show ONLY the current interim text (fresh approach)
-            wrapped_lines = textwrap.wrap(corrected_text, width=prod_line_length, break_long_words=False, break_on_hyphens=False)
-            production_caption = wrapped_lines[-1] if wrapped_lines else ""
-    
-    # Production view only shows English captions
-    production_caption_update_translations = {"en-US": production_caption}
-    
-    # Check for pause detection and clear display if needed
-    check_and_clear_on_pause()
-    
-    # Send updates immediately for production view (no debounce for real-time)
-    if "en-US" in production_caption_update_translations:
-        try:
-            asyncio.run(send_caption_to_clients(production_caption_update_translations, languages=["en-US"], caption_type="production"))
-        except Exception as e:
-            log_message(logging.ERROR, f"Failed to send production caption: {e}")
-    
-    last_caption = production_caption
-    return production_caption_update_translations
+    ingest_caption(PRODUCTION_SPEECH, translations, is_recognized, created_at)
 
 # User view processing (separate from production)
-def process_user_speech_text(text=None, translations=None, is_recognized=False):
-    global user_caption, user_caption_update_pending, user_caption_history, user_last_text, user_auto_finalize_timer, user_speech_start_time
+def process_user_speech_text(text=None, translations=None, is_recognized=False, created_at=None):
+    """Hand recognizer text and translations for the user views to the caption pipeline"""
     if translations is None:
         translations = {}
     if text:
         translations["en-US"] = text
-    
-    log_message(logging.DEBUG, f"process_user_speech_text called: is_recognized={is_recognized}, translations={list(translations.keys())}")
-    
-    corrected_translations = {lang: apply_text_corrections(t) for lang, t in translations.items() if t}
-    
-    log_message(logging.DEBUG, f"corrected_translations: {list(corrected_translations.keys())}")
-    
-    # Use user settings for line wrapping and number of lines
-    user_line_length = USER_SETTINGS.get("user_max_line_length", CONFIG["max_line_length"])
+    ingest_caption(USER_SPEECH, translations, is_recognized, created_at)
+
+# Wrapped lines of finalized history are cached per language; only the interim tail is re-wrapped.
+# The cache is shared by the caption pipeline and the event loop, so it is used under a lock.
+user_layout = LineLayoutCache(USER_SETTINGS.get("user_max_line_length", CONFIG["max_line_length"]))
+user_layout_lock = threading.Lock()
+
+def build_user_caption_text(lang):
+    """Wrapped finalized history and current interim text of one language for the user view"""
+    view = caption_session.user_view(lang)
+    with user_layout_lock:
+        user_layout.configure(USER_SETTINGS.get("user_max_line_length", CONFIG["max_line_length"]))
+        return user_layout.render(lang, view.history, view.interim)
+
+def debounce_update_user_caption():
+    """Runs on the caption scheduler once per burst of user-view updates"""
+    ingest_caption(USER_REFRESH, final=False)
+
+# -------------------------------------------------------------------
+# Caption Pipeline: ingest -> correct -> layout -> encode -> fan-out
+# -------------------------------------------------------------------
+# Update kinds
+PRODUCTION_SPEECH = "production_speech"    # Recognizer text for the production view
+USER_SPEECH = "user_speech"                # Recognizer text and translations for the user views
+PRODUCTION_REFRESH = "production_refresh"  # Re-send the current production text (no-match results)
+USER_REFRESH = "user_refresh"              # Lay out every watched user view (debounced)
+PAUSE_CLEAR = "pause_clear"                # Blank the production display after a pause
+PRODUCTION_TEXT = "production_text"        # Literal production text (status messages, clears)
+USER_TEXT = "user_text"                    # Literal user view text per language (clears)
+
+production_stale_dropped = METRICS.counter("pipeline_stale_dropped")
+last_production_event = 0.0  # created_at of the newest production speech laid out
+
+def ingest_caption(kind, data=None, final=True, created_at=None):
+    """Ingest stage: post an update to the caption writer, which stamps it and feeds the pipeline in order"""
+    return caption_writer.post(feed_caption_pipeline, CaptionUpdate(kind, data, final, created_at))
+
+def feed_caption_pipeline(stamp, update):
+    update.stamp = stamp
+    caption_pipeline.feed(update)
+
+def correct_stage(update):
+    """Apply the caption dictionary to recognizer text"""
+    if update.kind in (PRODUCTION_SPEECH, USER_SPEECH):
+        update.data = {lang: apply_text_corrections(t, lang) for lang, t in update.data.items() if t}
+    return update
+
+def display_profile_streams(text):
+    """Lay the production text out once per watched display profile, as (stream, lines) pairs"""
+    global production_layout_text
+    production_layout_text = text
+    streams = []
+    for name, profile in display_profiles.items():
+        channel = profile_channel(name)
+        if clients.channel_size(channel):
+            streams.append((channel, "\n".join(profile.lay_out(text))))
+    return streams
+
+def production_streams(update, caption, layout_text):
+    update.streams.append((PRODUCTION_CHANNEL, caption))
+    update.streams.extend(display_profile_streams(layout_text))
+    return update
+
+def lay_out_production_speech(update):
+    global last_production_event
+    corrected_text = update.data.get("en-US")
+    if not corrected_text:
+        production = caption_session.snapshot().production
+        return production_streams(update, production.caption, production.display_text)
+    if update.created_at < last_production_event:
+        # Overtaken by a newer recognizer event; showing it now would put older text back up
+        production_stale_dropped.inc()
+        return None
+    last_production_event = update.created_at
+
+    # Use production settings for line wrapping
+    prod_line_length = CONFIG.get("max_line_length", 90)
+
+    # Show ONLY the current text (fresh approach); finalized text also goes to the
+    # transcript and the production history
+    wrapped_lines = textwrap.wrap(corrected_text, width=prod_line_length, break_long_words=False, break_on_hyphens=False)
+    production = caption_session.update_production(
+        wrapped_lines[-1] if wrapped_lines else "",
+        corrected_text,
+        final_text=corrected_text if update.final else None
+    )
+
+    # Push back the pause-clear deadline (regardless of recognition status)
+    caption_timers.schedule(PRODUCTION_PAUSE_CLEAR, CONFIG.get("pause_threshold_seconds", 2.0), clear_production_on_pause)
+    return production_streams(update, production.caption, production.display_text)
+
+def lay_out_production_refresh(update):
+    production = caption_session.snapshot().production
+    return production_streams(update, production.caption, production.display_text)
+
+def lay_out_pause_clear(update):
+    if caption_session.production_last_event != update.data["last_event"]:
+        return None  # newer speech is already on its way to the display
+    production_pause_drift.observe(max(0.0, time.monotonic() - update.data["deadline"]))
+    return production_streams(update, "", "")
+
+def lay_out_production_text(update):
+    text = update.data.get("en-US", "")
+    return production_streams(update, text, text)
+
+def lay_out_user_speech(update):
+    """Apply recognizer text to the user views; their display text is laid out by the debounced refresh"""
+    hot_log.debug("user_speech", "User speech: final=%s, languages=%s", update.final, ",".join(update.data))
+
+    # Use user settings for the number of lines
     user_max_lines = USER_SETTINGS.get("user_lines", 3)
-    
+
     # Process each language
-    for lang, corrected_text in corrected_translations.items():
-        if is_recognized:
+    for lang, corrected_text in update.data.items():
+        if update.final:
             # For final captions, add to history if it's new and not empty
             if corrected_text.strip() != "":
-                # Only add to history if it's different from the last caption
-                if not user_caption_history[lang] or corrected_text != user_caption_history[lang][-1]:
-                    user_caption_history[lang].append(corrected_text)
-                    # Keep only the last user_max_lines captions
-                    if len(user_caption_history[lang]) > user_max_lines:
-                        user_caption_history[lang] = user_caption_history[lang][-user_max_lines:]
-                user_last_text[lang] = ""  # Clear interim text
-                
+                # Only added to history if it's different from the last caption; clears the interim text
+                caption_session.user_final(lang, corrected_text, user_max_lines)
+
                 # Cancel auto-finalization timer since we got a final result
-                if user_auto_finalize_timer:
-                    user_auto_finalize_timer.cancel()
-                    user_auto_finalize_timer = None
-                    log_message(logging.DEBUG, "Cancelled auto-finalization timer due to final recognition")
+                if caption_timers.cancel(USER_AUTO_FINALIZE):
+                    hot_log.debug("auto_finalize_cancel", "Cancelled auto-finalization timer due to final recognition")
         else:
             # For interim captions, update the current text
-            user_last_text[lang] = corrected_text
-            
-            # Start or reset auto-finalization timer for this language
-            if lang not in user_speech_start_time:
-                user_speech_start_time[lang] = time.time()
-                log_message(logging.DEBUG, f"Started speech timing for {lang}")
-            
-            # Cancel existing timer if it exists
-            if user_auto_finalize_timer:
-                user_auto_finalize_timer.cancel()
-            
-            # Start new auto-finalization timer
-            auto_finalize_delay = USER_SETTINGS.get("user_auto_finalize_delay", 10.0)
-            user_auto_finalize_timer = Timer(auto_finalize_delay, auto_finalize_user_speech)
-            user_auto_finalize_timer.start()
-            log_message(logging.DEBUG, f"Started auto-finalization timer for {lang} ({auto_finalize_delay} seconds)")
-        
-        # Build the display text from history and current interim text
-        display_lines = []
-        
-        # Add all history items
-        for caption in user_caption_history[lang]:
-            # Wrap each caption according to line length
-            wrapped_lines = textwrap.wrap(caption, width=user_line_length)
-            display_lines.extend(wrapped_lines)
-        
-        # Add current interim caption if it exists
-        if user_last_text[lang] and user_last_text[lang].strip() != "":
-            wrapped_lines = textwrap.wrap(user_last_text[lang], width=user_line_length)
-            display_lines.extend(wrapped_lines)
-        
-        # Join all lines with newlines for display
-        user_caption = "\n".join(display_lines) if display_lines else ""
-        
-        log_message(logging.DEBUG, f"User caption updated for {lang}: {user_caption}")
-        
-        # Send user caption update
-        if not user_caption_update_pending:
-            user_caption_update_pending = True
-            log_message(logging.DEBUG, f"Setting user_caption_update_pending=True for languages: {list(corrected_translations.keys())}")
-            Timer(0.1, debounce_update_user_caption).start()
-        else:
-            log_message(logging.DEBUG, f"user_caption_update_pending already True, skipping Timer")
-
-def debounce_update_user_caption():
-    global user_caption_update_pending, user_caption, user_caption_history, user_last_text
-    if user_caption_update_pending:
-        try:
-            # Create a translations object with all languages and their histories
-            all_translations = {}
-            for lang, history in user_caption_history.items():
-                if history:  # Only include languages that have history
-                    # Join all history items with newlines
-                    all_translations[lang] = "\n".join(history)
-            
-            # Also include current interim text for each language
-            for lang, interim_text in user_last_text.items():
-                if interim_text and interim_text.strip() != "":
-                    if lang in all_translations:
-                        all_translations[lang] += "\n" + interim_text
-                    else:
-                        all_translations[lang] = interim_text
-            
-            if all_translations:
-                log_message(logging.DEBUG, f"debounce_update_user_caption: sending translations for languages: {list(all_translations.keys())}")
-                log_message(logging.DEBUG, f"debounce_update_user_caption: sample translation content: {list(all_translations.items())[:2]}")
-                asyncio.run(send_caption_to_clients(all_translations, languages=list(all_translations.keys()), caption_type="user"))
-                log_message(logging.DEBUG, f"Sent user captions with history for all languages: {list(all_translations.keys())}")
-            else:
-                log_message(logging.DEBUG, f"debounce_update_user_caption: no translations to send")
-        except Exception as e:
-            log_message(logging.ERROR, f"Failed to send user caption: {e}")
-        user_caption_update_pending = False
-
-
+            if caption_session.user_interim(lang, corrected_text):
+                hot_log.debug("speech_start", "Started speech timing for %s", lang)
 
+            # Start or push back the auto-finalization deadline
+            auto_finalize_delay = USER_SETTINGS.get("user_auto_finalize_delay", 10.0)
+            caption_timers.schedule(USER_AUTO_FINALIZE, auto_finalize_delay, auto_finalize_user_speech)
+
+    # Send user caption update; events arriving while one is pending ride along with it
+    if update.data:
+        caption_timers.schedule(USER_CAPTION_DEBOUNCE, USER_CAPTION_DEBOUNCE_SECONDS, debounce_update_user_caption, reschedule=False)
+    return None
+
+def lay_out_user_refresh(update):
+    """Lay out the user view of every watched language"""
+    for lang in caption_session.languages():
+        # Only build text for languages that currently have a subscribed viewer
+        channel = user_channel(lang)
+        if not clients.channel_size(channel):
+            continue
+        text = build_user_caption_text(lang)
+        if text:
+            # Each user frame carries the full history, so a newer one safely supersedes an undelivered one
+            update.streams.append((channel, text))
+    return update
+
+def lay_out_user_text(update):
+    # User views subscribe to a single language, so each language is its own small frame
+    update.streams.extend((user_channel(lang), text) for lang, text in update.data.items())
+    return update
+
+LAYOUT_HANDLERS = {
+    PRODUCTION_SPEECH: lay_out_production_speech,
+    PRODUCTION_REFRESH: lay_out_production_refresh,
+    PAUSE_CLEAR: lay_out_pause_clear,
+    PRODUCTION_TEXT: lay_out_production_text,
+    USER_SPEECH: lay_out_user_speech,
+    USER_REFRESH: lay_out_user_refresh,
+    USER_TEXT: lay_out_user_text,
+}
 
+def layout_stage(update):
+    """Apply the update to the caption session and decide the new text of every affected stream"""
+    return LAYOUT_HANDLERS[update.kind](update)
+
+def encode_stage(update):
+    """Sequence each stream's new text (unchanged text is suppressed) and encode it once per client base"""
+    ts = update.stamp.ts if update.stamp is not None else None
+    for stream, text in update.streams:
+        frame = caption_streams.publish(stream, text, update.final, ts)
+        if frame is not None:
+            update.deliveries.append((frame, clients.encode_stream(frame, caption_streams)))
+    return update if update.deliveries else None
+
+def fanout_stage(update):
+    """Queue the encoded frames on each client's outbound queue"""
+    for frame, encoded in update.deliveries:
+        clients.deliver(frame, encoded)
+    return update
+
+caption_pipeline = CaptionPipeline(
+    [("correct", correct_stage), ("layout", layout_stage), ("encode", encode_stage), ("fanout", fanout_stage)],
+    maxsize=CONFIG.get("caption_pipeline_queue_size", 64)
+)
 
 # -------------------------------------------------------------------
 # Speech SDK Event Handlers
 # -------------------------------------------------------------------
 def on_production_speech_recognizing(evt):
     """Production recognizer - sends to both production view and user view (English)"""
-    global last_caption
-    if evt.result.reason == speechsdk.ResultReason.RecognizingSpeech:
-        text = evt.result.text
+    if evt.kind == RECOGNIZING:
+        text = evt.text
         # Process for production view
-        process_production_speech_text(text=text, is_recognized=False)
-        # Also process for user view when English is selected
-        if current_user_language == "en-US":
-            process_user_speech_text(text=text, is_recognized=False)
+        process_production_speech_text(text=text, is_recognized=False, created_at=evt.created_at)
+        # English user view always comes from the production recognizer
+        process_user_speech_text(text=text, is_recognized=False, created_at=evt.created_at)
 
 def on_production_speech_recognized(evt):
     """Production recognizer - sends to both production view and user view (English)"""
-    global last_caption
-    if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
-        text = evt.result.text
+    if evt.kind == RECOGNIZED:
+        text = evt.text
         # Process for production view
-        process_production_speech_text(text=text, is_recognized=True)
-        # Also process for user view when English is selected
-        if current_user_language == "en-US":
-            process_user_speech_text(text=text, is_recognized=True)
-    elif evt.result.reason == speechsdk.ResultReason.NoMatch:
-        try:
-            asyncio.run(send_caption_to_clients({"en-US": last_caption}, languages=["en-US"], caption_type="production"))
-        except Exception as e:
-            log_message(logging.ERROR, f"Failed to send production no-match caption: {e}")
+        process_production_speech_text(text=text, is_recognized=True, created_at=evt.created_at)
+        # English user view always comes from the production recognizer
+        process_user_speech_text(text=text, is_recognized=True, created_at=evt.created_at)
+    elif evt.kind == NO_MATCH:
+        ingest_caption(PRODUCTION_REFRESH)
 
 
 
-def on_translation_recognizing(evt):
-    """Translation recognizer - only sends to user view when non-English is selected"""
-    if evt.result.reason == speechsdk.ResultReason.TranslatingSpeech:
-        translations = evt.result.translations
-        # Add English from the original text if not already included
-        translations_dict = dict(translations)
-        if evt.result.text and "en-US" not in translations_dict:
-            translations_dict["en-US"] = evt.result.text
-        
-        # Map Azure language codes to dictionary language codes
-        mapped_translations = {}
-        for azure_code, text in translations_dict.items():
-            mapped_code = map_azure_language_code(azure_code)
+def map_translations(translations):
+    """Map Azure target codes to dictionary codes; English comes from the recognized source text"""
+    mapped_translations = {}
+    for azure_code, text in dict(translations).items():
+        mapped_code = map_azure_language_code(azure_code)
+        if mapped_code != "en-US":
             mapped_translations[mapped_code] = text
-        
-        log_message(logging.DEBUG, f"Translation recognizing: current_user_language={current_user_language}, original_translations={list(translations_dict.keys())}, mapped_translations={list(mapped_translations.keys())}")
-        
-        # Only process for user view if user is viewing non-English languages
-        if current_user_language != "en-US":
-            log_message(logging.DEBUG, f"Processing translation for user view: {mapped_translations}")
-            process_user_speech_text(translations=mapped_translations, is_recognized=False)
-        else:
-            log_message(logging.DEBUG, f"Skipping translation processing - user language is English")
+    return mapped_translations
 
-def on_translation_recognized(evt):
-    """Translation recognizer - only sends to user view when non-English is selected"""
-    if evt.result.reason == speechsdk.ResultReason.TranslatedSpeech:
-        translations = evt.result.translations
-        # Add English from the original text if not already included
-        translations_dict = dict(translations)
-        if evt.result.text and "en-US" not in translations_dict:
-            translations_dict["en-US"] = evt.result.text
-            
-        # Map Azure language codes to dictionary language codes
-        mapped_translations = {}
-        for azure_code, text in translations_dict.items():
-            mapped_code = map_azure_language_code(azure_code)
-            mapped_translations[mapped_code] = text
-            
-        log_message(logging.DEBUG, f"Translation recognized: current_user_language={current_user_language}, original_translations={list(translations_dict.keys())}, mapped_translations={list(mapped_translations.keys())}")
-            
-        # Only process for user view if user is viewing non-English languages
-        if current_user_language != "en-US":
-            log_message(logging.DEBUG, f"Processing final translation for user view: {mapped_translations}")
-            process_user_speech_text(translations=mapped_translations, is_recognized=True)
-        else:
-            log_message(logging.DEBUG, f"Skipping final translation processing - user language is English")
-    elif evt.result.reason == speechsdk.ResultReason.NoMatch:
-        try:
-            # Only send to user view if non-English is selected
-            if current_user_language != "en-US":
-                user_caption_data = {"en-US": user_caption}
-                asyncio.run(send_caption_to_clients(user_caption_data, languages=["en-US"], caption_type="user"))
-        except Exception as e:
-            log_message(logging.ERROR, f"Failed to send translation no-match caption: {e}")
+def on_translation_recognizing(evt):
+    """Translation recognizer - feeds the user view for every non-English language (and English in single mode)"""
+    if evt.kind == RECOGNIZING:
+        mapped_translations = map_translations(evt.translations)
+        if RECOGNIZER_MODE == "single" and evt.text:
+            # The source-language text stands in for the production recognizer
+            process_production_speech_text(text=evt.text, is_recognized=False, created_at=evt.created_at)
+            mapped_translations["en-US"] = evt.text
+        hot_log.debug("translation_recognizing", "Translation recognizing: %d languages", len(mapped_translations))
+        if mapped_translations:
+            process_user_speech_text(translations=mapped_translations, is_recognized=False, created_at=evt.created_at)
 
-def on_canceled(evt, recognizer_type):
+def on_translation_recognized(evt):
+    """Translation recognizer - feeds the user view for every non-English language (and English in single mode)"""
+    if evt.kind == RECOGNIZED:
+        mapped_translations = map_translations(evt.translations)
+        if RECOGNIZER_MODE == "single" and evt.text:
+            process_production_speech_text(text=evt.text, is_recognized=True, created_at=evt.created_at)
+            mapped_translations["en-US"] = evt.text
+        hot_log.debug("translation_recognized", "Translation recognized: %d languages", len(mapped_translations))
+        if mapped_translations:
+            process_user_speech_text(translations=mapped_translations, is_recognized=True, created_at=evt.created_at)
+    elif RECOGNIZER_MODE == "single" and evt.kind == NO_MATCH:
+        ingest_caption(PRODUCTION_REFRESH)
+
+def on_canceled(evt, recognizer_type, recognizer=None):
     global is_recognizing
-    if evt.reason == speechsdk.CancellationReason.Error:
+    if recognizer is not None and recognizer not in active_recognizers():
+        return  # a pair that has already been replaced
+    if evt.cancel_reason == CANCEL_ERROR:
         error_msg = f"Error in {recognizer_type}: {evt.error_details}"
         log_message(logging.ERROR, f"Speech service error: {error_msg}")
-        try:
-            asyncio.run(send_caption_to_clients({"en-US": error_msg}, languages=["en-US"], caption_type="production"))
-        except Exception as e:
-            log_message(logging.ERROR, f"Failed to send error caption: {e}")
+        queue_captions({"en-US": error_msg}, languages=["en-US"], caption_type="production")
         is_recognizing = False
-    elif evt.reason == speechsdk.CancellationReason.EndOfStream:
+        if should_be_recognizing and recognizer is not None and RECOGNIZER_STANDBY:
+            # Swap in the standby pair now rather than waiting for the watchdog
+            recognition_watchdog.record(recognizer.role, CANCELED, evt.error_details)
+            recognizer_standby.fail_over(recognizer, evt.created_at)
+    elif evt.cancel_reason == CANCEL_END_OF_STREAM:
         log_message(logging.INFO, f"Speech stream ended ({recognizer_type} canceled event).")
-        try:
-            asyncio.run(send_caption_to_clients({"en-US": "Stream ended."}, languages=["en-US"], caption_type="production"))
-        except Exception as e:
-            log_message(logging.ERROR, f"Failed to send stream-ended caption: {e}")
+        queue_captions({"en-US": "Stream ended."}, languages=["en-US"], caption_type="production")
         is_recognizing = False
+        if recognizer is not None:
+            # Nothing more will come from this stream, so it is not a stall
+            recognition_watchdog.disarm(recognizer)
 
-# Connect event handlers to recognizers
-production_recognizer.recognizing.connect(on_production_speech_recognizing)
-production_recognizer.recognized.connect(on_production_speech_recognized)
-production_recognizer.canceled.connect(lambda evt: on_canceled(evt, "ProductionRecognizer"))
+# -------------------------------------------------------------------
+# Recognition Watchdog
+# -------------------------------------------------------------------
+# Input level of the audio device, so a quiet recognizer can be told apart from a quiet room
+audio_meter = AudioLevelMeter(threshold_dbfs=CONFIG.get("watchdog_audio_threshold_dbfs", -45.0))
+
+def restart_after_watchdog(recognizer, cause, detail):
+    """Watchdog trigger (scheduler thread): hand the restart to the control thread or the event loop"""
+    if recognizer_standby.in_progress:
+        log_message(logging.INFO, "Recognizer failover already in progress; skipping watchdog restart")
+    elif cause == NOT_RECOGNIZING or not is_recognizing:
+        if caption_dispatcher.bound:
+            caption_dispatcher.submit(start_recognition())
+        else:
+            # Unbound, the dispatcher would asyncio.run the whole SDK start on this thread and hold up every caption deadline
+            log_message(logging.WARNING, "Server event loop not running; skipping watchdog restart")
+    else:
+        recognizer_control.submit("restart", restart_recognizer, recognizer)
 
-translation_recognizer.recognizing.connect(on_translation_recognizing)
-translation_recognizer.recognized.connect(on_translation_recognized)
-translation_recognizer.canceled.connect(lambda evt: on_canceled(evt, "TranslationRecognizer"))
+def restart_recognizer(recognizer):
+    """Control thread: stop and start one stalled recognizer, or fail over if that does not work"""
+    if recognizer not in active_recognizers():
+        return
+    try:
+        recognizer.stop()
+        start_recognizers([recognizer])
+    except Exception as e:
+        log_message(logging.ERROR, f"Restarting {recognizer.role} recognizer failed: {e}")
+        if RECOGNIZER_STANDBY:
+            recognizer_standby.fail_over(recognizer, time.perf_counter())
+
+# Stall deadlines per recognizer, pushed back by every recognizer event
+recognition_watchdog = RecognitionWatchdog(
+    caption_timers,
+    restart_after_watchdog,
+    lambda: is_recognizing,
+    meter=audio_meter,
+    stall_seconds=CONFIG.get("watchdog_stall_seconds", 8.0),
+    silent_stall_seconds=CONFIG.get("watchdog_silent_stall_seconds", 120.0)
+)
+if RECOGNIZER_BACKEND == "azure" and CONFIG.get("watchdog_audio_meter", True):
+    audio_meter.start()
+
+# -------------------------------------------------------------------
+# Translation Targets
+# -------------------------------------------------------------------
+def apply_translation_targets(targets):
+    """Control thread: change the running translation recognizer's targets without restarting it"""
+    if translation_recognizer is None:
+        return
+    try:
+        translation_recognizer.set_target_languages(targets)
+    except Exception as e:
+        log_message(logging.ERROR, f"Failed to update translation targets: {e}")
+
+def on_translation_targets_changed(targets):
+    recognizer_control.submit("targets", apply_translation_targets, targets)
+    if RECOGNIZER_STANDBY:
+        recognizer_standby.refresh()
+
+# Translate only into the languages user views are watching, lingering before a target is dropped
+translation_targets = TranslationTargets(
+    translation_languages(load_dictionary()),
+    caption_timers,
+    on_translation_targets_changed,
+    linger_seconds=CONFIG.get("translation_target_linger_seconds", 120.0),
+    pinned=CONFIG.get("translation_pinned_languages", []),
+    dynamic=CONFIG.get("dynamic_translation_targets", True)
+)
+USER_CHANNEL_PREFIX = user_channel("")
+
+def on_channel_changed(channel):
+    if channel.startswith(USER_CHANNEL_PREFIX):
+        translation_targets.viewers_changed(channel[len(USER_CHANNEL_PREFIX):], clients.channel_size(channel))
+
+# The server starts only after this module has loaded, so every subscribe is seen here
+clients.add_channel_listener(on_channel_changed)
+
+def update_recognizer(recognizer):
+    """Control thread: bring a recognizer's phrase list and translation targets up to date"""
+    phrase_lists.apply(recognizer)
+    recognizer.set_target_languages(translation_targets.targets)
+
+# Create the recognizers now that their event handlers exist
+production_recognizer, translation_recognizer = create_recognizers()
 
 # -------------------------------------------------------------------
 # Transcript Saving
@@ -1180,7 +1534,7 @@ async def save_transcript():
     file_path = os.path.join(CURRENT_DIR, f"transcript_{timestamp}.txt")
     try:
         with open(file_path, "w", encoding="utf-8") as file:
-            file.write("\n".join(transcript))
+            file.write("\n".join(caption_session.transcript()))
         log_message(logging.INFO, f"Transcript saved to {file_path}")
         return {"status": "success", "file_path": file_path}
     except Exception as e:
@@ -1190,86 +1544,117 @@ async def save_transcript():
 # -------------------------------------------------------------------
 # Start/Stop Recognition
 # -------------------------------------------------------------------
+# Blocking SDK start/stop/rebuild calls run one at a time on a control thread, never on the event loop
+recognizer_control = RecognizerControl(timeout=CONFIG.get("recognizer_control_timeout_seconds", 30.0))
+
+def recognizer_backoff():
+    return ExponentialBackoff(CONFIG.get("recognizer_backoff_base_seconds", 1.0), CONFIG.get("recognizer_backoff_max_seconds", 60.0))
+
+def activate_recognizers(pair):
+    """Control thread: a started standby pair replaces the failed one"""
+    global production_recognizer, translation_recognizer, is_recognizing
+    production_recognizer, translation_recognizer = pair
+    is_recognizing = True
+    recognition_watchdog.arm(pair)
+
+# A second recognizer pair, built with its phrase lists ahead of time, takes over as soon as
+# the active pair is canceled by an error
+RECOGNIZER_STANDBY = CONFIG.get("recognizer_standby", True)
+recognizer_standby = StandbyRecognizers(
+    recognizer_control,
+    create_recognizers,
+    update_recognizer,
+    lambda: (production_recognizer, translation_recognizer),
+    activate_recognizers,
+    caption_timers,
+    should_run=lambda: should_be_recognizing,
+    backoff=recognizer_backoff()
+)
+if RECOGNIZER_STANDBY:
+    recognizer_standby.prepare()
+
+def start_recognizers(recognizers):
+    """Control thread: bring the phrase lists and translation targets up to date and start continuous recognition"""
+    for recognizer in recognizers:
+        update_recognizer(recognizer)
+    start_all(recognizers)
+
+def stop_recognizers():
+    """Control thread: stop continuous recognition on whichever pair is active once queued failovers have run"""
+    for recognizer in active_recognizers():
+        recognizer.stop()
+    # A failover that finished just before this may have armed the watchdog for its new pair
+    recognition_watchdog.disarm()
+
+def log_loop_lag(action, started_at, window):
+    max_lag = window.close()
+    elapsed_ms = (time.perf_counter() - started_at) * 1000
+    if window.samples:
+        log_message(logging.INFO, "Recognizer %s took %.0fms; event loop lag peaked at %.1fms", action, elapsed_ms, max_lag * 1000)
+    else:
+        log_message(logging.INFO, "Recognizer %s took %.0fms", action, elapsed_ms)
+
 async def start_recognition():
     global production_recognizer, translation_recognizer, is_recognizing, should_be_recognizing
     max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            log_message(logging.INFO, f"Starting continuous recognition (attempt {attempt + 1}/{max_retries})")
-            
-            # Setup phrase lists for all recognizers
-            production_phrase_list = speechsdk.PhraseListGrammar.from_recognizer(production_recognizer)
-            translation_phrase_list = speechsdk.PhraseListGrammar.from_recognizer(translation_recognizer)
-            
-            dictionary = load_dictionary()
-            for phrase in dictionary["custom_phrases"] + dictionary["bible_books"]:
-                production_phrase_list.addPhrase(phrase)
-                translation_phrase_list.addPhrase(phrase)
-            
-            await send_caption_to_clients({"en-US": "Listening..."}, languages=["en-US"], caption_type="production")
-            
-            # Start both recognizers
-            production_recognizer.start_continuous_recognition()
-            translation_recognizer.start_continuous_recognition()
-            
-            is_recognizing = True
-            should_be_recognizing = True
-            log_message(logging.INFO, "Continuous recognition started successfully for both recognizers")
-            return
-        except Exception as e:
-            log_message(logging.ERROR, f"Failed to start recognition (attempt {attempt + 1}/{max_retries}): {e}")
-            if attempt < max_retries - 1:
-                # Recreate recognizers on retry
-                speech_config = speechsdk.SpeechConfig(
-                    subscription=CONFIG["speech_key"],
-                    region=CONFIG["service_region"],
-                    speech_recognition_language="en-US"
-                )
-                speech_config.set_property(speechsdk.PropertyId.SpeechServiceConnection_InitialSilenceTimeoutMs, CONFIG["initial_silence_timeout_ms"])
-                speech_config.set_property(speechsdk.PropertyId.SpeechServiceConnection_EndSilenceTimeoutMs, CONFIG["end_silence_timeout_ms"])
-                
-                production_recognizer = speechsdk.SpeechRecognizer(speech_config=speech_config)
+    backoff = recognizer_backoff()
+    window = loop_lag.watch()
+    started_at = time.perf_counter()
+    try:
+        for attempt in range(max_retries):
+            try:
+                log_message(logging.INFO, f"Starting continuous recognition (attempt {attempt + 1}/{max_retries})")
                 
-                translation_config = speechsdk.translation.SpeechTranslationConfig(
-                    subscription=CONFIG["speech_key"],
-                    region=CONFIG["service_region"],
-                    speech_recognition_language="en-US"
-                )
-                dictionary = load_dictionary()
-                for lang in dictionary.get("supported_languages", []):
-                    if lang["code"] != "en-US":
-                        translation_config.add_target_language(lang["code"])
-                translation_config.set_property(speechsdk.PropertyId.SpeechServiceConnection_InitialSilenceTimeoutMs, CONFIG["initial_silence_timeout_ms"])
-                translation_config.set_property(speechsdk.PropertyId.SpeechServiceConnection_EndSilenceTimeoutMs, CONFIG["end_silence_timeout_ms"])
-                translation_recognizer = speechsdk.translation.TranslationRecognizer(translation_config=translation_config)
+                recognizers = active_recognizers()
+                await send_caption_to_clients({"en-US": "Listening..."}, languages=["en-US"], caption_type="production")
                 
-                # Reconnect event handlers
-                production_recognizer.recognizing.connect(on_production_speech_recognizing)
-                production_recognizer.recognized.connect(on_production_speech_recognized)
-                production_recognizer.canceled.connect(lambda evt: on_canceled(evt, "ProductionRecognizer"))
+                # Setup phrase lists for all recognizers and start them
+                await recognizer_control.run("start", start_recognizers, recognizers)
                 
-                translation_recognizer.recognizing.connect(on_translation_recognizing)
-                translation_recognizer.recognized.connect(on_translation_recognized)
-                translation_recognizer.canceled.connect(lambda evt: on_canceled(evt, "TranslationRecognizer"))
-            else:
-                try:
-                    await send_caption_to_clients({"en-US": "Error: Failed to start speech recognition."}, languages=["en-US"], caption_type="production")
-                except Exception as e2:
-                    log_message(logging.ERROR, f"Failed to send error caption: {e2}")
-                is_recognizing = False
-                should_be_recognizing = False
-                raise HTTPException(status_code=500, detail=f"Failed to start recognition after {max_retries} attempts: {e}")
+                is_recognizing = True
+                should_be_recognizing = True
+                log_message(logging.INFO, f"Continuous recognition started successfully ({RECOGNIZER_MODE} mode, {len(recognizers)} recognizers)")
+                recognition_watchdog.arm(recognizers)
+                if RECOGNIZER_STANDBY:
+                    recognizer_standby.prepare()
+                return
+            except Exception as e:
+                log_message(logging.ERROR, f"Failed to start recognition (attempt {attempt + 1}/{max_retries}): {e}")
+                if attempt < max_retries - 1:
+                    # Recreate recognizers on retry, after a jittered exponential backoff
+                    delay = backoff.next_delay()
+                    log_message(logging.INFO, f"Retrying recognition start in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    try:
+                        production_recognizer, translation_recognizer = await recognizer_control.run("rebuild", create_recognizers)
+                    except Exception as e2:
+                        log_message(logging.ERROR, f"Failed to recreate recognizers: {e2}")
+                else:
+                    try:
+                        await send_caption_to_clients({"en-US": "Error: Failed to start speech recognition."}, languages=["en-US"], caption_type="production")
+                    except Exception as e2:
+                        log_message(logging.ERROR, f"Failed to send error caption: {e2}")
+                    is_recognizing = False
+                    should_be_recognizing = False
+                    raise HTTPException(status_code=500, detail=f"Failed to start recognition after {max_retries} attempts: {e}")
+    finally:
+        log_loop_lag("start", started_at, window)
 
 async def stop_recognition():
     global is_recognizing, should_be_recognizing
     log_message(logging.INFO, "Stopping continuous recognition")
+    window = loop_lag.watch()
+    started_at = time.perf_counter()
+    # Cleared first, so failovers queued or waiting out a backoff no longer bring recognizers back
+    should_be_recognizing = False
+    recognizer_standby.cancel_retry()
+    recognition_watchdog.disarm()
     try:
-        production_recognizer.stop_continuous_recognition()
-        translation_recognizer.stop_continuous_recognition()
+        await recognizer_control.run("stop", stop_recognizers)
+        caption_timers.cancel(PRODUCTION_PAUSE_CLEAR)
         await send_caption_to_clients({"en-US": "Recognition stopped."}, languages=["en-US"], caption_type="production")
         is_recognizing = False
-        should_be_recognizing = False
-        log_message(logging.INFO, "Continuous recognition stopped successfully for both recognizers")
+        log_message(logging.INFO, "Continuous recognition stopped successfully for all recognizers")
     except Exception as e:
         log_message(logging.ERROR, f"Error stopping recognition: {e}")
         try:
@@ -1277,8 +1662,24 @@ async def stop_recognition():
         except Exception as e2:
             log_message(logging.ERROR, f"Failed to send error caption: {e2}")
         is_recognizing = False
-        should_be_recognizing = False
         raise HTTPException(status_code=500, detail=f"Failed to stop recognition: {e}")
+    finally:
+        log_loop_lag("stop", started_at, window)
+
+def run_recognition_control(coro, action):
+    """
+    From the recognition schedule thread: run start_recognition/stop_recognition on the
+    server's event loop and wait for it; returns False when it failed
+    """
+    future = caption_dispatcher.submit(coro)
+    if future is None:
+        return True  # ran inline (no server loop yet) or was dropped at shutdown
+    try:
+        future.result(recognizer_control.timeout * 4)
+        return True
+    except Exception as e:
+        log_message(logging.ERROR, f"Scheduled recognition {action} failed: {e}")
+        return False
 
 # -------------------------------------------------------------------
 # Scheduler
@@ -1349,7 +1750,7 @@ def schedule_recognition(schedules):
                     def start_task():
                         global should_be_recognizing
                         should_be_recognizing = True
-                        asyncio.run(start_recognition())
+                        run_recognition_control(start_recognition(), "start")
                         log_message(logging.INFO, f"Started recognition for schedule: {schedule_info['date']} at {schedule_info['start_time']}")
                     return start_task
                 
@@ -1358,7 +1759,7 @@ def schedule_recognition(schedules):
                     def stop_task():
                         global should_be_recognizing
                         should_be_recognizing = False
-                        asyncio.run(stop_recognition())
+                        run_recognition_control(stop_recognition(), "stop")
                         log_message(logging.INFO, f"Stopped recognition for schedule: {schedule_info['date']} at {schedule_info['stop_time']}")
                     return stop_task
                 
@@ -1409,37 +1810,23 @@ saved_schedules = load_schedule()
 if saved_schedules:
     schedule_recognition(saved_schedules)
 
-# -------------------------------------------------------------------
-# Health Check
-# -------------------------------------------------------------------
-def monitor_speech_recognition():
-    global is_recognizing, should_be_recognizing
-    while True:
-        try:
-            if is_recognizing:
-                log_message(logging.DEBUG, "Speech recognizer is active")
-            elif should_be_recognizing:
-                log_message(logging.WARNING, "Speech recognizer not active but should be; restarting")
-                asyncio.run(start_recognition())
-            else:
-                log_message(logging.INFO, "Speech recognizer not active and not expected to be; skipping restart")
-        except Exception as e:
-            log_message(logging.ERROR, f"Health check failed: {e}")
-        time.sleep(60)
-
-health_thread = threading.Thread(target=monitor_speech_recognition, daemon=True)
-health_thread.start()
-
 # -------------------------------------------------------------------
 # Cleanup
 # -------------------------------------------------------------------
 def cleanup():
     try:
-        production_recognizer.stop_continuous_recognition()
-        translation_recognizer.stop_continuous_recognition()
+        for recognizer in active_recognizers():
+            recognizer.stop()
         log_message(logging.INFO, "Speech recognition stopped during cleanup.")
     except Exception as e:
         log_message(logging.ERROR, f"Error stopping speech recognition during cleanup: {e}")
+    if event_recorder is not None:
+        event_recorder.close()
+    caption_timers.stop()
+    audio_meter.stop()
+    recognizer_control.shutdown()
+    # Flush whatever is still queued for the log file
+    log_listener.stop()
 
 atexit.register(cleanup)
 
@@ -1447,23 +1834,12 @@ atexit.register(cleanup)
 # Simulated Speech Input for Debugging
 # -------------------------------------------------------------------
 def simulate_speech_input(text):
-    on_production_speech_recognizing(type("Event", (), {"result": type("Result", (), {
-        "reason": speechsdk.ResultReason.RecognizingSpeech,
-        "text": text
-    })}))
-    on_production_speech_recognized(type("Event", (), {"result": type("Result", (), {
-        "reason": speechsdk.ResultReason.RecognizedSpeech,
-        "text": text
-    })}))
-    translations = {lang["code"]: text for lang in dictionary.get("supported_languages", []) if lang["code"] != "en-US"}
-    on_translation_recognizing(type("Event", (), {"result": type("Result", (), {
-        "reason": speechsdk.ResultReason.TranslatingSpeech,
-        "translations": translations
-    })}))
-    on_translation_recognized(type("Event", (), {"result": type("Result", (), {
-        "reason": speechsdk.ResultReason.TranslatedSpeech,
-        "translations": translations
-    })}))
+    translations = {lang["code"]: text for lang in load_dictionary().get("supported_languages", []) if lang["code"] != "en-US"}
+    if production_recognizer is not None:
+        on_production_speech_recognizing(RecognitionEvent(RECOGNIZING, text))
+        on_production_speech_recognized(RecognitionEvent(RECOGNIZED, text))
+    on_translation_recognizing(RecognitionEvent(RECOGNIZING, text, translations))
+    on_translation_recognized(RecognitionEvent(RECOGNIZED, text, translations))
 
 if os.getenv("DEBUG_MODE"):
     simulate_speech_input("This is a test caption.")
@@ -1473,12 +1849,14 @@ if os.getenv("DEBUG_MODE"):
 # -------------------------------------------------------------------
 class TestSpeechProcessing(unittest.TestCase):
     def test_spelling_corrections(self):
-        self.assertEqual(spelling_corrections("genisis"), "Genesis")
-        self.assertEqual(spelling_corrections("jesus christ"), "Jesus Christ")
+        self.assertEqual(apply_text_corrections("pslam 23"), "Psalm 23")
+        self.assertEqual(apply_text_corrections("mathew"), "Matthew")
+        self.assertEqual(apply_text_corrections("jesus christ"), "Jesus Christ")
 
     def test_bible_books(self):
-        self.assertEqual(correct_bible_books("psalms 23"), "Psalms 23")
-        self.assertEqual(correct_bible_books("hello world"), "hello world")
+        self.assertEqual(apply_text_corrections("psalms 23"), "Psalms 23")
+        self.assertEqual(apply_text_corrections("hello world"), "hello world")
+        self.assertEqual(apply_text_corrections("turn to song of solomon, chapter 2"), "turn to Song of Solomon, chapter 2")
 
     def test_validate_time_format(self):
         self.assertTrue(validate_time_format("09:30"))
@@ -1491,17 +1869,9 @@ class TestSpeechProcessing(unittest.TestCase):
 
 @app.post("/clear_production_captions", dependencies=[Depends(get_current_username)])
 async def clear_production_captions():
-    global production_caption, production_caption_history, transcript, last_caption, user_caption, user_caption_history, user_last_text
-    # Clear production view data
-    production_caption = ""
-    production_caption_history = ""
-    transcript = []
-    last_caption = ""
-    
-    # Clear user view data
-    user_caption = ""
-    user_caption_history = {lang: [] for lang in user_caption_history.keys()}
-    user_last_text = {lang: "" for lang in user_last_text.keys()}
+    # Clear production view data, the transcript and user view data
+    caption_timers.cancel(PRODUCTION_PAUSE_CLEAR)
+    caption_session.clear()
     
     # Send empty captions to clear both production and user views
     try:
@@ -1560,30 +1930,19 @@ async def set_user_settings_public(settings: dict):
     return {"status": "success"}
 
 async def broadcast_user_settings(settings):
-    for client in clients:
-        try:
-            await client.send_text(json.dumps({"type": "user_settings", "settings": settings}))
-            log_message(logging.DEBUG, f"Sent user settings to client: {client.client}")
-        except Exception as e:
-            log_message(logging.ERROR, f"WebSocket send error for user settings: {e}")
-            clients.remove(client)
+    clients.broadcast(frame_encoder.encode({"type": "user_settings", "settings": settings}), key="user_settings")
 
 @app.get("/recognition_status", dependencies=[Depends(get_current_username)])
 async def recognition_status():
     global is_recognizing
     return {"is_recognizing": is_recognizing}
 
-@app.post("/set_user_language")
-async def set_user_language(language_data: dict):
-    global current_user_language
-    language_code = language_data.get("language", "en-US")
-    current_user_language = language_code
-    log_message(logging.INFO, f"User language changed to: {language_code}")
-    return {"status": "success", "current_language": current_user_language}
-
 if __name__ == "__main__":
     if os.getenv("RUN_TESTS"):
         unittest.main()
     else:
+        # Serve only once everything the startup hook binds (dispatcher, pipeline, writer) exists
+        fastapi_thread = threading.Thread(target=run_fastapi, daemon=True)
+        fastapi_thread.start()
         while True:
             time.sleep(1)
\ No newline at end of file
@@ -20,6 +20,7 @@ import textwrap
 from dotenv import load_dotenv
 import webbrowser
 from typing import Dict, List
+from caption_logging import setup_logging
 
 # Try to import sounddevice, but don't fail if it's not available
 try:
@@ -41,12 +42,15 @@ load_dotenv()
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 LOG_FILE = os.path.join(CURRENT_DIR, "caption_log.txt")
 
-logging.basicConfig(
-    filename=LOG_FILE,
-    level=logging.DEBUG,
-    format='%(asctime)s [%(levelname)s] [SpeechCaption] %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
+# Records are written, rotated and gzipped by a background thread (see caption_logging)
+log_listener = setup_logging(
+    LOG_FILE,
+    level=getattr(logging, os.getenv("LOG_LEVEL", "DEBUG").upper(), logging.DEBUG),
+    max_bytes=int(os.getenv("LOG_MAX_MB", "50")) * 1024 * 1024,
+    backups=int(os.getenv("LOG_BACKUPS", "3"))
 )
+# Flush whatever is still queued for the log file at exit
+atexit.register(log_listener.stop)
 
 def log_message(level, message):
     logging.log(level, f"[SpeechCaption] {message}")
@@ -1128,12 +1132,15 @@ async def set_user_settings(settings: dict):
         log_message(logging.ERROR, f"Failed to broadcast user settings: {e}")
     return {"status": "success"}
 
-@app.post("/set_user_language")
-async def set_user_language(language_data: dict):
+def select_user_language(language_code):
+    """Switch the recognizer routing to the language a user view displays"""
     global current_user_language
-    language_code = language_data.get("language", "en-US")
     current_user_language = language_code
     log_message(logging.INFO, f"User language changed to: {language_code}")
+
+@app.post("/set_user_language")
+async def set_user_language(language_data: dict):
+    select_user_language(language_data.get("language", "en-US"))
     return {"status": "success", "current_language": current_user_language}
 
 @app.post("/test_speech_processing")
@@ -1186,7 +1193,14 @@ async def websocket_endpoint(websocket: WebSocket, token: str = Query(...)):
     clients.append(websocket)
     try:
         while True:
-            await websocket.receive_text()
+            data = await websocket.receive_text()
+            # user.html picks its language over the socket ({"type": "subscribe"/"hello", "language": ...})
+            try:
+                message = json.loads(data)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(message, dict) and message.get("type") in ("subscribe", "language", "hello") and message.get("language"):
+                select_user_language(message["language"])
     except Exception as e:
         log_message(logging.ERROR, f"WebSocket error: {e}")
     finally:
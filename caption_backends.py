@@ -0,0 +1,409 @@
+"""
+Recognizer Backends
+One interface over the speech recognizers that feed the caption pipeline, so the
+pipeline can run, be tested and be benchmarked without Azure credentials or network.
+
+Backends:
+    azure   Azure Speech SDK SpeechRecognizer / TranslationRecognizer
+    stub    scripted interim/final hypotheses grown word by word from a transcript
+    replay  recorded recognizing/recognized/canceled events played from a JSON Lines
+            file at real-time (speed 1), N times faster (speed N) or as fast as possible (speed 0)
+
+Every backend creates recognizers for a role (SPEECH or TRANSLATION) with SDK-style
+recognizing/recognized/canceled and session_started/session_stopped signals.
+Handlers receive RecognitionEvent objects, never SDK types.
+
+Replay files are written by EventRecorder, one event per line:
+    {"t": 1.234, "source": "translation", "kind": "recognizing", "text": "...", "translations": {"es": "..."}}
+    {"t": 9.870, "source": "translation", "kind": "canceled", "cancel_reason": "error", "error_details": "..."}
+"""
+
+import json
+import logging
+import threading
+import time
+
+try:
+    import azure.cognitiveservices.speech as speechsdk
+    AZURE_AVAILABLE = True
+except ImportError:
+    speechsdk = None
+    AZURE_AVAILABLE = False
+
+# Recognizer roles
+SPEECH = "speech"
+TRANSLATION = "translation"
+
+# Event kinds
+RECOGNIZING = "recognizing"
+RECOGNIZED = "recognized"
+NO_MATCH = "no_match"
+CANCELED = "canceled"
+SESSION_STARTED = "session_started"
+SESSION_STOPPED = "session_stopped"
+
+# Cancellation reasons
+CANCEL_ERROR = "error"
+CANCEL_END_OF_STREAM = "end_of_stream"
+
+SAMPLE_SERMON = (
+    "In the beginning was the Word and the Word was with God and the Word was God. "
+    "Turn with me to first Corinthians chapter thirteen and we will read from verse four. "
+    "Love is patient love is kind it does not envy it does not boast it is not proud. "
+    "Paul writes this letter to a church in Corinth that was divided over gifts and leaders. "
+    "So this morning I want us to ask what it would look like for love to lead in our homes. "
+    "Let's open the Song of Solomon and then we will come back to Romans chapter eight. "
+    "There is therefore now no condemnation for those who are in Christ Jesus. "
+    "Jesus said I am the way the truth and the life and no one comes to the Father except through me."
+)
+
+
+def interim_hypotheses(transcript=SAMPLE_SERMON):
+    """Yield (text, is_final) the way Azure grows an interim hypothesis word by word"""
+    for sentence in transcript.split(". "):
+        words = sentence.strip(". ").split()
+        for i in range(1, len(words) + 1):
+            yield " ".join(words[:i]), False
+        yield " ".join(words) + ".", True
+
+
+def language_prefix(code):
+    """Primary language subtag, so recorded Azure codes ("es") match dictionary codes ("es-ES")"""
+    return code.split("-")[0].lower()
+
+
+class RecognitionEvent:
+    """Backend-neutral recognizer event; created_at is when the backend emitted it"""
+    __slots__ = ("kind", "text", "translations", "cancel_reason", "error_details", "created_at")
+
+    def __init__(self, kind, text="", translations=None, cancel_reason=None, error_details=""):
+        self.kind = kind
+        self.text = text
+        self.translations = translations if translations is not None else {}
+        self.cancel_reason = cancel_reason
+        self.error_details = error_details
+        self.created_at = time.perf_counter()
+
+    def to_record(self):
+        record = {"kind": self.kind}
+        if self.kind == CANCELED:
+            record["cancel_reason"] = self.cancel_reason
+            record["error_details"] = self.error_details
+        else:
+            record["text"] = self.text
+            if self.translations:
+                record["translations"] = dict(self.translations)
+        return record
+
+    @classmethod
+    def from_record(cls, record):
+        return cls(record["kind"], record.get("text", ""), dict(record.get("translations") or {}),
+                   record.get("cancel_reason"), record.get("error_details", ""))
+
+
+class EventSignal:
+    """SDK-style signal: connect() handlers, fire() calls them on the recognizer's thread"""
+
+    def __init__(self):
+        self._handlers = []
+
+    def connect(self, handler):
+        self._handlers.append(handler)
+
+    def fire(self, evt):
+        for handler in list(self._handlers):
+            try:
+                handler(evt)
+            except Exception as e:
+                logging.error(f"[SpeechCaption] Recognizer event handler failed: {e}")
+
+
+class Recognizer:
+    """Base recognizer: role plus recognizing/recognized/canceled and session signals"""
+
+    def __init__(self, role):
+        self.role = role
+        self.recognizing = EventSignal()
+        self.recognized = EventSignal()
+        self.canceled = EventSignal()
+        self.session_started = EventSignal()
+        self.session_stopped = EventSignal()
+
+    def set_phrases(self, phrases):
+        """Bias recognition towards phrases (replacing earlier ones); backends without a language model ignore this"""
+
+    def add_phrases(self, phrases):
+        """Add phrases to the current list; safe while recognition is running"""
+
+    def set_target_languages(self, languages):
+        """Translate into exactly these languages from the next event on; only translation recognizers have targets"""
+
+    def start(self):
+        raise NotImplementedError
+
+    def start_async(self):
+        """Begin starting; returns a callable that waits until started. Backends with a native async start override this"""
+        self.start()
+        return lambda: None
+
+    def stop(self):
+        raise NotImplementedError
+
+
+# -------------------------------------------------------------------
+# Azure Speech SDK
+# -------------------------------------------------------------------
+class AzureRecognizer(Recognizer):
+    """Adapts a Speech SDK recognizer's events to RecognitionEvent"""
+
+    def __init__(self, role, sdk_recognizer, target_languages=()):
+        super().__init__(role)
+        self.sdk_recognizer = sdk_recognizer
+        self._grammar = None
+        self._targets = set(target_languages)
+        sdk_recognizer.recognizing.connect(self._on_recognizing)
+        sdk_recognizer.recognized.connect(self._on_recognized)
+        sdk_recognizer.canceled.connect(self._on_canceled)
+        sdk_recognizer.session_started.connect(lambda evt: self.session_started.fire(RecognitionEvent(SESSION_STARTED)))
+        sdk_recognizer.session_stopped.connect(lambda evt: self.session_stopped.fire(RecognitionEvent(SESSION_STOPPED)))
+
+    def _translations(self, result):
+        return dict(result.translations) if self.role == TRANSLATION else {}
+
+    def _on_recognizing(self, evt):
+        if evt.result.reason in (speechsdk.ResultReason.RecognizingSpeech, speechsdk.ResultReason.TranslatingSpeech):
+            self.recognizing.fire(RecognitionEvent(RECOGNIZING, evt.result.text, self._translations(evt.result)))
+
+    def _on_recognized(self, evt):
+        if evt.result.reason in (speechsdk.ResultReason.RecognizedSpeech, speechsdk.ResultReason.TranslatedSpeech):
+            self.recognized.fire(RecognitionEvent(RECOGNIZED, evt.result.text, self._translations(evt.result)))
+        elif evt.result.reason == speechsdk.ResultReason.NoMatch:
+            self.recognized.fire(RecognitionEvent(NO_MATCH))
+
+    def _on_canceled(self, evt):
+        if evt.reason == speechsdk.CancellationReason.Error:
+            self.canceled.fire(RecognitionEvent(CANCELED, cancel_reason=CANCEL_ERROR, error_details=evt.error_details))
+        elif evt.reason == speechsdk.CancellationReason.EndOfStream:
+            self.canceled.fire(RecognitionEvent(CANCELED, cancel_reason=CANCEL_END_OF_STREAM))
+
+    def _phrase_list(self):
+        if self._grammar is None:
+            self._grammar = speechsdk.PhraseListGrammar.from_recognizer(self.sdk_recognizer)
+        return self._grammar
+
+    def set_phrases(self, phrases):
+        phrase_list = self._phrase_list()
+        phrase_list.clear()
+        for phrase in phrases:
+            phrase_list.addPhrase(phrase)
+
+    def add_phrases(self, phrases):
+        # The SDK picks up phrase list changes from the next utterance on, without a restart
+        phrase_list = self._phrase_list()
+        for phrase in phrases:
+            phrase_list.addPhrase(phrase)
+
+    def set_target_languages(self, languages):
+        if self.role != TRANSLATION:
+            return
+        languages = set(languages)
+        # The SDK adds and removes targets on a running recognizer, no restart needed
+        for code in languages - self._targets:
+            self.sdk_recognizer.add_target_language(code)
+        for code in self._targets - languages:
+            self.sdk_recognizer.remove_target_language(code)
+        self._targets = languages
+
+    def start(self):
+        self.sdk_recognizer.start_continuous_recognition()
+
+    def start_async(self):
+        return self.sdk_recognizer.start_continuous_recognition_async().get
+
+    def stop(self):
+        self.sdk_recognizer.stop_continuous_recognition()
+
+
+class AzureBackend:
+    name = "azure"
+
+    def __init__(self, speech_key, region, language="en-US", target_languages=(),
+                 initial_silence_timeout_ms=None, end_silence_timeout_ms=None):
+        if not AZURE_AVAILABLE:
+            raise RuntimeError("azure-cognitiveservices-speech is not installed")
+        self.speech_key = speech_key
+        self.region = region
+        self.language = language
+        self.target_languages = list(target_languages)
+        self.initial_silence_timeout_ms = initial_silence_timeout_ms
+        self.end_silence_timeout_ms = end_silence_timeout_ms
+
+    def _apply_timeouts(self, config):
+        if self.initial_silence_timeout_ms is not None:
+            config.set_property(speechsdk.PropertyId.SpeechServiceConnection_InitialSilenceTimeoutMs, str(self.initial_silence_timeout_ms))
+        if self.end_silence_timeout_ms is not None:
+            config.set_property(speechsdk.PropertyId.SpeechServiceConnection_EndSilenceTimeoutMs, str(self.end_silence_timeout_ms))
+        return config
+
+    def create(self, role):
+        if role == SPEECH:
+            config = self._apply_timeouts(speechsdk.SpeechConfig(
+                subscription=self.speech_key, region=self.region, speech_recognition_language=self.language))
+            return AzureRecognizer(role, speechsdk.SpeechRecognizer(speech_config=config))
+        config = speechsdk.translation.SpeechTranslationConfig(
+            subscription=self.speech_key, region=self.region, speech_recognition_language=self.language)
+        for code in self.target_languages:
+            config.add_target_language(code)
+        self._apply_timeouts(config)
+        return AzureRecognizer(role, speechsdk.translation.TranslationRecognizer(translation_config=config), self.target_languages)
+
+
+# -------------------------------------------------------------------
+# Offline playback (stub and replay)
+# -------------------------------------------------------------------
+class PlaybackRecognizer(Recognizer):
+    """
+    Plays a timeline of (seconds, record) pairs on its own thread, firing each record
+    as a fresh RecognitionEvent. speed 1 is real time, N is N times faster, 0 is no waiting.
+    """
+
+    def __init__(self, role, timeline, speed=1.0, loop=False):
+        super().__init__(role)
+        self.timeline = list(timeline)
+        self.speed = speed
+        self.loop = loop
+        # None: every translation in the timeline; otherwise only these languages
+        self.target_languages = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._play, daemon=True, name=f"playback-{self.role}")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def set_target_languages(self, languages):
+        if self.role == TRANSLATION:
+            self.target_languages = frozenset(language_prefix(code) for code in languages)
+
+    def join(self, timeout=None):
+        """Wait for a non-looping playback to finish"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _play(self):
+        self.session_started.fire(RecognitionEvent(SESSION_STARTED))
+        try:
+            self._play_timeline()
+        finally:
+            self.session_stopped.fire(RecognitionEvent(SESSION_STOPPED))
+
+    def _play_timeline(self):
+        signals = {RECOGNIZING: self.recognizing, RECOGNIZED: self.recognized, NO_MATCH: self.recognized, CANCELED: self.canceled}
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            for offset, record in self.timeline:
+                if self.speed > 0:
+                    delay = started + offset / self.speed - time.perf_counter()
+                    if delay > 0 and self._stop.wait(delay):
+                        return
+                elif self._stop.is_set():
+                    return
+                signal = signals.get(record["kind"])
+                if signal is not None:
+                    evt = RecognitionEvent.from_record(record)
+                    targets = self.target_languages
+                    if targets is not None and evt.translations:
+                        evt.translations = {code: text for code, text in evt.translations.items()
+                                            if language_prefix(code) in targets}
+                    signal.fire(evt)
+            if not self.loop or not self.timeline:
+                return
+
+
+class StubBackend:
+    """Scripted hypotheses from a transcript at rate events per second; translations echo the source text"""
+    name = "stub"
+
+    def __init__(self, transcript=SAMPLE_SERMON, rate=8.0, target_languages=(), speed=1.0, loop=False):
+        self.transcript = transcript
+        self.rate = rate
+        self.target_languages = list(target_languages)
+        self.speed = speed
+        self.loop = loop
+
+    def timeline(self, role):
+        timeline = []
+        for i, (text, final) in enumerate(interim_hypotheses(self.transcript)):
+            record = {"kind": RECOGNIZED if final else RECOGNIZING, "text": text}
+            if role == TRANSLATION:
+                record["translations"] = {code: text for code in self.target_languages}
+            timeline.append((i / self.rate, record))
+        return timeline
+
+    def create(self, role):
+        return PlaybackRecognizer(role, self.timeline(role), self.speed, self.loop)
+
+
+class ReplayBackend:
+    """Recorded events from an EventRecorder file"""
+    name = "replay"
+
+    def __init__(self, path, speed=1.0, loop=False):
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.records = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    self.records.append(json.loads(line))
+        logging.info(f"[SpeechCaption] Loaded {len(self.records)} recorded recognizer events from {path}")
+
+    def timeline(self, role):
+        timeline = [(record["t"], record) for record in self.records if record.get("source") == role]
+        if not timeline and role == SPEECH:
+            # A single-recognizer recording still drives a SpeechRecognizer: same text, no translations
+            timeline = [(t, {key: value for key, value in record.items() if key != "translations"})
+                        for t, record in self.timeline(TRANSLATION)]
+        return timeline
+
+    def create(self, role):
+        return PlaybackRecognizer(role, self.timeline(role), self.speed, self.loop)
+
+
+class EventRecorder:
+    """Writes every event of the attached recognizers to a JSON Lines file ReplayBackend can play (overwrites path)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "w", encoding="utf-8")
+        self._started = None
+
+    def attach(self, recognizer):
+        for signal in (recognizer.recognizing, recognizer.recognized, recognizer.canceled):
+            signal.connect(lambda evt, role=recognizer.role: self.record(role, evt))
+
+    def record(self, source, evt):
+        with self._lock:
+            if self._file is None:
+                return
+            if self._started is None:
+                self._started = evt.created_at
+            record = {"t": round(evt.created_at - self._started, 3), "source": source}
+            record.update(evt.to_record())
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,1326 @@
+#!/usr/bin/env python3
+"""
+Caption Pipeline Benchmarks
+Offline micro-benchmarks for the caption hot path. None of these need Azure
+credentials, a microphone or a running server.
+
+Usage:
+    python caption_benchmark.py dispatch [--events 600] [--threads 2] [--rate 100] [--clients 50]
+    python caption_benchmark.py fanout [--clients 300] [--slow 1] [--frames 150] [--rate 15]
+    python caption_benchmark.py encode [--broadcasts 200]
+    python caption_benchmark.py delta [--ack-every 7]
+    python caption_benchmark.py recognizers [--rate 40] [--languages 7] [--replay events.jsonl] [--speed 1]
+    python caption_benchmark.py corrections [--transcript transcript_YYYYMMDD_HHMMSS.txt] [--rounds 20]
+    python caption_benchmark.py dictionary [--requests 500] [--disk-delay-ms 5]
+    python caption_benchmark.py layout [--width 60]
+    python caption_benchmark.py profiles [--viewers 100]
+    python caption_benchmark.py timers [--events 400] [--rate 20]
+    python caption_benchmark.py pause [--pauses 10] [--threshold 0.2]
+    python caption_benchmark.py ordered [--rate 50] [--clients 50] [--speed 1]
+    python caption_benchmark.py pipeline [--rate 50] [--clients 50] [--queue 64] [--speed 1]
+    python caption_benchmark.py logging [--rounds 5] [--disk-delay-ms 0]
+    python caption_benchmark.py lifecycle [--handshake-ms 800]
+    python caption_benchmark.py failover [--failures 3] [--build-ms 300] [--start-ms 800] [--poll 5]
+    python caption_benchmark.py watchdog [--stalls 3] [--stall-seconds 1] [--rate 20]
+    python caption_benchmark.py phrases [--restarts 10] [--edits 20] [--add-ms 0.5]
+    python caption_benchmark.py targets [--watched 2] [--viewer-changes 200] [--linger 0.5]
+"""
+
+import argparse
+import asyncio
+import builtins
+import json
+import logging
+import os
+import random
+import tempfile
+import textwrap
+import threading
+import time
+import tracemalloc
+
+from caption_backends import (RECOGNIZED, SAMPLE_SERMON, SPEECH, TRANSLATION, Recognizer, ReplayBackend, StubBackend,
+                              interim_hypotheses)
+from caption_control import ExponentialBackoff, LoopLagMonitor, RecognizerControl, StandbyRecognizers
+from caption_corrections import CorrectionEngine, IncrementalCorrector
+from caption_dictionary import DictionaryStore
+from caption_dispatch import LoopDispatcher, OrderedDispatcher
+from caption_encoding import ENCODERS, FrameEncoder
+from caption_fanout import ClientHub
+from caption_layout import DisplayProfile, LineLayoutCache
+from caption_logging import LOG_DATE_FORMAT, LOG_FORMAT, HotPathLog, setup_logging
+from caption_metrics import LatencyHistogram, MetricsRegistry
+from caption_phrase_lists import PhraseLists
+from caption_pipeline import CaptionPipeline, CaptionUpdate
+from caption_protocol import CaptionStreams
+from caption_targets import TranslationTargets
+from caption_timers import CaptionScheduler
+from caption_watchdog import AudioLevelMeter, RecognitionWatchdog
+
+def print_histogram(label, histogram):
+    snap = histogram.snapshot()
+    print(f"  {label:<38} n={snap['count']:<6} mean={snap['mean_ms']:.4f}ms "
+          f"p50<={snap['p50_ms']}ms p90<={snap['p90_ms']}ms p99<={snap['p99_ms']}ms max={snap['max_ms']:.3f}ms")
+
+
+# -------------------------------------------------------------------
+# dispatch: asyncio.run() per event vs. handoff into one long-lived loop
+# -------------------------------------------------------------------
+class FakeWebSocket:
+    """Stands in for a connected client; send_text just yields to the loop"""
+
+    def __init__(self):
+        self.sent = 0
+
+    async def send_text(self, text):
+        self.sent += 1
+        await asyncio.sleep(0)
+
+
+def bench_dispatch(args):
+    fake_clients = [FakeWebSocket() for _ in range(args.clients)]
+    payload = {"type": "caption", "translations": {"production": {"en-US": "and the word became flesh"}}, "languages": ["en-US"]}
+
+    async def broadcast():
+        text = json.dumps(payload)
+        for client in fake_clients:
+            await client.send_text(text)
+
+    def drive(on_event):
+        per_thread = args.events // args.threads
+        interval = 1.0 / args.rate
+
+        def recognizer_thread():
+            next_at = time.perf_counter()
+            for _ in range(per_thread):
+                on_event()
+                next_at += interval
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+        workers = [threading.Thread(target=recognizer_thread) for _ in range(args.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    # Before: every SDK callback builds and tears down its own event loop
+    before = LatencyHistogram("asyncio_run_per_event")
+
+    def legacy_event():
+        with before.time():
+            asyncio.run(broadcast())
+
+    drive(legacy_event)
+
+    # After: SDK callbacks hand the coroutine to the server loop and return immediately
+    registry = MetricsRegistry()
+    dispatcher = LoopDispatcher(metrics=registry)
+    callback_cost = LatencyHistogram("dispatcher_callback_cost")
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+
+    def run_loop():
+        asyncio.set_event_loop(loop)
+        loop.call_soon(lambda: (dispatcher.bind(loop), ready.set()))
+        loop.run_forever()
+
+    loop_thread = threading.Thread(target=run_loop, daemon=True)
+    loop_thread.start()
+    ready.wait()
+    pending = []
+    pending_lock = threading.Lock()
+
+    def dispatched_event():
+        with callback_cost.time():
+            future = dispatcher.submit(broadcast())
+        with pending_lock:
+            pending.append(future)
+
+    drive(dispatched_event)
+    for future in pending:
+        future.result(timeout=30)
+    loop.call_soon_threadsafe(loop.stop)
+    loop_thread.join()
+    loop.close()
+
+    print(f"dispatch: {args.events} events on {args.threads} threads at {args.rate}/s each, {args.clients} fake clients")
+    print_histogram("before: asyncio.run() per event", before)
+    print_histogram("after: SDK-thread cost of submit()", callback_cost)
+    print_histogram("after: handoff until loop runs frame", registry.histogram("dispatch_handoff_ms"))
+
+
+# -------------------------------------------------------------------
+# fanout: sequential send loop vs. per-client queues with one stalled viewer
+# -------------------------------------------------------------------
+class TimedWebSocket:
+    """Fake client that records delivery latency of frames stamped with their broadcast time"""
+
+    def __init__(self, delay, histogram):
+        self.delay = delay
+        self.histogram = histogram
+        self.client = ("bench", id(self))
+
+    async def send_text(self, text):
+        await asyncio.sleep(self.delay)
+        if self.histogram is not None:
+            self.histogram.observe(time.perf_counter() - json.loads(text)["t"])
+
+    async def close(self, code=1000, reason=None):
+        pass
+
+
+def bench_fanout(args):
+    async def run(mode):
+        fast = LatencyHistogram(f"{mode}_fast_client_delivery")
+        sockets = [TimedWebSocket(args.slow_delay, None) for _ in range(args.slow)]
+        sockets += [TimedWebSocket(0, fast) for _ in range(args.clients - args.slow)]
+        registry = MetricsRegistry()
+        hub = ClientHub(send_timeout=args.send_timeout, max_lag_seconds=args.max_lag, metrics=registry)
+        connections = [hub.register(ws) for ws in sockets] if mode == "queued" else []
+        tasks = []
+
+        async def sequential_broadcast(text):
+            # The pre-queue send_caption_to_clients: one client at a time
+            for ws in sockets:
+                await ws.send_text(text)
+
+        for i in range(args.frames):
+            text = json.dumps({"t": time.perf_counter(), "type": "caption", "seq": i})
+            final = i % 10 == 9
+            if mode == "queued":
+                hub.broadcast(text, key="production", final=final)
+            else:
+                tasks.append(asyncio.create_task(sequential_broadcast(text)))
+            await asyncio.sleep(1.0 / args.rate)
+        await asyncio.sleep(0.5)
+        for task in tasks:
+            task.cancel()
+        for connection in connections:
+            hub.unregister(connection)
+        return fast, registry
+
+    print(f"fanout: {args.clients} clients ({args.slow} stalled at {args.slow_delay}s/send), {args.frames} frames at {args.rate}/s")
+    sequential, _ = asyncio.run(run("sequential"))
+    queued, registry = asyncio.run(run("queued"))
+    print_histogram("before: sequential send, fast clients", sequential)
+    print_histogram("after: per-client queues, fast clients", queued)
+    counters = registry.snapshot()["counters"]
+    print(f"  after: interim dropped={counters['fanout_interim_dropped']} "
+          f"send timeouts={counters['fanout_send_timeouts']} evicted={counters['fanout_evicted']}")
+
+
+# -------------------------------------------------------------------
+# encode: json.dumps per client vs. encode once per broadcast
+# -------------------------------------------------------------------
+def bench_encode(args):
+    history = "\n".join(["In the beginning was the Word, and the Word was with God."] * 3)
+    payload = {
+        "type": "caption",
+        "translations": {"user": {code: history for code in ("en-US", "es-ES", "fr-FR", "de-DE", "zh-CN", "ja-JP", "ru-RU", "ar-EG")}},
+        "languages": ["en-US", "es-ES", "fr-FR", "de-DE", "zh-CN", "ja-JP", "ru-RU", "ar-EG"]
+    }
+    print(f"encode: per-broadcast serialization cost, {args.broadcasts} broadcasts per row (mean ms)")
+    print(f"  {'viewers':>8} {'json per client':>16} " + " ".join(f"{'once/' + name:>14}" for name in ENCODERS))
+    for viewers in (1, 10, 100, 300, 1000):
+        per_client = LatencyHistogram("per_client")
+        for _ in range(args.broadcasts):
+            with per_client.time():
+                for _ in range(viewers):
+                    json.dumps(payload)
+        row = f"  {viewers:>8} {per_client.snapshot()['mean_ms']:>16.4f} "
+        for name in ENCODERS:
+            registry = MetricsRegistry()
+            encoder = FrameEncoder(name, metrics=registry)
+            for _ in range(args.broadcasts):
+                encoder.encode(payload)
+            row += f"{registry.histogram('encode_frame_ms').snapshot()['mean_ms']:>14.4f} "
+        print(row)
+
+
+# -------------------------------------------------------------------
+# delta: full-text frames vs. protocol 2 deltas against the acknowledged frame
+# -------------------------------------------------------------------
+def bench_delta(args):
+    encoder = FrameEncoder("json", metrics=MetricsRegistry())
+    streams = CaptionStreams(encoder.encode, lambda frame: {"type": "caption", "translations": {"user": {"en-US": frame.text}}, "languages": ["en-US"], "seq": frame.seq})
+    history = []
+    legacy_chars = delta_chars = frames = suppressed = 0
+    acked = None
+    for text, final in interim_hypotheses():
+        # The user view stream carries the last three finalized lines plus the interim tail
+        display = "\n".join(history + [text])
+        if final:
+            history = (history + [text])[-3:]
+        frame = streams.publish("user:en-US", display, final)
+        if frame is None:
+            suppressed += 1
+            continue
+        frames += 1
+        legacy_chars += len(streams.legacy_text(frame))
+        delta_chars += len(streams.delta_text(frame, acked))
+        if frames % args.ack_every == 0:
+            acked = frame.seq
+    print(f"delta: {frames} user-view frames ({suppressed} unchanged suppressed), client acks every {args.ack_every} frames")
+    print(f"  protocol 1 full frames: {legacy_chars:>8} chars ({legacy_chars / frames:.1f}/frame)")
+    print(f"  protocol 2 deltas:      {delta_chars:>8} chars ({delta_chars / frames:.1f}/frame, {100.0 * delta_chars / legacy_chars:.1f}% of full)")
+
+
+# -------------------------------------------------------------------
+# recognizers: dual SpeechRecognizer + TranslationRecognizer vs. single mode
+# -------------------------------------------------------------------
+def bench_recognizers(args):
+    targets = ["es", "fr", "de", "zh-Hans", "ja", "ru", "ar"][:args.languages]
+    if args.replay:
+        backend = ReplayBackend(args.replay, speed=args.speed)
+    else:
+        backend = StubBackend(rate=args.rate, target_languages=targets, speed=args.speed)
+    corrections = {"god": "God", "jesus": "Jesus", "corinthians": "Corinthians", "romans": "Romans"}
+
+    def run(mode):
+        registry = MetricsRegistry()
+        encoder = FrameEncoder("json", metrics=registry)
+        streams = CaptionStreams(encoder.encode, lambda frame: {"type": "caption", "text": frame.text})
+        latency = registry.histogram("event_to_frame_ms")
+        production_latency = registry.histogram("event_to_production_frame_ms")
+        callbacks = registry.counter("callbacks")
+        views = registry.counter("view_updates")
+        history = {}
+
+        def publish(stream, text, final, evt):
+            # Stand-in for correction, wrapping and encoding of one view update
+            corrected = " ".join(corrections.get(word.lower(), word) for word in text.split())
+            lines = textwrap.wrap(corrected, width=90, break_long_words=False, break_on_hyphens=False)
+            frame = streams.publish(stream, lines[-1] if lines else "", final)
+            if frame is not None:
+                streams.legacy_text(frame)
+            views.inc()
+            elapsed = time.perf_counter() - evt.created_at
+            latency.observe(elapsed)
+            if stream == "production":
+                production_latency.observe(elapsed)
+
+        def process_user(translations, final, evt):
+            for lang, text in translations.items():
+                lines = history.setdefault(lang, [])
+                if final:
+                    lines[:] = (lines + [text])[-3:]
+                publish(f"user:{lang}", "\n".join(lines if final else lines + [text]), final, evt)
+
+        def on_production(evt):
+            callbacks.inc()
+            final = evt.kind == RECOGNIZED
+            publish("production", evt.text, final, evt)
+            process_user({"en-US": evt.text}, final, evt)
+
+        def on_translation(evt):
+            callbacks.inc()
+            final = evt.kind == RECOGNIZED
+            translations = dict(evt.translations)
+            if mode == "single":
+                publish("production", evt.text, final, evt)
+                translations["en-US"] = evt.text
+            process_user(translations, final, evt)
+
+        recognizers = []
+        if mode == "dual":
+            production = backend.create(SPEECH)
+            production.recognizing.connect(on_production)
+            production.recognized.connect(on_production)
+            recognizers.append(production)
+        translation = backend.create(TRANSLATION)
+        translation.recognizing.connect(on_translation)
+        translation.recognized.connect(on_translation)
+        recognizers.append(translation)
+
+        start_at = time.perf_counter()
+        for recognizer in recognizers:
+            recognizer.start()
+        for recognizer in recognizers:
+            recognizer.join()
+        elapsed = time.perf_counter() - start_at
+        return len(recognizers), callbacks.value, views.value, elapsed, latency, production_latency
+
+    source = f"replay of {args.replay}" if args.replay else f"stub events at {args.rate}/s per recognizer, {len(targets)} translation targets"
+    print(f"recognizers: {source}, speed x{args.speed}")
+    for mode in ("dual", "single"):
+        sessions, callbacks, views, elapsed, latency, production_latency = run(mode)
+        print(f"  {mode}: {sessions} recognizer sessions, {callbacks} SDK callbacks ({callbacks / elapsed:.1f}/s), {views} view updates")
+        print_histogram(f"{mode}: SDK event -> production frame", production_latency)
+        print_histogram(f"{mode}: SDK event -> any view frame", latency)
+
+
+# -------------------------------------------------------------------
+# corrections: per-word list scans vs. the compiled multi-word matcher
+# -------------------------------------------------------------------
+def bench_corrections(args):
+    with open(args.dictionary, "r") as f:
+        dictionary = json.load(f)
+    transcript = SAMPLE_SERMON
+    if args.transcript:
+        with open(args.transcript, "r", encoding="utf-8") as f:
+            transcript = " ".join(line.strip() for line in f if line.strip())
+    # Azure interim hypotheses arrive lowercase and unpunctuated; finals are cased
+    hypotheses = [text if final else text.lower() for text, final in interim_hypotheses(transcript)]
+
+    # The replaced functions, verbatim
+    bible_books = dictionary["bible_books"]
+    spelling_corrections_dict = dictionary["spelling_corrections"]
+
+    def spelling_corrections(text):
+        words = text.split()
+        return " ".join([spelling_corrections_dict.get(word.lower(), word) for word in words])
+
+    def correct_bible_books(text):
+        return " ".join([word.capitalize() if word.lower() in [b.lower() for b in bible_books] else word for word in text.split()])
+
+    def legacy(text):
+        return correct_bible_books(spelling_corrections(text))
+
+    build = LatencyHistogram("build")
+    with build.time():
+        engine = CorrectionEngine.from_dictionary(dictionary)
+
+    before = LatencyHistogram("legacy")
+    after = LatencyHistogram("compiled")
+    incremental = LatencyHistogram("incremental")
+    for _ in range(args.rounds):
+        corrector = IncrementalCorrector(engine)
+        for text in hypotheses:
+            with before.time():
+                legacy(text)
+            with after.time():
+                engine.correct(text)
+            with incremental.time():
+                corrector.correct(text)
+    changed = [(legacy(text), engine.correct(text)) for text in hypotheses]
+    changed = [pair for pair in changed if pair[0] != pair[1]]
+
+    words = sum(len(text.split()) for text in hypotheses)
+    print(f"corrections: {len(hypotheses)} interim/final hypotheses ({words} words) x {args.rounds} rounds, "
+          f"{engine.entries} compiled entries built in {build.snapshot()['max_ms']:.3f}ms")
+    print_histogram("before: spelling + bible book scans", before)
+    print_histogram("after: compiled matcher", after)
+    print_histogram("after: incremental per stream", incremental)
+    print(f"  outputs that differ: {len(changed)} (multi-word and punctuated matches the old functions missed)")
+    for old, new in changed[-3:]:
+        print(f"    - {old!r}\n      + {new!r}")
+
+    # One long run-on interim hypothesis: cost of the newest event as the utterance grows
+    words = " ".join(text for text, final in interim_hypotheses(transcript) if final).lower().split()
+    words = (words * (1 + args.run_on // max(len(words), 1)))[:args.run_on]
+    print(f"  run-on utterance, mean ms per event at length (full pass vs. incremental):")
+    corrector = IncrementalCorrector(engine)
+    full, partial = LatencyHistogram("full"), LatencyHistogram("partial")
+    for count in range(1, len(words) + 1):
+        text = " ".join(words[:count])
+        with full.time():
+            engine.correct(text)
+        with partial.time():
+            corrector.correct(text)
+        if count in (50, 200, 800, 1600):
+            print(f"    {count:>5} words: {full.snapshot()['mean_ms']:.4f}ms vs {partial.snapshot()['mean_ms']:.4f}ms")
+            full.reset()
+            partial.reset()
+
+
+# -------------------------------------------------------------------
+# dictionary: load_dictionary() from disk per request vs. the in-memory store
+# -------------------------------------------------------------------
+def bench_dictionary(args):
+    here = os.path.dirname(os.path.abspath(__file__))
+    dictionary_file = os.path.join(here, "dictionary.json")
+    with open(os.path.join(here, "root.html"), "r") as f:
+        template = f.read()
+    real_open = builtins.open
+    opened = []
+
+    def slow_open(*a, **kw):
+        # Every file open pays the simulated disk latency (busy SD card, contended volume)
+        opened.append(a[0])
+        if args.disk_delay_ms:
+            time.sleep(args.disk_delay_ms / 1000.0)
+        return real_open(*a, **kw)
+
+    def render(languages):
+        options = "".join([
+            f'<option value="{lang["code"]}"{" selected" if lang["code"] == "en-US" else ""}>{lang["name"]}</option>\n'
+            for lang in languages
+        ])
+        return template.replace("{{LANGUAGE_OPTIONS}}", options)
+
+    def legacy_root():
+        with open(dictionary_file, "r") as f:
+            return render(json.load(f).get("supported_languages", []))
+
+    store = DictionaryStore(dictionary_file)
+    cache = [None, ""]
+
+    def store_root():
+        if cache[0] != store.version:
+            cache[0], cache[1] = store.version, render(store.snapshot().get("supported_languages", []))
+        return template.replace("{{LANGUAGE_OPTIONS}}", cache[1])
+
+    print(f"dictionary: GET / handler body, {args.requests} requests, simulated disk latency {args.disk_delay_ms}ms per open")
+    builtins.open = slow_open
+    try:
+        for label, handler in (("before: load_dictionary() per request", legacy_root), ("after: in-memory store", store_root)):
+            histogram = LatencyHistogram(label)
+            del opened[:]
+            for _ in range(args.requests):
+                with histogram.time():
+                    handler()
+            print_histogram(label, histogram)
+            print(f"    files opened: {len(opened)}")
+    finally:
+        builtins.open = real_open
+
+
+# -------------------------------------------------------------------
+# layout: re-wrapping all history per event vs. the incremental layout cache
+# -------------------------------------------------------------------
+def bench_layout(args):
+    sentences = [text for text, final in interim_hypotheses() if final]
+    print(f"layout: user-view layout cost per interim event at {args.width} chars per line (mean ms)")
+    print(f"  {'history entries':>16} {'re-wrap all':>12} {'cached':>10}")
+    for entries in (3, 10, 30, 100):
+        history = [sentences[i % len(sentences)] for i in range(entries)]
+        tail = [text for text, final in interim_hypotheses() if not final]
+        before, after = LatencyHistogram("rewrap"), LatencyHistogram("cached")
+        layout = LineLayoutCache(args.width)
+        for interim in tail:
+            with before.time():
+                # The replaced loop in process_user_speech_text
+                display_lines = []
+                for caption in history:
+                    display_lines.extend(textwrap.wrap(caption, width=args.width))
+                display_lines.extend(textwrap.wrap(interim, width=args.width))
+                "\n".join(display_lines)
+            with after.time():
+                layout.render("en-US", history, interim)
+        print(f"  {entries:>16} {before.snapshot()['mean_ms']:>12.4f} {after.snapshot()['mean_ms']:>10.4f}")
+
+
+# -------------------------------------------------------------------
+# profiles: pixel layout per viewer vs. once per display profile
+# -------------------------------------------------------------------
+def bench_profiles(args):
+    profiles = [DisplayProfile("projector", "Arial", 45, 1870, 2), DisplayProfile("confidence", "Verdana", 60, 1200, 3)]
+    hypotheses = [text for text, final in interim_hypotheses()]
+    per_viewer, per_profile = LatencyHistogram("per_viewer"), LatencyHistogram("per_profile")
+    for text in hypotheses:
+        with per_viewer.time():
+            # Every viewer measures and breaks the text itself, as each browser did
+            for i in range(args.viewers):
+                viewer = DisplayProfile.from_config("viewer", profiles[i % len(profiles)].to_dict())
+                viewer.lay_out(text)
+        with per_profile.time():
+            for profile in profiles:
+                profile.lay_out(text)
+    print(f"profiles: production layout per event, {args.viewers} viewers on {len(profiles)} profiles, {len(hypotheses)} events")
+    print_histogram("layout per viewer", per_viewer)
+    print_histogram("layout once per profile", per_profile)
+    for profile in profiles:
+        lines = profile.wrap(hypotheses[-1])
+        print(f"  {profile.name}: {profile.font} {profile.size_px}px in {profile.width_px}px -> {len(lines)} lines, "
+              f"last shown: {profile.lay_out(hypotheses[-1])[-1]!r}")
+
+
+# -------------------------------------------------------------------
+# timers: threading.Timer per interim event vs. one keyed scheduler
+# -------------------------------------------------------------------
+def bench_timers(args):
+    started = [0]
+    original_start = threading.Thread.start
+
+    def counting_start(thread):
+        started[0] += 1
+        return original_start(thread)
+
+    def run(mode):
+        fired = []
+        scheduler = CaptionScheduler(metrics=MetricsRegistry())
+        state = {"finalize": None, "pending": False}
+
+        def debounce():
+            state["pending"] = False
+            fired.append("debounce")
+
+        def legacy_event():
+            # The replaced code in process_user_speech_text
+            if state["finalize"]:
+                state["finalize"].cancel()
+            state["finalize"] = threading.Timer(10.0, lambda: fired.append("finalize"))
+            state["finalize"].start()
+            if not state["pending"]:
+                state["pending"] = True
+                threading.Timer(0.1, debounce).start()
+
+        def scheduled_event():
+            scheduler.schedule("user_auto_finalize", 10.0, lambda: fired.append("finalize"))
+            scheduler.schedule("user_caption_debounce", 0.1, lambda: fired.append("debounce"), reschedule=False)
+
+        on_event = legacy_event if mode == "legacy" else scheduled_event
+        cost = LatencyHistogram(mode)
+        started[0] = 0
+        peak_threads = threading.active_count()
+        tracemalloc.start()
+        for _ in range(args.events):
+            with cost.time():
+                on_event()
+            peak_threads = max(peak_threads, threading.active_count())
+            time.sleep(1.0 / args.rate)
+        allocated = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        if state["finalize"]:
+            state["finalize"].cancel()
+        scheduler.stop()
+        return cost, started[0], peak_threads, allocated, fired.count("debounce")
+
+    threading.Thread.start = counting_start
+    try:
+        results = {mode: run(mode) for mode in ("legacy", "scheduler")}
+    finally:
+        threading.Thread.start = original_start
+    print(f"timers: {args.events} interim events at {args.rate}/s, auto-finalize + 0.1s debounce per event")
+    for mode, (cost, threads, peak, allocated, debounces) in results.items():
+        print_histogram(f"{mode} timer cost per event", cost)
+        print(f"    threads started={threads} peak active={peak} peak traced memory={allocated / 1024:.1f}KiB debounce runs={debounces}")
+
+
+# -------------------------------------------------------------------
+# pause: clear checked on the next speech event vs. a pause-clear deadline
+# -------------------------------------------------------------------
+def bench_pause(args):
+    rng = random.Random(7)
+    scheduler = CaptionScheduler(metrics=MetricsRegistry())
+    legacy, timed = LatencyHistogram("legacy"), LatencyHistogram("deadline")
+    state = {"last_event": time.monotonic(), "shown": False}
+
+    def clear():
+        deadline = state["last_event"] + args.threshold
+        if state["shown"] and time.monotonic() >= deadline:
+            state["shown"] = False
+            timed.observe(time.monotonic() - deadline)
+
+    for _ in range(args.pauses):
+        for _ in range(5):
+            state["last_event"] = time.monotonic()
+            state["shown"] = True
+            scheduler.schedule("production_pause_clear", args.threshold, clear)
+            time.sleep(0.02)
+        gap = args.threshold * rng.uniform(1.5, 3.0)
+        time.sleep(gap)
+        # The replaced check only ran when the next event arrived
+        legacy.observe(gap - args.threshold)
+    scheduler.stop()
+    print(f"pause: display clear time after the {args.threshold}s pause deadline, {args.pauses} pauses")
+    print_histogram("checked on next event", legacy)
+    print_histogram("deadline on the caption scheduler", timed)
+
+
+# -------------------------------------------------------------------
+# ordered: asyncio.run per callback vs. the ordered single-writer dispatcher
+# -------------------------------------------------------------------
+def bench_ordered(args):
+    backend = StubBackend(rate=args.rate, target_languages=["es"], speed=args.speed)
+    corrections = CorrectionEngine({"god": "God", "jesus": "Jesus"}, ["Romans", "1 Corinthians"])
+
+    def run(mode):
+        registry = MetricsRegistry()
+        encoder = FrameEncoder("json", metrics=registry)
+        streams = CaptionStreams(encoder.encode, lambda frame: {"type": "caption", "text": frame.text, "seq": frame.seq})
+        latency = registry.histogram("event_to_frame_ms")
+        lock = threading.Lock()
+        state = {"version": 0, "text": "", "published": 0, "stale": 0, "frames": 0}
+        writer = OrderedDispatcher(metrics=registry)
+        loop = asyncio.new_event_loop()
+        loop_thread = threading.Thread(target=loop.run_forever, daemon=True)
+        loop_thread.start()
+        writer.bind(loop)
+
+        def publish(version, text, final, created_at):
+            # Both recognizers feed the production stream, as in single mode plus the pause clear
+            if version < state["published"]:
+                state["stale"] += 1
+            state["published"] = max(state["published"], version)
+            frame = streams.publish("production", text, final)
+            if frame is not None:
+                state["frames"] += 1
+                streams.legacy_text(frame)
+                for _ in range(args.clients):
+                    streams.delta_text(frame, None)
+            latency.observe(time.perf_counter() - created_at)
+
+        def publish_state(stamp, final, created_at):
+            with lock:
+                version, text = state["version"], state["text"]
+            publish(version, text, final, created_at)
+
+        async def send(version, text, final, created_at):
+            publish(version, text, final, created_at)
+
+        def on_event(evt):
+            final = evt.kind == RECOGNIZED
+            text = corrections.correct(evt.text)
+            lines = textwrap.wrap(text, width=90, break_long_words=False, break_on_hyphens=False)
+            with lock:
+                state["version"] += 1
+                version = state["version"]
+                state["text"] = lines[-1] if lines else ""
+            if mode == "legacy":
+                # The replaced path: every callback thread runs its own event loop to broadcast
+                asyncio.run(send(version, state["text"], final, evt.created_at))
+            else:
+                writer.post(publish_state, final, evt.created_at)
+
+        recognizers = [backend.create(SPEECH), backend.create(TRANSLATION)]
+        for recognizer in recognizers:
+            recognizer.recognizing.connect(on_event)
+            recognizer.recognized.connect(on_event)
+        start_at = time.perf_counter()
+        for recognizer in recognizers:
+            recognizer.start()
+        for recognizer in recognizers:
+            recognizer.join()
+        while writer.depth():
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - start_at
+        writer.unbind()
+        loop.call_soon_threadsafe(loop.stop)
+        loop_thread.join()
+        loop.close()
+        return state, latency, elapsed
+
+    print(f"ordered: two stub recognizers at {args.rate} events/s each (speed x{args.speed}) on one stream, {args.clients} delta clients")
+    for mode in ("legacy", "ordered"):
+        state, latency, elapsed = run(mode)
+        print(f"  {mode}: {latency.snapshot()['count'] / elapsed:.1f} events/s handled, {state['frames']} frames, "
+              f"{state['stale']} stale (older text published after newer)")
+        print_histogram(f"{mode}: SDK event -> frame", latency)
+
+# -------------------------------------------------------------------
+# pipeline: where the latency goes, stage by stage
+# -------------------------------------------------------------------
+def bench_pipeline(args):
+    backend = StubBackend(rate=args.rate, target_languages=["es", "fr"], speed=args.speed)
+    corrections = CorrectionEngine({"god": "God", "jesus": "Jesus"}, ["Romans", "1 Corinthians"])
+    registry = MetricsRegistry()
+    encoder = FrameEncoder("json", metrics=registry)
+    streams = CaptionStreams(encoder.encode, lambda frame: {"type": "caption", "text": frame.text, "seq": frame.seq})
+    hub = ClientHub(max_pending=args.clients, metrics=registry)
+    profile = DisplayProfile("projector", "Arial", 45, 1870, 2)
+    user_layout = LineLayoutCache(40)
+    history = {}
+
+    class Viewer:
+        client = "bench"
+
+        async def send_text(self, text):
+            pass
+
+        async def close(self, code=1000, reason=""):
+            pass
+
+    def correct(update):
+        update.data = {lang: corrections.correct(text) for lang, text in update.data.items() if text}
+        return update
+
+    def layout(update):
+        for lang, text in update.data.items():
+            if lang == "en-US":
+                lines = textwrap.wrap(text, width=90, break_long_words=False, break_on_hyphens=False)
+                update.streams.append(("production", lines[-1] if lines else ""))
+                update.streams.append(("profile:projector", "\n".join(profile.lay_out(text))))
+            entries = history.setdefault(lang, ())
+            if update.final:
+                history[lang] = (entries + (text,))[-3:]
+            update.streams.append((f"user:{lang}", user_layout.render(lang, history[lang], "" if update.final else text)))
+        return update
+
+    def encode(update):
+        for stream, text in update.streams:
+            frame = streams.publish(stream, text, update.final, update.stamp.ts)
+            if frame is not None:
+                update.deliveries.append((frame, hub.encode_stream(frame, streams)))
+        return update if update.deliveries else None
+
+    def fanout(update):
+        for frame, encoded in update.deliveries:
+            hub.deliver(frame, encoded)
+        return update
+
+    pipeline = CaptionPipeline([("correct", correct), ("layout", layout), ("encode", encode), ("fanout", fanout)],
+                               maxsize=args.queue, metrics=registry)
+    writer = OrderedDispatcher(metrics=registry)
+    loop = asyncio.new_event_loop()
+    loop_thread = threading.Thread(target=loop.run_forever, daemon=True)
+    loop_thread.start()
+
+    async def setup():
+        pipeline.bind(loop)
+        writer.bind(loop)
+        channels = ["production", "profile:projector", "user:en-US", "user:es", "user:fr"]
+        for index in range(args.clients):
+            hub.subscribe(hub.register(Viewer()), channels[index % len(channels)])
+
+    asyncio.run_coroutine_threadsafe(setup(), loop).result()
+
+    def feed(stamp, update):
+        update.stamp = stamp
+        pipeline.feed(update)
+
+    def on_event(evt):
+        translations = dict(evt.translations)
+        if evt.text:
+            translations["en-US"] = evt.text
+        writer.post(feed, CaptionUpdate("speech", translations, evt.kind == RECOGNIZED, evt.created_at))
+
+    recognizer = backend.create(TRANSLATION)
+    recognizer.recognizing.connect(on_event)
+    recognizer.recognized.connect(on_event)
+    start_at = time.perf_counter()
+    recognizer.start()
+    recognizer.join()
+    depth = lambda: writer.depth() + sum(registry.snapshot()["gauges"][f"pipeline_{name}_depth"]
+                                         for name in ("correct", "layout", "encode", "fanout"))
+    while depth():
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start_at
+
+    async def teardown():
+        writer.unbind()
+        pipeline.unbind()
+        for connection in hub:
+            hub.unregister(connection)
+
+    asyncio.run_coroutine_threadsafe(teardown(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    loop_thread.join()
+    loop.close()
+
+    counters = registry.snapshot()["counters"]
+    print(f"pipeline: stub recognizer at {args.rate} events/s (speed x{args.speed}), 3 languages, "
+          f"{args.clients} clients, stage queues of {args.queue}")
+    print(f"  {pipeline.total.snapshot()['count'] / elapsed:.1f} updates/s through every stage")
+    print_histogram("ingest: queue wait", registry.histogram("writer_queue_ms"))
+    for name in ("correct", "layout", "encode", "fanout"):
+        print_histogram(f"{name}: queue wait", registry.histogram(f"pipeline_{name}_wait_ms"))
+        print_histogram(f"{name}: processing", registry.histogram(f"pipeline_{name}_ms"))
+        if counters[f"pipeline_{name}_dropped"]:
+            print(f"  {name}: {counters[f'pipeline_{name}_dropped']} superseded interims dropped at a full queue")
+    print_histogram("SDK event -> frames queued", pipeline.total)
+
+# -------------------------------------------------------------------
+# logging: synchronous DEBUG f-strings vs. queued, lazy, rate-limited logging
+# -------------------------------------------------------------------
+def bench_logging(args):
+    events = [text for text, final in interim_hypotheses()] * args.rounds
+    translations = {lang: "" for lang in ("es-ES", "fr-FR", "de-DE", "zh-CN", "ja-JP", "ru-RU", "ar-EG")}
+    root = logging.getLogger()
+    saved_handlers, saved_level = list(root.handlers), root.level
+
+    class SlowDisk(logging.FileHandler):
+        def emit(self, record):
+            super().emit(record)
+            time.sleep(args.disk_delay_ms / 1000)
+
+    def run(mode, directory):
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        path = os.path.join(directory, f"{mode}.log")
+        listener = None
+        if mode == "sync":
+            handler = SlowDisk(path)
+            handler.setFormatter(logging.Formatter(LOG_FORMAT, LOG_DATE_FORMAT))
+            root.addHandler(handler)
+            root.setLevel(logging.DEBUG)
+        else:
+            listener = setup_logging(path)
+            # setup_logging's file handler writes on the listener thread; give it the same slow disk
+            slow = SlowDisk(path)
+            slow.setFormatter(logging.Formatter(LOG_FORMAT, LOG_DATE_FORMAT))
+            listener.handlers = (slow,)
+        hot = HotPathLog(interval=1.0, metrics=MetricsRegistry())
+        cost = LatencyHistogram(mode)
+        for text in events:
+            with cost.time():
+                for lang in translations:
+                    translations[lang] = text
+                if mode == "sync":
+                    # The replaced messages logged by every interim translation event
+                    logging.log(logging.DEBUG, f"[SpeechCaption] Translation recognizing: mapped_translations={list(translations.keys())}")
+                    logging.log(logging.DEBUG, f"[SpeechCaption] process_user_speech_text called: is_recognized=False, translations={list(translations.keys())}")
+                    logging.log(logging.DEBUG, f"[SpeechCaption] corrected_translations: {list(translations.keys())}")
+                    for lang in translations:
+                        logging.log(logging.DEBUG, f"[SpeechCaption] Auto-finalization timer for {lang} set to 10.0 seconds")
+                    logging.log(logging.DEBUG, f"[SpeechCaption] User caption update already pending, skipping schedule")
+                elif mode == "queued":
+                    # The same messages, formatted on the listener thread
+                    logging.log(logging.DEBUG, "[SpeechCaption] Translation recognizing: %d languages", len(translations))
+                    logging.log(logging.DEBUG, "[SpeechCaption] User speech: final=%s, languages=%s", False, ",".join(translations))
+                    for lang in translations:
+                        logging.log(logging.DEBUG, "[SpeechCaption] Auto-finalization timer for %s set to %s seconds", lang, 10.0)
+                else:
+                    hot.debug("translation_recognizing", "Translation recognizing: %d languages", len(translations))
+                    hot.debug("user_speech", "User speech: final=%s, languages=%s", False, ",".join(translations))
+        start = time.perf_counter()
+        if listener is not None:
+            listener.stop()
+        flush = time.perf_counter() - start
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+            handler.close()
+        return cost, flush, os.path.getsize(path)
+
+    print(f"logging: {len(events)} interim translation events, 7 languages, {args.disk_delay_ms}ms per disk write")
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for mode in ("sync", "queued", "rate-limited"):
+                cost, flush, size = run(mode, directory)
+                print_histogram(f"{mode}: per event (caller)", cost)
+                print(f"  {mode}: {size / 1024:.1f} KiB written, {flush * 1000:.1f}ms to flush at exit")
+    finally:
+        root.setLevel(saved_level)
+        for handler in saved_handlers:
+            root.addHandler(handler)
+
+# -------------------------------------------------------------------
+# lifecycle: blocking recognizer start/stop on the event loop vs. the control thread
+# -------------------------------------------------------------------
+def bench_lifecycle(args):
+    class HandshakeRecognizer:
+        """start()/stop() block like the Speech SDK's connection handshake"""
+
+        def set_phrases(self, phrases):
+            time.sleep(args.handshake_ms / 4000)
+
+        def start(self):
+            time.sleep(args.handshake_ms / 1000)
+
+        def stop(self):
+            time.sleep(args.handshake_ms / 2000)
+
+    recognizers = [HandshakeRecognizer(), HandshakeRecognizer()]
+
+    def start_all():
+        for recognizer in recognizers:
+            recognizer.set_phrases([])
+        for recognizer in recognizers:
+            recognizer.start()
+
+    def stop_all():
+        for recognizer in recognizers:
+            recognizer.stop()
+
+    async def cycle(mode):
+        registry = MetricsRegistry()
+        monitor = LoopLagMonitor(interval=0.02, metrics=registry)
+        monitor.bind(asyncio.get_running_loop())
+        control = RecognizerControl(metrics=registry)
+        await asyncio.sleep(0.1)
+        window = monitor.watch()
+        start = time.perf_counter()
+        if mode == "blocking":
+            # The replaced async start_recognition/stop_recognition bodies
+            start_all()
+            await asyncio.sleep(0)
+            stop_all()
+        else:
+            await control.run("start", start_all)
+            await control.run("stop", stop_all)
+        elapsed = time.perf_counter() - start
+        await asyncio.sleep(0.1)
+        window.close()
+        monitor.unbind()
+        control.shutdown()
+        return elapsed, window.max_lag, monitor.lag
+
+    print(f"lifecycle: start + stop of 2 recognizers with a {args.handshake_ms:.0f}ms handshake")
+    for mode in ("blocking", "control"):
+        elapsed, max_lag, lag = asyncio.run(cycle(mode))
+        print(f"  {mode}: cycle {elapsed * 1000:.0f}ms, worst event loop lag {max_lag * 1000:.1f}ms")
+        print_histogram(f"{mode}: event loop lag", lag)
+
+# -------------------------------------------------------------------
+# failover: health-check poll and rebuild vs. a warm standby recognizer pair
+# -------------------------------------------------------------------
+def bench_failover(args):
+    class SlowRecognizer:
+        """Construction, phrase lists and start take time like the Speech SDK"""
+
+        def __init__(self):
+            time.sleep(args.build_ms / 1000)
+            self.running = False
+
+        def set_phrases(self, phrases):
+            time.sleep(args.build_ms / 4000)
+
+        def start(self):
+            time.sleep(args.start_ms / 1000)
+            self.running = True
+
+        def start_async(self):
+            # Like the SDK's start_continuous_recognition_async(): the handshake runs in the background
+            thread = threading.Thread(target=self.start)
+            thread.start()
+            return thread.join
+
+        def stop(self):
+            self.running = False
+
+    def build():
+        return SlowRecognizer(), SlowRecognizer()
+
+    def run(mode):
+        registry = MetricsRegistry()
+        gaps = LatencyHistogram(mode)
+        state = {"active": build(), "failed_at": None}
+        resumed = threading.Event()
+        for recognizer in state["active"]:
+            recognizer.start()
+
+        def activate(pair):
+            state["active"] = pair
+            gaps.observe(time.perf_counter() - state["failed_at"])
+            resumed.set()
+
+        control = RecognizerControl(metrics=registry)
+        scheduler = CaptionScheduler(metrics=registry)
+        standby = StandbyRecognizers(control, build, lambda recognizer: recognizer.set_phrases(["Romans"]), lambda: state["active"], activate, scheduler,
+                                     backoff=ExponentialBackoff(0.1, 1.0), metrics=registry)
+        standby.prepare().result()
+        for _ in range(args.failures):
+            while mode == "standby" and not standby.ready:
+                time.sleep(0.05)
+            resumed.clear()
+            failed = state["active"][1]
+            failed.running = False
+            state["failed_at"] = time.perf_counter()
+            if mode == "standby":
+                standby.fail_over(failed, state["failed_at"])
+            else:
+                # The replaced recovery: the next health-check poll notices, rebuilds and restarts
+                time.sleep(random.uniform(0, args.poll))
+                pair = build()
+                for recognizer in pair:
+                    recognizer.set_phrases(["Romans"])
+                    recognizer.start()
+                activate(pair)
+            resumed.wait()
+        control.shutdown()
+        scheduler.stop()
+        return gaps
+
+    print(f"failover: {args.failures} recognizer errors, {args.build_ms:.0f}ms build, {args.start_ms:.0f}ms start, "
+          f"{args.poll:.0f}s health-check poll")
+    for mode in ("poll", "standby"):
+        print_histogram(f"{mode}: caption gap after an error", run(mode))
+
+
+# -------------------------------------------------------------------
+# watchdog: time from a silent recognizer stall to its restart
+# -------------------------------------------------------------------
+def bench_watchdog(args):
+    registry = MetricsRegistry()
+    scheduler = CaptionScheduler(metrics=registry)
+    meter = AudioLevelMeter(metrics=registry)
+    meter._stream = object()  # stands in for the sounddevice stream; levels come from observe() below
+    recognizer = Recognizer(SPEECH)
+    state = {"stalled": False, "stalled_at": None, "audio": True}
+    detection = LatencyHistogram("detection")
+    restarted = threading.Event()
+    restarts = []
+
+    def restart(failed, cause, detail):
+        restarts.append(cause)
+        if state["stalled_at"] is not None:
+            detection.observe(time.perf_counter() - state["stalled_at"])
+        state["stalled"], state["stalled_at"] = False, None
+        restarted.set()
+
+    watchdog = RecognitionWatchdog(scheduler, restart, lambda: True, meter=meter,
+                                   stall_seconds=args.stall_seconds, metrics=registry)
+    watchdog.watch(recognizer)
+    watchdog.arm([recognizer])
+    stop = threading.Event()
+
+    def audio_and_events():
+        # The room: audio blocks every 0.1s; the recognizer: events at args.rate unless stalled
+        next_event = time.perf_counter()
+        while not stop.is_set():
+            meter.observe(-20.0 if state["audio"] else -70.0)
+            if state["audio"] and not state["stalled"] and time.perf_counter() >= next_event:
+                recognizer.recognizing.fire(None)
+                next_event += 1 / args.rate
+            time.sleep(0.01)
+
+    feeder = threading.Thread(target=audio_and_events, daemon=True)
+    feeder.start()
+    for _ in range(args.stalls):
+        time.sleep(args.stall_seconds)
+        restarted.clear()
+        state["stalled_at"] = time.perf_counter()
+        state["stalled"] = True
+        restarted.wait(args.stall_seconds * 4)
+
+    # A silent room must not look like a stall
+    state["audio"] = False
+    before = len(restarts)
+    time.sleep(args.stall_seconds * 3)
+    silent_restarts = len(restarts) - before
+    stop.set()
+    feeder.join()
+    scheduler.stop()
+
+    print(f"watchdog: {args.stalls} silent stalls with audio present, {args.rate:.0f} events/s, "
+          f"stall threshold {args.stall_seconds}s")
+    print("  60-second health poll: a stalled recognizer still reports is_recognizing, so it is never restarted")
+    print_histogram("watchdog: stall to restart", detection)
+    print(f"  restarts: {len(restarts) - silent_restarts} ({', '.join(sorted(set(restarts))) or 'none'}); "
+          f"during {args.stall_seconds * 3:.0f}s of silence: {silent_restarts}")
+
+
+# -------------------------------------------------------------------
+# phrases: phrase lists rebuilt from the dictionary per start vs. the compiled phrase list
+# -------------------------------------------------------------------
+def bench_phrases(args):
+    dictionary_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dictionary.json")
+
+    class PhraseRecognizer:
+        """Counts phrase list calls; each addPhrase costs --add-ms like the SDK's native call"""
+
+        def __init__(self):
+            self.calls = 0
+
+        def _add(self, count):
+            self.calls += count
+            time.sleep(count * args.add_ms / 1000)
+
+        def set_phrases(self, phrases):
+            self._add(len(phrases) + 1)  # clear() plus one addPhrase per phrase
+
+        def add_phrases(self, phrases):
+            self._add(len(phrases))
+
+    def legacy(pair, dictionary, event):
+        # Every start re-read dictionary.json and reloaded every phrase; edits waited for the next start
+        if event == "start":
+            with open(dictionary_file, "r") as f:
+                json.load(f)
+            phrases = dictionary["custom_phrases"] + dictionary["bible_books"]
+            for recognizer in pair:
+                recognizer.set_phrases(phrases)
+
+    lists = PhraseLists(metrics=MetricsRegistry())
+
+    def compiled(pair, dictionary, event):
+        if event == "edit":
+            lists.update(dictionary["custom_phrases"] + dictionary["bible_books"])
+        for recognizer in pair:
+            lists.apply(recognizer)
+
+    with open(dictionary_file, "r") as f:
+        base = json.load(f)
+    events = ["start"] * args.restarts + ["edit"] * args.edits
+    random.Random(7).shuffle(events)
+    print(f"phrases: {len(base['bible_books']) + len(base['custom_phrases'])} phrases, {args.restarts} starts, "
+          f"{args.edits} edits (one in five a removal), {args.add_ms}ms per addPhrase")
+    for label, handler in (("before: reload per start", legacy), ("after: compiled phrase list", compiled)):
+        dictionary = {"bible_books": list(base["bible_books"]), "custom_phrases": list(base["custom_phrases"])}
+        pair = (PhraseRecognizer(), PhraseRecognizer())
+        lists.update(dictionary["custom_phrases"] + dictionary["bible_books"])
+        starts, edits = LatencyHistogram("start"), LatencyHistogram("edit")
+        live_edits = 0
+        for index, event in enumerate(["start"] + events):
+            if event == "edit":
+                if index % 5 == 0 and dictionary["custom_phrases"]:
+                    dictionary["custom_phrases"].pop()
+                else:
+                    dictionary["custom_phrases"].append(f"Benchmark phrase {index}")
+            before = sum(recognizer.calls for recognizer in pair)
+            with (starts if event == "start" else edits).time():
+                handler(pair, dictionary, event)
+            if event == "edit" and sum(recognizer.calls for recognizer in pair) > before:
+                live_edits += 1
+        print_histogram(f"{label}: start", starts)
+        print_histogram(f"{label}: edit", edits)
+        print(f"    SDK phrase calls: {sum(recognizer.calls for recognizer in pair)}; "
+              f"edits applied while recognizing: {live_edits}/{args.edits}")
+
+
+# -------------------------------------------------------------------
+# targets: translating into every language vs. only the watched ones
+# -------------------------------------------------------------------
+def bench_targets(args):
+    languages = ["es", "fr", "de", "zh-Hans", "ja", "ru", "ar"]
+    watched = languages[:args.watched]
+    backend = StubBackend(rate=40.0, target_languages=languages, speed=0)
+
+    def run(targets):
+        handling = LatencyHistogram("handler")
+        payload = [0, 0]
+        recognizer = backend.create(TRANSLATION)
+        if targets is not None:
+            recognizer.set_target_languages(targets)
+
+        def on_translation(evt):
+            # What on_translation_recognizing does per event before the pipeline takes over
+            start = time.perf_counter()
+            update = {code: text for code, text in evt.translations.items() if code != "en-US"}
+            payload[0] += len(json.dumps(update, ensure_ascii=False))
+            payload[1] += 1
+            handling.observe(time.perf_counter() - start)
+
+        recognizer.recognizing.connect(on_translation)
+        recognizer.recognized.connect(on_translation)
+        recognizer.start()
+        recognizer.join()
+        return handling, payload[0] / max(payload[1], 1)
+
+    print(f"targets: {len(languages)} supported languages, {len(watched)} watched ({', '.join(watched)})")
+    for label, targets in (("before: every language", None), ("after: watched languages", watched)):
+        handling, size = run(targets)
+        print_histogram(f"{label}: per event", handling)
+        print(f"    translation payload: {size:.0f} bytes per event")
+
+    def flapping(linger):
+        registry = MetricsRegistry()
+        scheduler = CaptionScheduler(metrics=registry)
+        changes = []
+        targets = TranslationTargets(languages, scheduler, changes.append, linger_seconds=linger, metrics=registry)
+        viewers = {language: 0 for language in languages}
+        rng = random.Random(3)
+        for _ in range(args.viewer_changes):
+            # Viewers mostly watch the first languages, joining, leaving and reloading every few ms
+            language = languages[min(int(rng.expovariate(1.0)), len(languages) - 1)]
+            viewers[language] = max(0, viewers[language] + rng.choice((1, -1)))
+            targets.viewers_changed(language, viewers[language])
+            time.sleep(0.01)
+        scheduler.stop()
+        return len(changes)
+
+    print(f"  target set changes over {args.viewer_changes} viewer joins/leaves (every 10ms): "
+          f"no linger {flapping(0.0)}, {args.linger}s linger {flapping(args.linger)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Caption pipeline benchmarks")
+    sub = parser.add_subparsers(dest="benchmark", required=True)
+
+    dispatch = sub.add_parser("dispatch", help="asyncio.run per event vs. long-lived loop handoff")
+    dispatch.add_argument("--events", type=int, default=600)
+    dispatch.add_argument("--threads", type=int, default=2, help="simulated recognizer callback threads")
+    dispatch.add_argument("--rate", type=float, default=100.0, help="events per second per thread")
+    dispatch.add_argument("--clients", type=int, default=50)
+    dispatch.set_defaults(func=bench_dispatch)
+
+    fanout = sub.add_parser("fanout", help="sequential send loop vs. per-client queues with a stalled viewer")
+    fanout.add_argument("--clients", type=int, default=300)
+    fanout.add_argument("--slow", type=int, default=1, help="number of stalled clients")
+    fanout.add_argument("--slow-delay", type=float, default=1.0, help="seconds each send to a stalled client takes")
+    fanout.add_argument("--frames", type=int, default=150)
+    fanout.add_argument("--rate", type=float, default=15.0, help="frames per second")
+    fanout.add_argument("--send-timeout", type=float, default=2.0)
+    fanout.add_argument("--max-lag", type=float, default=5.0)
+    fanout.set_defaults(func=bench_fanout)
+
+    encode = sub.add_parser("encode", help="json.dumps per client vs. encode once per broadcast")
+    encode.add_argument("--broadcasts", type=int, default=200)
+    encode.set_defaults(func=bench_encode)
+
+    delta = sub.add_parser("delta", help="bytes on the wire: full frames vs. protocol 2 deltas")
+    delta.add_argument("--ack-every", type=int, default=7, help="frames between client acknowledgements")
+    delta.set_defaults(func=bench_delta)
+
+    recognizers = sub.add_parser("recognizers", help="dual vs. single recognizer mode on a stub or replayed event source")
+    recognizers.add_argument("--rate", type=float, default=40.0, help="stub events per second per recognizer")
+    recognizers.add_argument("--languages", type=int, default=7, help="stub translation targets (max 7)")
+    recognizers.add_argument("--replay", help="recorded recognizer events (recognizer_record_file) instead of the stub")
+    recognizers.add_argument("--speed", type=float, default=1.0, help="playback speed: 1 real time, N times faster, 0 unpaced")
+    recognizers.set_defaults(func=bench_recognizers)
+
+    corrections = sub.add_parser("corrections", help="old per-word correction functions vs. the compiled matcher")
+    corrections.add_argument("--dictionary", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "dictionary.json"))
+    corrections.add_argument("--transcript", help="saved transcript file to replay instead of the built-in sermon")
+    corrections.add_argument("--rounds", type=int, default=20)
+    corrections.add_argument("--run-on", type=int, default=800, help="words in the run-on utterance")
+    corrections.set_defaults(func=bench_corrections)
+
+    dictionary = sub.add_parser("dictionary", help="GET / with load_dictionary() from disk vs. the in-memory store")
+    dictionary.add_argument("--requests", type=int, default=500)
+    dictionary.add_argument("--disk-delay-ms", type=float, default=0.0, help="latency added to every file open")
+    dictionary.set_defaults(func=bench_dictionary)
+
+    layout = sub.add_parser("layout", help="re-wrap all user-view history per event vs. the layout cache")
+    layout.add_argument("--width", type=int, default=60, help="user_max_line_length")
+    layout.set_defaults(func=bench_layout)
+
+    profiles = sub.add_parser("profiles", help="production pixel layout per viewer vs. once per display profile")
+    profiles.add_argument("--viewers", type=int, default=100)
+    profiles.set_defaults(func=bench_profiles)
+
+    timers = sub.add_parser("timers", help="threading.Timer per event vs. the caption scheduler")
+    timers.add_argument("--events", type=int, default=400)
+    timers.add_argument("--rate", type=float, default=20.0, help="interim events per second")
+    timers.set_defaults(func=bench_timers)
+
+    pause = sub.add_parser("pause", help="production pause clear on the next event vs. a scheduled deadline")
+    pause.add_argument("--pauses", type=int, default=10)
+    pause.add_argument("--threshold", type=float, default=0.2, help="pause_threshold_seconds")
+    pause.set_defaults(func=bench_pause)
+
+    ordered = sub.add_parser("ordered", help="asyncio.run per callback vs. the ordered caption writer")
+    ordered.add_argument("--rate", type=float, default=50.0, help="stub events per second per recognizer")
+    ordered.add_argument("--clients", type=int, default=50)
+    ordered.add_argument("--speed", type=float, default=1.0, help="playback speed: 1 real time, 0 unpaced (maximum throughput)")
+    ordered.set_defaults(func=bench_ordered)
+
+    pipeline = sub.add_parser("pipeline", help="per-stage queue wait and processing time of the caption pipeline")
+    pipeline.add_argument("--rate", type=float, default=50.0, help="stub events per second")
+    pipeline.add_argument("--clients", type=int, default=50)
+    pipeline.add_argument("--queue", type=int, default=64, help="bounded queue size in front of each stage")
+    pipeline.add_argument("--speed", type=float, default=1.0, help="playback speed: 1 real time, N times faster, 0 unpaced")
+    pipeline.set_defaults(func=bench_pipeline)
+
+    logs = sub.add_parser("logging", help="synchronous DEBUG f-string logging vs. queued, rate-limited logging")
+    logs.add_argument("--rounds", type=int, default=5, help="passes over the sample sermon")
+    logs.add_argument("--disk-delay-ms", type=float, default=0.0, help="extra time each log write takes")
+    logs.set_defaults(func=bench_logging)
+
+    lifecycle = sub.add_parser("lifecycle", help="event loop lag: blocking recognizer start/stop vs. the control thread")
+    lifecycle.add_argument("--handshake-ms", type=float, default=800.0, help="time each simulated SDK start takes")
+    lifecycle.set_defaults(func=bench_lifecycle)
+
+    failover = sub.add_parser("failover", help="caption gap after a recognizer error: health-check restart vs. warm standby")
+    failover.add_argument("--failures", type=int, default=3)
+    failover.add_argument("--build-ms", type=float, default=300.0, help="time to construct one recognizer")
+    failover.add_argument("--start-ms", type=float, default=800.0, help="time one recognizer start takes")
+    failover.add_argument("--poll", type=float, default=5.0, help="health-check interval in seconds (60 in production)")
+    failover.set_defaults(func=bench_failover)
+
+    watchdog = sub.add_parser("watchdog", help="time from a silent recognizer stall to its restart")
+    watchdog.add_argument("--stalls", type=int, default=3)
+    watchdog.add_argument("--stall-seconds", type=float, default=1.0, help="watchdog_stall_seconds (8 in production)")
+    watchdog.add_argument("--rate", type=float, default=20.0, help="recognizer events per second while speaking")
+    watchdog.set_defaults(func=bench_watchdog)
+
+    phrases = sub.add_parser("phrases", help="phrase lists reloaded per recognizer start vs. the compiled phrase list")
+    phrases.add_argument("--restarts", type=int, default=10)
+    phrases.add_argument("--edits", type=int, default=20, help="phrase additions and removals during the run")
+    phrases.add_argument("--add-ms", type=float, default=0.5, help="time one SDK addPhrase call takes")
+    phrases.set_defaults(func=bench_phrases)
+
+    targets = sub.add_parser("targets", help="translating into every supported language vs. only the watched ones")
+    targets.add_argument("--watched", type=int, default=2, help="languages with user view viewers")
+    targets.add_argument("--viewer-changes", type=int, default=200)
+    targets.add_argument("--linger", type=float, default=0.5, help="translation_target_linger_seconds (120 in production)")
+    targets.set_defaults(func=bench_targets)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
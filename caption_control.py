@@ -0,0 +1,312 @@
+"""
+Recognizer Control
+Recognizer start, stop and rebuild are blocking Speech SDK calls that can take
+seconds (the service handshake). RecognizerControl runs them one at a time on a
+dedicated control thread and hands back awaitable futures with timeouts, so the
+event loop, and every viewer's WebSocket with it, keeps running meanwhile.
+
+StandbyRecognizers keeps the next recognizer pair built, with its phrase lists
+attached, and swaps it in on the control thread as soon as the active pair is
+canceled by an error, so recovery takes one SDK start instead of a full rebuild.
+Rebuilds that fail are retried with exponential backoff and full jitter.
+
+LoopLagMonitor measures how late the event loop wakes up from a short sleep,
+continuously and for any window of interest such as one start/stop cycle.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import random
+import threading
+import time
+
+from caption_metrics import METRICS
+
+DEFAULT_CONTROL_TIMEOUT = 30.0
+
+
+def start_all(recognizers):
+    """Start recognizers concurrently (each SDK handshake overlaps the others) and wait for all of them"""
+    waits = [recognizer.start_async() for recognizer in recognizers if recognizer is not None]
+    for wait in waits:
+        wait()
+
+
+class RecognizerControlTimeout(Exception):
+    """A lifecycle operation did not finish in time; it keeps running on the control thread"""
+
+
+class RecognizerControl:
+    """Serializes recognizer lifecycle operations on one control thread"""
+
+    def __init__(self, timeout=DEFAULT_CONTROL_TIMEOUT, metrics=METRICS):
+        self.timeout = timeout
+        self._metrics = metrics
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="recognizer-control")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.timeouts = metrics.counter("recognizer_control_timeouts")
+        self.failures = metrics.counter("recognizer_control_failures")
+        metrics.gauge("recognizer_control_pending", lambda: self._pending)
+
+    def submit(self, name, fn, *args):
+        """Queue fn(*args) on the control thread; returns a concurrent.futures.Future"""
+        histogram = self._metrics.histogram(f"recognizer_{name}_ms")
+        with self._lock:
+            self._pending += 1
+
+        def run():
+            start = time.perf_counter()
+            try:
+                return fn(*args)
+            except Exception:
+                self.failures.inc()
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - start)
+                with self._lock:
+                    self._pending -= 1
+
+        return self._executor.submit(run)
+
+    async def run(self, name, fn, *args, timeout=None):
+        """Run fn(*args) on the control thread and await its result without blocking the loop"""
+        timeout = self.timeout if timeout is None else timeout
+        future = asyncio.wrap_future(self.submit(name, fn, *args))
+        try:
+            # shield: a timeout stops the wait, not the SDK call already under way
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts.inc()
+            logging.error(f"[SpeechCaption] Recognizer {name} did not finish within {timeout}s")
+            raise RecognizerControlTimeout(f"recognizer {name} timed out after {timeout}s") from None
+
+    def call(self, name, fn, *args, timeout=None):
+        """Blocking variant for threads other than the event loop"""
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return self.submit(name, fn, *args).result(timeout)
+        except concurrent.futures.TimeoutError:
+            self.timeouts.inc()
+            raise RecognizerControlTimeout(f"recognizer {name} timed out after {timeout}s") from None
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+class ExponentialBackoff:
+    """Retry delays growing as base * 2**attempt up to cap, each drawn uniformly from [0, that] (full jitter)"""
+
+    def __init__(self, base=1.0, cap=60.0):
+        self.base = base
+        self.cap = cap
+        self.attempt = 0
+
+    def next_delay(self):
+        ceiling = min(self.cap, self.base * 2 ** self.attempt)
+        self.attempt += 1
+        return random.uniform(0, ceiling)
+
+    def reset(self):
+        self.attempt = 0
+
+
+STANDBY_RETRY = "recognizer_standby_retry"
+FAILOVER_RETRY = "recognizer_failover_retry"
+
+
+class StandbyRecognizers:
+    """
+    A pre-built standby recognizer pair for the active one.
+    build() returns a new (production, translation) pair (either may be None),
+    update(recognizer) brings a recognizer's phrase list and translation targets up to
+    date, get_active() returns the active pair and activate(pair) installs a started pair. Deadlines for retries go on scheduler (a CaptionScheduler).
+    should_run() is False once recognition has been stopped; a failover then does nothing.
+    """
+
+    def __init__(self, control, build, update, get_active, activate, scheduler,
+                 should_run=None, backoff=None, metrics=METRICS):
+        self._control = control
+        self._build = build
+        self._update = update
+        self._get_active = get_active
+        self._activate = activate
+        self._scheduler = scheduler
+        self._should_run = should_run or (lambda: True)
+        self.backoff = backoff or ExponentialBackoff()
+        self._standby = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.failovers = metrics.counter("recognizer_failovers")
+        self.cold_failovers = metrics.counter("recognizer_failovers_cold")
+        self.rebuild_failures = metrics.counter("recognizer_rebuild_failures")
+        # Cancel event from the SDK until the replacement pair is running
+        self.failover_time = metrics.histogram("recognizer_failover_ms")
+        metrics.gauge("recognizer_standby_ready", lambda: int(self._standby is not None))
+
+    @property
+    def ready(self):
+        return self._standby is not None
+
+    @property
+    def in_progress(self):
+        """True while a failover is queued or running"""
+        return self._pending > 0
+
+    def prepare(self):
+        """Build the standby pair on the control thread unless one is ready"""
+        return self._control.submit("standby", self._prepare)
+
+    def refresh(self):
+        """Bring the standby pair up to date after a dictionary edit or a translation target change"""
+        return self._control.submit("standby_refresh", self._refresh)
+
+    def fail_over(self, failed, created_at):
+        """The active recognizer failed (SDK cancel event at perf_counter() created_at): swap the standby in"""
+        with self._lock:
+            self._pending += 1
+        return self._control.submit("failover", self._fail_over, failed, created_at)
+
+    def cancel_retry(self):
+        """Recognition was stopped: drop a failover retry that is waiting out its backoff"""
+        if self._scheduler.cancel(FAILOVER_RETRY):
+            self.backoff.reset()
+            with self._lock:
+                self._pending -= 1
+
+    def _new_pair(self):
+        pair = self._build()
+        for recognizer in pair:
+            if recognizer is not None:
+                self._update(recognizer)
+        return pair
+
+    def _prepare(self):
+        if self._standby is not None:
+            return
+        try:
+            self._standby = self._new_pair()
+        except Exception as e:
+            self.rebuild_failures.inc()
+            delay = self.backoff.next_delay()
+            logging.error(f"[SpeechCaption] Building standby recognizers failed ({e}); retrying in {delay:.1f}s")
+            self._scheduler.schedule(STANDBY_RETRY, delay, self.prepare)
+            return
+        self.backoff.reset()
+        logging.info("[SpeechCaption] Standby recognizers ready")
+
+    def _refresh(self):
+        if self._standby is None:
+            return
+        for recognizer in self._standby:
+            if recognizer is not None:
+                self._update(recognizer)
+
+    def _fail_over(self, failed, created_at):
+        retrying = False
+        try:
+            if not self._should_run():
+                logging.info("[SpeechCaption] Recognition was stopped; skipping recognizer failover")
+                return False
+            active = self._get_active()
+            if failed not in active:
+                return False  # this pair was already replaced or restarted
+            for recognizer in active:
+                if recognizer is not None:
+                    try:
+                        recognizer.stop()
+                    except Exception as e:
+                        logging.warning(f"[SpeechCaption] Stopping failed recognizer: {e}")
+            pair, self._standby = self._standby, None
+            try:
+                if pair is None:
+                    self.cold_failovers.inc()
+                    pair = self._new_pair()
+                start_all(pair)
+            except Exception as e:
+                self.rebuild_failures.inc()
+                delay = self.backoff.next_delay()
+                logging.error(f"[SpeechCaption] Recognizer failover failed ({e}); retrying in {delay:.1f}s")
+                # Still in progress until the retry runs
+                retrying = True
+                self._scheduler.schedule(FAILOVER_RETRY, delay, lambda: self._control.submit(
+                    "failover", self._fail_over, failed, created_at))
+                return False
+            if not self._should_run():
+                # Stopped while the new pair was starting: keep it as the standby instead
+                try:
+                    for recognizer in pair:
+                        if recognizer is not None:
+                            recognizer.stop()
+                    self._standby = pair
+                except Exception as e:
+                    logging.warning(f"[SpeechCaption] Stopping unused failover recognizers: {e}")
+                logging.info("[SpeechCaption] Recognition was stopped during failover; not activating the new recognizers")
+                return False
+            self._activate(pair)
+            self.backoff.reset()
+            self.failovers.inc()
+            elapsed = time.perf_counter() - created_at
+            self.failover_time.observe(elapsed)
+            logging.warning(f"[SpeechCaption] Failed over to standby recognizers in {elapsed * 1000:.0f}ms")
+            self._prepare()
+            return True
+        finally:
+            if not retrying:
+                with self._lock:
+                    self._pending -= 1
+
+
+class LagWindow:
+    """Worst event loop lag seen between LoopLagMonitor.watch() and close()"""
+
+    __slots__ = ("max_lag", "samples", "_monitor")
+
+    def __init__(self, monitor):
+        self.max_lag = 0.0
+        self.samples = 0
+        self._monitor = monitor
+
+    def close(self):
+        self._monitor._windows.discard(self)
+        return self.max_lag
+
+
+class LoopLagMonitor:
+    """Samples event loop lag every interval seconds (event_loop_lag_ms)"""
+
+    def __init__(self, interval=0.05, metrics=METRICS):
+        self.interval = interval
+        self.lag = metrics.histogram("event_loop_lag_ms")
+        self._windows = set()
+        self._task = None
+
+    def bind(self, loop):
+        """Start sampling (call from inside the running loop)"""
+        self._task = loop.create_task(self._run())
+
+    def unbind(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def watch(self):
+        window = LagWindow(self)
+        self._windows.add(window)
+        return window
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                expected = loop.time() + self.interval
+                await asyncio.sleep(self.interval)
+                lag = max(0.0, loop.time() - expected)
+                self.lag.observe(lag)
+                for window in self._windows:
+                    window.samples += 1
+                    if lag > window.max_lag:
+                        window.max_lag = lag
+        except asyncio.CancelledError:
+            pass
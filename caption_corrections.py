@@ -0,0 +1,244 @@
+"""
+Caption Corrections
+One precompiled, case-insensitive token trie built from the dictionary's
+spelling_corrections, bible_books and custom_phrases, applied in a single
+left-to-right pass over the caption text.
+
+- Multi-word entries ("Song of Solomon", "1 Corinthians", "Dave Bearing") match across tokens
+- The longest entry starting at a token wins; corrected text is never rescanned
+- Punctuation around a match ("corinthians," "(god)") is kept; whitespace is left untouched
+- A replacement starting lowercase is capitalized when the matched text was ("Dahntahn")
+- spelling_corrections win over bible_books, which win over custom_phrases, for identical keys
+- With bible_books_need_chapter, a one-word book name ("Marcos", "Hechos") is only corrected
+  right before a chapter number, since in translated text it is usually an ordinary word
+
+IncrementalCorrector keeps one stream's last hypothesis and its corrected form so a
+growing interim result only pays for its new words. CorrectionRegistry holds one
+compiled engine and corrector per language, so each translation is corrected with
+its own language's rules and languages without rules are passed through untouched.
+"""
+
+import bisect
+import re
+
+# One whitespace-delimited token: leading punctuation, core, trailing punctuation
+_TOKEN = re.compile(r"(?<!\S)(?=\S)([^\w\s]*)(\S*?)([^\w\s]*)(?=\s|$)")
+
+# Trie key marking the end of an entry; token cores are never empty
+_END = ""
+
+
+def _tokens(phrase):
+    return [match.group(2).casefold() for match in _TOKEN.finditer(phrase) if match.group(2)]
+
+
+class CorrectionEngine:
+    """Compiled dictionary corrections; immutable once built, so safe to share across threads"""
+
+    def __init__(self, spelling_corrections=None, bible_books=(), custom_phrases=(), chapter_books=False):
+        self._root = {}
+        self.entries = 0
+        # Added lowest priority first: a later identical key replaces the earlier entry
+        for phrase in custom_phrases:
+            self._add(phrase, phrase)
+        for book in bible_books:
+            self._add(book, book, chapter_books)
+        for incorrect, correct in (spelling_corrections or {}).items():
+            self._add(incorrect, correct)
+
+    @classmethod
+    def from_dictionary(cls, dictionary):
+        return cls(dictionary.get("spelling_corrections", {}), dictionary.get("bible_books", []),
+                   dictionary.get("custom_phrases", []), dictionary.get("bible_books_need_chapter", False))
+
+    def _add(self, phrase, replacement, chapter=False):
+        tokens = _tokens(phrase)
+        if not tokens or not replacement:
+            return
+        node = self._root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        if _END not in node:
+            self.entries += 1
+        # (replacement, only before a chapter number)
+        node[_END] = (replacement, chapter and len(tokens) == 1)
+
+    def correct(self, text):
+        if not text or not self._root:
+            return text
+        return self.correct_from(text)
+
+    def correct_from(self, text, start=0, checkpoints=None, output_offset=0):
+        """
+        Corrected text[start:], where start is 0 or the end of a token. When checkpoints is a
+        list, one (resume_at, examined_end, output_length) tuple is appended per decision:
+        correcting may restart at resume_at with the first output_length characters of the
+        output unchanged, provided text[:examined_end + 1] is unchanged. examined_end never
+        decreases along the list; output_length counts from output_offset.
+        """
+        tokens = list(_TOKEN.finditer(text, start))
+        root = self._root
+        pieces = []
+        emitted = output_offset
+        examined = -1
+        pos = start
+        i = 0
+        count = len(tokens)
+        while i < count:
+            first = tokens[i]
+            core = first.group(2)
+            node = root.get(core.casefold()) if core else None
+            if node is None:
+                if checkpoints is not None:
+                    end = first.end()
+                    examined = max(examined, end)
+                    checkpoints.append((end, examined, emitted + end - pos))
+                i += 1
+                continue
+            # Walk forward for the longest entry; only the outer edges may carry punctuation
+            match_end, replacement = None, None
+            j = i
+            while True:
+                if _END in node:
+                    entry, chapter = node[_END]
+                    if not chapter or (j + 1 < count and not tokens[j].group(3) and _is_chapter(tokens[j + 1])):
+                        match_end, replacement = j, entry
+                if tokens[j].group(3):
+                    last_seen = tokens[j].end()
+                    break
+                if j + 1 >= count:
+                    # More words may still arrive and extend the match
+                    last_seen = len(text) + 1
+                    break
+                following = tokens[j + 1]
+                last_seen = following.end()
+                if following.group(1) or not following.group(2):
+                    break
+                node = node.get(following.group(2).casefold())
+                if node is None:
+                    break
+                j += 1
+            if match_end is None:
+                if checkpoints is not None:
+                    end = first.end()
+                    examined = max(examined, last_seen)
+                    checkpoints.append((end, examined, emitted + end - pos))
+                i += 1
+                continue
+            if core[0].isupper() and replacement[0].islower():
+                replacement = replacement[0].upper() + replacement[1:]
+            gap = text[pos:first.start(2)]
+            pieces.append(gap)
+            pieces.append(replacement)
+            emitted += len(gap) + len(replacement)
+            pos = tokens[match_end].end(2)
+            if checkpoints is not None:
+                end = tokens[match_end].end()
+                examined = max(examined, last_seen)
+                checkpoints.append((end, examined, emitted + end - pos))
+            i = match_end + 1
+        if not pieces:
+            return text[start:]
+        pieces.append(text[pos:])
+        return "".join(pieces)
+
+
+class IncrementalCorrector:
+    """
+    Corrects successive hypotheses of one caption stream. The corrected prefix the new
+    hypothesis shares with the previous one is reused and only the changed tail is
+    rescanned; when the recognizer rewrites earlier words it falls back to the point
+    of the rewrite (or a full pass).
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.reset()
+
+    def reset(self):
+        self._raw = ""
+        self._corrected = ""
+        self._resume = []
+        self._examined = []
+        self._lengths = []
+
+    def correct(self, text):
+        if text == self._raw:
+            return self._corrected
+        if not text or not self.engine.entries:
+            self.reset()
+            return text
+        raw = self._raw
+        if text.startswith(raw):
+            shared = len(raw)
+        else:
+            shared = _shared_prefix_length(raw, text)
+        # Decisions whose lookahead ended inside the shared prefix are still valid
+        keep = bisect.bisect_left(self._examined, shared)
+        if keep:
+            resume, output_length = self._resume[keep - 1], self._lengths[keep - 1]
+        else:
+            resume, output_length = 0, 0
+        del self._resume[keep:], self._examined[keep:], self._lengths[keep:]
+        checkpoints = []
+        tail = self.engine.correct_from(text, resume, checkpoints, output_length)
+        for resume_at, examined_end, length in checkpoints:
+            self._resume.append(resume_at)
+            self._examined.append(examined_end)
+            self._lengths.append(length)
+        self._raw = text
+        self._corrected = self._corrected[:output_length] + tail
+        return self._corrected
+
+
+class CorrectionRegistry:
+    """Compiled correction engine and incremental corrector per language"""
+
+    def __init__(self):
+        self._engines = {}
+        self._correctors = {}
+
+    def set_language(self, language, dictionary):
+        """Compile (or recompile) language's rules; a dictionary without rules removes the language"""
+        engine = CorrectionEngine.from_dictionary(dictionary or {})
+        if engine.entries:
+            self._engines[language] = engine
+            self._correctors[language] = IncrementalCorrector(engine)
+        else:
+            self._engines.pop(language, None)
+            self._correctors.pop(language, None)
+        return engine.entries
+
+    def remove_language(self, language):
+        self._engines.pop(language, None)
+        self._correctors.pop(language, None)
+
+    def languages(self):
+        return sorted(self._engines)
+
+    def engine(self, language):
+        return self._engines.get(language)
+
+    def correct(self, language, text):
+        """Correct one hypothesis of language's caption stream"""
+        corrector = self._correctors.get(language)
+        if corrector is None:
+            return text
+        return corrector.correct(text)
+
+
+def _is_chapter(token):
+    # "4", "4:12", "4," but not "(4)" or "4th"
+    return not token.group(1) and token.group(2)[:1].isdigit() and token.group(2).split(":")[0].isdigit()
+
+
+def _shared_prefix_length(a, b):
+    # Binary search on C-level slice comparison rather than a per-character Python loop
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[low:middle] == b[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
@@ -0,0 +1,129 @@
+"""
+Caption Dictionary Store
+The caption dictionary (spelling corrections, Bible books, custom phrases,
+supported languages) held in memory with a version number.
+
+Reads never touch the disk. Every change is written atomically (temp file in the
+same directory, fsync, rename) and then announced to listeners with the set of
+sections that changed, so the correction matcher and recognizer phrase lists can
+be rebuilt as soon as an edit is made through the API. A hand edit of the file
+is picked up with reload().
+"""
+
+import copy
+import json
+import logging
+import os
+import tempfile
+import threading
+
+
+def empty_dictionary():
+    return {"bible_books": [], "spelling_corrections": {}, "custom_phrases": [], "supported_languages": []}
+
+
+def write_json_atomic(path, data):
+    """Replace path with data in one rename so readers never see a half-written file"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.replace(temp_path, path)
+        except OSError as e:
+            # A file bind-mounted on its own (Docker volumes) cannot be renamed over
+            logging.warning(f"[SpeechCaption] Atomic rename onto {path} failed ({e}), writing in place")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            os.unlink(temp_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+class DictionaryStore:
+    """
+    Versioned in-memory dictionary. snapshot() returns the current dictionary, which
+    must be treated as read-only; update() edits a copy, persists it and swaps it in.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.version = 0
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._data = self._read()
+
+    def _read(self):
+        try:
+            if not os.path.exists(self.path):
+                logging.warning(f"[SpeechCaption] Dictionary file not found at {self.path}")
+                return empty_dictionary()
+            data = self._load()
+            logging.info("[SpeechCaption] Dictionary loaded successfully")
+            return data
+        except json.JSONDecodeError as e:
+            logging.error(f"[SpeechCaption] Failed to parse dictionary JSON: {e}")
+        except Exception as e:
+            logging.error(f"[SpeechCaption] Failed to load dictionary: {e}")
+        return empty_dictionary()
+
+    def _load(self):
+        data = empty_dictionary()
+        with open(self.path, "r", encoding="utf-8") as f:
+            data.update(json.load(f))
+        return data
+
+    def snapshot(self):
+        return self._data
+
+    def subscribe(self, listener):
+        """listener(store, changed_sections) runs after every committed change"""
+        self._listeners.append(listener)
+
+    def update(self, mutator):
+        """
+        Apply mutator(dictionary) to a copy; returns the mutator's result. Nothing is
+        written or announced when the mutator leaves the dictionary unchanged.
+        """
+        with self._lock:
+            current = self._data
+            data = copy.deepcopy(current)
+            result = mutator(data)
+            changed = {section for section in set(current) | set(data) if current.get(section) != data.get(section)}
+            if not changed:
+                return result
+            write_json_atomic(self.path, data)
+            self._data = data
+            self.version += 1
+            logging.info(f"[SpeechCaption] Dictionary saved (version {self.version}, changed: {', '.join(sorted(changed))})")
+            self._notify(changed)
+            return result
+
+    def reload(self):
+        """
+        Re-read the file after a hand edit; returns the changed sections. A file that is
+        missing or cannot be parsed raises, and the dictionary in memory is kept.
+        """
+        with self._lock:
+            current = self._data
+            data = self._load()
+            changed = {section for section in set(current) | set(data) if current.get(section) != data.get(section)}
+            if not changed:
+                return changed
+            self._data = data
+            self.version += 1
+            logging.info(f"[SpeechCaption] Dictionary reloaded (version {self.version}, changed: {', '.join(sorted(changed))})")
+            self._notify(changed)
+            return changed
+
+    def _notify(self, changed):
+        for listener in list(self._listeners):
+            try:
+                listener(self, changed)
+            except Exception as e:
+                logging.error(f"[SpeechCaption] Dictionary change listener failed: {e}")
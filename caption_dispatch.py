@@ -0,0 +1,169 @@
+"""
+Caption Dispatch
+Thread-safe handoff of caption work from Speech SDK callback threads into the
+long-lived event loop that owns the WebSocket connections.
+
+LoopDispatcher runs independent coroutines on the loop. OrderedDispatcher is the
+single writer for caption frames: work posted from any thread joins one FIFO,
+is stamped with a monotonic sequence number and the server time, and runs on the
+loop strictly in that order, so a frame can never overtake one posted before it.
+"""
+
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from collections import deque, namedtuple
+
+from caption_metrics import METRICS
+
+
+class LoopDispatcher:
+    """Schedules coroutines on one bound event loop from any thread"""
+
+    def __init__(self, metrics=METRICS):
+        self._loop = None
+        self._loop_thread_id = None
+        # Time from submit() on the SDK thread until the coroutine starts on the loop
+        self._handoff = metrics.histogram("dispatch_handoff_ms")
+        # Whole cost of the legacy asyncio.run() path, used before the loop is bound
+        self._fallback = metrics.histogram("dispatch_asyncio_run_ms")
+        self._errors = metrics.counter("dispatch_errors")
+
+    def bind(self, loop):
+        """Attach the server's running loop (call from inside that loop)"""
+        self._loop = loop
+        self._loop_thread_id = threading.get_ident()
+        logging.info(f"[SpeechCaption] Caption dispatcher bound to event loop {id(loop)}")
+
+    def unbind(self):
+        self._loop = None
+        self._loop_thread_id = None
+
+    @property
+    def bound(self):
+        return self._loop is not None and not self._loop.is_closed()
+
+    async def _timed(self, queued_at, coro):
+        self._handoff.observe(time.perf_counter() - queued_at)
+        return await coro
+
+    def _on_done(self, future):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            self._errors.inc()
+            logging.error(f"[SpeechCaption] Dispatched caption task failed: {error}")
+
+    def submit(self, coro):
+        """
+        Run coro on the bound loop without blocking the caller.
+        Falls back to asyncio.run() when no loop is bound yet (e.g. during startup).
+        """
+        queued_at = time.perf_counter()
+        if not self.bound:
+            try:
+                with self._fallback.time():
+                    asyncio.run(coro)
+            except Exception as e:
+                self._errors.inc()
+                logging.error(f"[SpeechCaption] Caption task failed outside the event loop: {e}")
+            return None
+        wrapped = self._timed(queued_at, coro)
+        try:
+            if threading.get_ident() == self._loop_thread_id:
+                task = self._loop.create_task(wrapped)
+            else:
+                task = asyncio.run_coroutine_threadsafe(wrapped, self._loop)
+        except RuntimeError as e:
+            # Loop closed between the bound check and the handoff (server shutting down)
+            wrapped.close()
+            coro.close()
+            self._errors.inc()
+            logging.warning(f"[SpeechCaption] Dropped caption task, event loop unavailable: {e}")
+            return None
+        task.add_done_callback(self._on_done)
+        return task
+
+
+# Order of a posted item and the server wall-clock time (seconds) at which it was posted
+DispatchStamp = namedtuple("DispatchStamp", "seq ts")
+
+
+class OrderedDispatcher:
+    """
+    One ordered queue of caption publishing work, drained on the bound loop.
+    post(callback, *args) runs callback(stamp, *args) after everything posted before it.
+    Until a loop is bound the posting thread runs the queue itself, still one item at a time.
+    """
+
+    def __init__(self, metrics=METRICS):
+        self._loop = None
+        self._lock = threading.Lock()
+        self._writer = threading.RLock()
+        self._queue = deque()
+        self._seq = itertools.count(1)
+        self._drain_scheduled = False
+        # Time from post() until the item runs on the writer
+        self.latency = metrics.histogram("writer_queue_ms")
+        self.items = metrics.counter("writer_items")
+        self.wakeups = metrics.counter("writer_wakeups")
+        self.errors = metrics.counter("writer_errors")
+        metrics.gauge("writer_queue_depth", self.depth)
+
+    def bind(self, loop):
+        with self._lock:
+            self._loop = loop
+        logging.info(f"[SpeechCaption] Caption writer bound to event loop {id(loop)}")
+
+    def unbind(self):
+        with self._lock:
+            self._loop = None
+        self._drain()
+
+    def depth(self):
+        return len(self._queue)
+
+    def post(self, callback, *args):
+        """Queue callback(stamp, *args) without blocking; returns its DispatchStamp"""
+        with self._lock:
+            stamp = DispatchStamp(next(self._seq), time.time())
+            self._queue.append((stamp, time.perf_counter(), callback, args))
+            loop = self._loop
+            if loop is not None:
+                if self._drain_scheduled:
+                    return stamp
+                self._drain_scheduled = True
+        if loop is None:
+            self._drain()
+            return stamp
+        try:
+            loop.call_soon_threadsafe(self._drain)
+            self.wakeups.inc()
+        except RuntimeError as e:
+            # Loop closed under us (server shutting down): run the queue here instead
+            logging.warning(f"[SpeechCaption] Caption writer loop unavailable, running inline: {e}")
+            with self._lock:
+                self._loop = None
+                self._drain_scheduled = False
+            self._drain()
+        return stamp
+
+    def _drain(self):
+        with self._writer:
+            with self._lock:
+                self._drain_scheduled = False
+            while True:
+                with self._lock:
+                    if not self._queue:
+                        return
+                    stamp, queued_at, callback, args = self._queue.popleft()
+                self.latency.observe(time.perf_counter() - queued_at)
+                self.items.inc()
+                try:
+                    callback(stamp, *args)
+                except Exception as e:
+                    self.errors.inc()
+                    logging.error(f"[SpeechCaption] Caption writer item {stamp.seq} failed: {e}")
@@ -0,0 +1,58 @@
+"""
+Caption Frame Encoding
+Encodes each outbound WebSocket frame exactly once so every recipient shares
+the same string. orjson is used when installed, otherwise the stdlib json module.
+"""
+
+import json
+import logging
+
+from caption_metrics import METRICS
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+def _stdlib_dumps(payload):
+    # Compact separators and raw UTF-8 keep non-Latin captions (zh, ja, ru, ar) small on the wire
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+def _orjson_dumps(payload):
+    return orjson.dumps(payload).decode("utf-8")
+
+
+ENCODERS = {"json": _stdlib_dumps}
+if ORJSON_AVAILABLE:
+    ENCODERS["orjson"] = _orjson_dumps
+
+
+class FrameEncoder:
+    """Pluggable JSON encoder for broadcast frames"""
+
+    def __init__(self, backend="auto", metrics=METRICS):
+        self._encode_cost = metrics.histogram("encode_frame_ms")
+        self.use(backend)
+
+    def use(self, backend):
+        """Select an encoder by name: "auto", "orjson", "json" or a callable"""
+        if callable(backend):
+            self.name = getattr(backend, "__name__", "custom")
+            self._dumps = backend
+            return
+        if backend == "auto":
+            backend = "orjson" if ORJSON_AVAILABLE else "json"
+        if backend not in ENCODERS:
+            logging.warning(f"[SpeechCaption] JSON encoder '{backend}' not available, falling back to stdlib json")
+            backend = "json"
+        self.name = backend
+        self._dumps = ENCODERS[backend]
+
+    def encode(self, payload):
+        """Serialize payload once; the returned text is shared by every client queue"""
+        with self._encode_cost.time():
+            return self._dumps(payload)
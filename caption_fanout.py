@@ -0,0 +1,301 @@
+"""
+Caption Fan-out
+Per-client outbound queues and writer tasks so one slow viewer never delays the others.
+
+Interim frames are latest-wins per stream key: a newer interim replaces an
+undelivered older one. Final frames are always queued and delivered in order;
+a send that times out is waited on, never dropped. A client whose backlog stays
+full (or whose sends keep timing out) for longer than max_lag_seconds is evicted.
+
+Every connection listens on one channel: PRODUCTION_CHANNEL by default,
+user_channel(language) once a user view subscribes to a language, or
+profile_channel(name) once a production page asks for a display profile.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+
+from caption_metrics import METRICS
+from caption_protocol import DELTA_PROTOCOL, LEGACY_PROTOCOL
+
+DEFAULT_MAX_PENDING = 32
+DEFAULT_SEND_TIMEOUT = 2.0
+DEFAULT_MAX_LAG_SECONDS = 10.0
+
+PRODUCTION_CHANNEL = "production"
+
+
+def user_channel(language):
+    return f"user:{language}"
+
+
+def profile_channel(name):
+    return f"profile:{name}"
+
+
+class OutboundFrame:
+    __slots__ = ("key", "text", "final", "enqueued_at", "dropped")
+
+    def __init__(self, key, text, final):
+        self.key = key
+        self.text = text
+        self.final = final
+        self.enqueued_at = time.perf_counter()
+        self.dropped = False
+
+
+class ClientConnection:
+    """One connected WebSocket with its own bounded queue and writer task"""
+
+    def __init__(self, websocket, hub, max_pending, send_timeout, max_lag_seconds):
+        self.websocket = websocket
+        self.hub = hub
+        self.channel = PRODUCTION_CHANNEL
+        self.protocol = LEGACY_PROTOCOL
+        # Last caption frame seq the client confirmed per stream (protocol 2 delta base)
+        self.acked = {}
+        self.max_pending = max_pending
+        self.send_timeout = send_timeout
+        self.max_lag_seconds = max_lag_seconds
+        self.closed = False
+        self.lagged_since = None
+        self._queue = deque()
+        self._live = 0
+        self._pending_interim = {}
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    @property
+    def client(self):
+        return self.websocket.client
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._writer())
+
+    def enqueue(self, key, text, final):
+        """Queue one frame without blocking; must be called on the event loop thread"""
+        if self.closed:
+            return
+        previous = self._pending_interim.pop(key, None)
+        if previous is not None:
+            # Older undelivered interim for this stream is superseded either way
+            previous.dropped = True
+            self._live -= 1
+            self.hub.interim_dropped.inc()
+        frame = OutboundFrame(key, text, final)
+        if not final:
+            self._pending_interim[key] = frame
+        self._queue.append(frame)
+        self._live += 1
+        if len(self._queue) > self.max_pending * 4 and len(self._queue) > self._live * 2:
+            self._queue = deque(f for f in self._queue if not f.dropped)
+        self._check_lag()
+        if not self.closed:
+            self._wakeup.set()
+
+    def _check_lag(self):
+        if self._live >= self.max_pending:
+            if self.lagged_since is None:
+                self.lagged_since = time.monotonic()
+                logging.warning(f"[SpeechCaption] WebSocket client lagging: {self.client} ({self._live} frames queued)")
+        if self.lagged_since is not None and time.monotonic() - self.lagged_since > self.max_lag_seconds:
+            self.evict(f"lagged for more than {self.max_lag_seconds}s")
+        elif self._live > self.max_pending * 4:
+            # Hard memory bound: finals are never dropped, so a dead client must go
+            self.evict(f"backlog exceeded {self.max_pending * 4} frames")
+
+    async def _writer(self):
+        try:
+            while not self.closed:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                while self._queue and not self.closed:
+                    frame = self._queue.popleft()
+                    if frame.dropped:
+                        continue
+                    self._live -= 1
+                    if self._pending_interim.get(frame.key) is frame:
+                        del self._pending_interim[frame.key]
+                    if not await self._send(frame):
+                        return
+                    self.hub.delivery.observe(time.perf_counter() - frame.enqueued_at)
+                    if self._live < self.max_pending // 2:
+                        self.lagged_since = None
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logging.error(f"[SpeechCaption] WebSocket send error for {self.client}: {e}")
+            self.evict("send failed")
+
+    async def _send(self, frame):
+        """
+        Send one frame. A send that outlasts send_timeout is not cancelled (that would cut
+        the frame off mid-write); the client counts as lagging while it is still waited on,
+        and is evicted once that lasts max_lag_seconds. Returns False after an eviction.
+        """
+        send = asyncio.ensure_future(self.websocket.send_text(frame.text))
+        try:
+            while True:
+                done, _ = await asyncio.wait((send,), timeout=self.send_timeout)
+                if done:
+                    send.result()
+                    return True
+                self.hub.send_timeouts.inc()
+                if self.lagged_since is None:
+                    self.lagged_since = time.monotonic()
+                self._check_lag()
+                if self.closed:
+                    return False
+        finally:
+            if not send.done():
+                send.cancel()
+
+    def evict(self, reason):
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.clear()
+        self._live = 0
+        self._pending_interim.clear()
+        self.hub.evicted.inc()
+        self.hub.unregister(self)
+        logging.warning(f"[SpeechCaption] Evicting WebSocket client {self.client}: {reason}")
+        asyncio.get_running_loop().create_task(self._close())
+
+    async def _close(self):
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+        try:
+            await asyncio.wait_for(self.websocket.close(code=1013, reason="Client too slow"), timeout=self.send_timeout)
+        except Exception:
+            pass
+
+    def stop(self):
+        self.closed = True
+        if self._task is not None:
+            self._task.cancel()
+
+
+class ClientHub:
+    """Registry of connected caption clients with non-blocking broadcast"""
+
+    def __init__(self, max_pending=DEFAULT_MAX_PENDING, send_timeout=DEFAULT_SEND_TIMEOUT,
+                 max_lag_seconds=DEFAULT_MAX_LAG_SECONDS, metrics=METRICS):
+        self.max_pending = max_pending
+        self.send_timeout = send_timeout
+        self.max_lag_seconds = max_lag_seconds
+        self._connections = []
+        self._channels = {}
+        self._channel_listeners = []
+        self.delivery = metrics.histogram("fanout_delivery_ms")
+        self.broadcast_cost = metrics.histogram("fanout_broadcast_ms")
+        self.interim_dropped = metrics.counter("fanout_interim_dropped")
+        self.send_timeouts = metrics.counter("fanout_send_timeouts")
+        self.evicted = metrics.counter("fanout_evicted")
+        self.chars_queued = metrics.counter("fanout_chars_queued")
+
+    def __len__(self):
+        return len(self._connections)
+
+    def __iter__(self):
+        return iter(list(self._connections))
+
+    def register(self, websocket):
+        connection = ClientConnection(websocket, self, self.max_pending, self.send_timeout, self.max_lag_seconds)
+        self._connections.append(connection)
+        self._channels.setdefault(connection.channel, []).append(connection)
+        connection.start()
+        self._channel_changed(connection.channel)
+        return connection
+
+    def unregister(self, connection):
+        if connection in self._connections:
+            self._connections.remove(connection)
+            members = self._channels.get(connection.channel, [])
+            if connection in members:
+                members.remove(connection)
+            self._channel_changed(connection.channel)
+        connection.stop()
+
+    def acknowledge(self, connection, stream, seq):
+        if isinstance(seq, int) and seq > connection.acked.get(stream, 0):
+            connection.acked[stream] = seq
+
+    def subscribe(self, connection, channel):
+        """Move a connection to another channel (e.g. a user view picking a language)"""
+        if connection.closed or channel == connection.channel:
+            return
+        previous = connection.channel
+        members = self._channels.get(previous, [])
+        if connection in members:
+            members.remove(connection)
+        connection.channel = channel
+        self._channels.setdefault(channel, []).append(connection)
+        self._channel_changed(previous)
+        self._channel_changed(channel)
+
+    def add_channel_listener(self, listener):
+        """listener(channel) is called on the event loop whenever a channel gains or loses a connection"""
+        self._channel_listeners.append(listener)
+
+    def _channel_changed(self, channel):
+        for listener in self._channel_listeners:
+            try:
+                listener(channel)
+            except Exception as e:
+                logging.error(f"[SpeechCaption] Channel listener failed for {channel}: {e}")
+
+    def channel_size(self, channel):
+        return len(self._channels.get(channel, ()))
+
+    def active_channels(self):
+        return {channel for channel, members in self._channels.items() if members}
+
+    def frame_text(self, connection, frame, streams, deltas=None):
+        """Encoded form of frame for one connection, reusing deltas already built for the same base"""
+        if connection.protocol < DELTA_PROTOCOL:
+            return streams.legacy_text(frame)
+        base = connection.acked.get(frame.stream)
+        if deltas is None:
+            return streams.delta_text(frame, base)
+        text = deltas.get(base)
+        if text is None:
+            text = deltas[base] = streams.delta_text(frame, base)
+        return text
+
+    def encode_stream(self, frame, streams):
+        """
+        Encoded form of frame for every connection on its channel, as (connection, text) pairs.
+        Legacy clients share one full frame; delta clients share one delta per distinct acknowledged base.
+        """
+        deltas = {}
+        return [(connection, self.frame_text(connection, frame, streams, deltas))
+                for connection in list(self._channels.get(frame.stream, ()))]
+
+    def deliver(self, frame, encoded):
+        """Queue frames already encoded by encode_stream; returns immediately regardless of client speed"""
+        with self.broadcast_cost.time():
+            sent_chars = 0
+            for connection, text in encoded:
+                if connection.channel != frame.stream:
+                    continue  # moved to another channel since the frame was encoded
+                connection.enqueue(frame.stream, text, frame.final)
+                sent_chars += len(text)
+            self.chars_queued.inc(sent_chars)
+
+    def broadcast_stream(self, frame, streams):
+        """Encode and queue one caption stream frame on its channel"""
+        self.deliver(frame, self.encode_stream(frame, streams))
+
+    def broadcast(self, text, key, final=True, channel=None):
+        """
+        Queue text for every client on channel (or every client when channel is None);
+        returns immediately regardless of client speed
+        """
+        with self.broadcast_cost.time():
+            targets = list(self._connections if channel is None else self._channels.get(channel, ()))
+            for connection in targets:
+                connection.enqueue(key, text, final)
+            self.chars_queued.inc(len(text) * len(targets))
@@ -0,0 +1,208 @@
+"""
+Caption Line Layout
+Incremental line wrapping for the user view. Each finalized history entry is
+wrapped once and its lines are kept per language; an event only re-wraps the
+interim tail. Cached lines are dropped only when the line length changes; how
+many entries are shown is up to the caller's history.
+
+DisplayProfile lays text out in pixels for one named display (font, size, box
+width, line count) using cached per-font character width tables, so the server
+breaks lines once per profile and every viewer on it renders the same lines.
+"""
+
+import textwrap
+import unicodedata
+
+
+class _LanguageLayout:
+    __slots__ = ("history", "entry_lines", "history_text", "interim", "text")
+
+    def __init__(self):
+        self.history = ()
+        self.entry_lines = []
+        self.history_text = ""
+        self.interim = None
+        self.text = ""
+
+
+class LineLayoutCache:
+    """Wrapped user-view text per language for one line length"""
+
+    def __init__(self, width):
+        self.width = width
+        self._languages = {}
+
+    def configure(self, width):
+        """Apply the current line length setting; changing it invalidates every cached line"""
+        if width != self.width:
+            self.width = width
+            self._languages.clear()
+
+    def invalidate(self, language=None):
+        if language is None:
+            self._languages.clear()
+        else:
+            self._languages.pop(language, None)
+
+    def _wrap(self, text):
+        return textwrap.wrap(text, width=self.width)
+
+    def render(self, language, history, interim):
+        """Display text for history (finalized entries, oldest first) plus the interim tail"""
+        history = tuple(history)
+        state = self._languages.get(language)
+        if state is None:
+            state = self._languages[language] = _LanguageLayout()
+        if state.history != history:
+            # Only entries not seen before are wrapped; the rest reuse their cached lines
+            known = dict(zip(state.history, state.entry_lines))
+            state.entry_lines = [known[entry] if entry in known else self._wrap(entry) for entry in history]
+            state.history = history
+            state.history_text = "\n".join(line for lines in state.entry_lines for line in lines)
+            state.interim = None
+        if interim != state.interim:
+            tail = "\n".join(self._wrap(interim)) if interim and interim.strip() != "" else ""
+            if state.history_text and tail:
+                state.text = state.history_text + "\n" + tail
+            else:
+                state.text = state.history_text or tail
+            state.interim = interim
+        return state.text
+
+
+# -------------------------------------------------------------------
+# Display profiles: pixel-width layout computed once per profile
+# -------------------------------------------------------------------
+# Advance widths in 1/1000 em for printable ASCII (space through "~"), from the
+# standard Helvetica and Times-Roman font metrics, which Arial and Times New Roman match
+_HELVETICA_WIDTHS = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+)
+_TIMES_WIDTHS = (
+    250, 333, 408, 500, 500, 833, 778, 180, 333, 333, 500, 564, 250, 333, 250, 278,
+    500, 500, 500, 500, 500, 500, 500, 500, 500, 500, 278, 278, 564, 564, 564, 444,
+    921, 722, 667, 667, 722, 611, 556, 722, 722, 333, 389, 722, 611, 889, 722, 722,
+    556, 722, 667, 556, 611, 722, 722, 944, 722, 722, 611, 333, 278, 333, 469, 500,
+    333, 444, 500, 444, 500, 444, 333, 500, 500, 278, 278, 500, 278, 778, 500, 500,
+    500, 500, 333, 389, 278, 500, 500, 722, 500, 500, 444, 480, 200, 480, 541,
+)
+_MONOSPACE_WIDTHS = (600,) * 95
+
+# Font family (lowercase) -> (width table, scale); unknown fonts are measured as Arial
+_FONT_FAMILIES = {
+    "arial": (_HELVETICA_WIDTHS, 1.0),
+    "helvetica": (_HELVETICA_WIDTHS, 1.0),
+    "sans-serif": (_HELVETICA_WIDTHS, 1.0),
+    "verdana": (_HELVETICA_WIDTHS, 1.12),
+    "tahoma": (_HELVETICA_WIDTHS, 1.03),
+    "times new roman": (_TIMES_WIDTHS, 1.0),
+    "times": (_TIMES_WIDTHS, 1.0),
+    "georgia": (_TIMES_WIDTHS, 1.1),
+    "serif": (_TIMES_WIDTHS, 1.0),
+    "courier new": (_MONOSPACE_WIDTHS, 1.0),
+    "courier": (_MONOSPACE_WIDTHS, 1.0),
+    "monospace": (_MONOSPACE_WIDTHS, 1.0),
+}
+
+_FONT_TABLES = {}
+
+
+def font_width_table(font):
+    """Shared per-font character width cache (em units), filled lazily as characters appear"""
+    family = font.split(",")[0].strip().strip("'\"").lower()
+    table = _FONT_TABLES.get(family)
+    if table is None:
+        table = _FONT_TABLES[family] = CharWidthTable(*_FONT_FAMILIES.get(family, _FONT_FAMILIES["arial"]))
+    return table
+
+
+class CharWidthTable:
+    """Character advance widths of one font in em units"""
+
+    def __init__(self, ascii_widths, scale):
+        self._widths = {chr(32 + i): width * scale / 1000 for i, width in enumerate(ascii_widths)}
+        self._fallback = ascii_widths[ord("n") - 32] * scale / 1000
+
+    def width(self, char):
+        width = self._widths.get(char)
+        if width is None:
+            width = self._widths[char] = self._measure(char)
+        return width
+
+    def _measure(self, char):
+        if unicodedata.east_asian_width(char) in ("W", "F"):
+            return 1.0
+        # Accented Latin letters are as wide as their base letter
+        base = unicodedata.normalize("NFD", char)[0]
+        if base != char and base in self._widths:
+            return self._widths[base]
+        return self._fallback
+
+
+class DisplayProfile:
+    """
+    A named display: font, font size and text box width in pixels, and the number of
+    lines shown. lay_out() returns the last `lines` lines of text broken to fit the box.
+    """
+
+    _WORD_CACHE_SIZE = 4096
+
+    def __init__(self, name, font="Arial", size_px=45, width_px=1870, lines=1):
+        self.name = name
+        self.font = font
+        self.size_px = int(size_px)
+        self.width_px = int(width_px)
+        self.lines = max(1, int(lines))
+        self._table = font_width_table(font)
+        self._space = self._table.width(" ") * self.size_px
+        self._words = {}
+        self._last_text = None
+        self._last_lines = ()
+
+    @classmethod
+    def from_config(cls, name, settings):
+        return cls(name, settings.get("font", "Arial"), settings.get("size_px", 45),
+                   settings.get("width_px", 1870), settings.get("lines", 1))
+
+    def to_dict(self):
+        return {"name": self.name, "font": self.font, "size_px": self.size_px,
+                "width_px": self.width_px, "lines": self.lines}
+
+    def word_width(self, word):
+        width = self._words.get(word)
+        if width is None:
+            if len(self._words) >= self._WORD_CACHE_SIZE:
+                self._words.clear()
+            table = self._table
+            width = self._words[word] = sum(table.width(char) for char in word) * self.size_px
+        return width
+
+    def wrap(self, text):
+        """All lines of text; like the production textwrap, words are never split"""
+        lines = []
+        for paragraph in text.split("\n"):
+            line, line_width = [], 0.0
+            for word in paragraph.split():
+                width = self.word_width(word)
+                if line and line_width + self._space + width > self.width_px:
+                    lines.append(" ".join(line))
+                    line, line_width = [word], width
+                elif line:
+                    line.append(word)
+                    line_width += self._space + width
+                else:
+                    line, line_width = [word], width
+            if line:
+                lines.append(" ".join(line))
+        return lines
+
+    def lay_out(self, text):
+        if text != self._last_text:
+            self._last_lines = tuple(self.wrap(text)[-self.lines:]) if text else ()
+            self._last_text = text
+        return self._last_lines
@@ -0,0 +1,117 @@
+"""
+Caption Logging
+Logging that never blocks a recognizer callback or the event loop on disk I/O.
+
+Records go onto an in-memory queue and one listener thread formats and writes
+them to caption_log.txt. The file is rotated by size and old files are gzipped
+by that same thread, which replaces rotate_logs.sh. Hot-path debug messages go
+through HotPathLog, which writes at most one record per message key per
+interval and says how many were skipped in between.
+"""
+
+import gzip
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import threading
+import time
+
+from caption_metrics import METRICS
+
+LOG_FORMAT = '%(asctime)s [%(levelname)s] [SpeechCaption] %(message)s'
+LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_BACKUPS = 3
+
+# Arguments of these types can be formatted later on the listener thread
+_DEFERRABLE = (str, int, float, bool, type(None))
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queues records without formatting them, so the calling thread only pays for
+    building the LogRecord. Arguments that might change before the listener gets
+    to them (anything but plain values) are rendered into the message here.
+    """
+
+    def prepare(self, record):
+        if record.args and not (isinstance(record.args, tuple) and all(isinstance(arg, _DEFERRABLE) for arg in record.args)):
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class CompressingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Size-based rotation whose backups are gzipped (caption_log.txt.1.gz, ...)"""
+
+    def __init__(self, filename, max_bytes=DEFAULT_MAX_BYTES, backups=DEFAULT_BACKUPS):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True)
+        self.namer = lambda name: name + ".gz"
+        self.rotator = self._compress
+
+    @staticmethod
+    def _compress(source, dest):
+        with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.remove(source)
+
+
+def setup_logging(path, level=logging.DEBUG, max_bytes=DEFAULT_MAX_BYTES, backups=DEFAULT_BACKUPS):
+    """
+    Route the root logger through a queue to a rotating, compressing file handler.
+    Returns the started listener; stop() it at exit to flush what is still queued.
+    """
+    file_handler = CompressingRotatingFileHandler(path, max_bytes, backups)
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT, LOG_DATE_FORMAT))
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(DeferredQueueHandler(log_queue))
+    root.setLevel(level)
+    METRICS.gauge("log_queue_depth", log_queue.qsize)
+    listener.start()
+    return listener
+
+
+class HotPathLog:
+    """
+    Rate-limited logging for messages emitted on every recognizer event: at most one
+    record per key every interval seconds, with the number skipped since the last one.
+    Nothing is built at all while the level is disabled.
+    """
+
+    def __init__(self, interval=1.0, logger=None, metrics=METRICS):
+        self.interval = interval
+        self._logger = logger or logging.getLogger()
+        self._lock = threading.Lock()
+        self._next = {}
+        self._skipped = {}
+        self.suppressed = metrics.counter("log_suppressed")
+
+    def log(self, level, key, message, *args):
+        if not self._logger.isEnabledFor(level):
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next.get(key, 0.0):
+                self._skipped[key] = self._skipped.get(key, 0) + 1
+                skipped = None
+            else:
+                self._next[key] = now + self.interval
+                skipped = self._skipped.pop(key, 0)
+        if skipped is None:
+            self.suppressed.inc()
+            return
+        if skipped:
+            message += f" ({skipped} similar skipped)"
+        self._logger.log(level, "[SpeechCaption] " + message, *args)
+
+    def debug(self, key, message, *args):
+        self.log(logging.DEBUG, key, message, *args)
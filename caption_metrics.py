@@ -0,0 +1,155 @@
+"""
+Caption Metrics
+Lightweight in-process latency histograms, counters and gauges for the caption hot path
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (milliseconds) of the histogram buckets; anything slower lands in +Inf
+DEFAULT_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class LatencyHistogram:
+    """Thread-safe fixed-bucket histogram of durations, reported in milliseconds"""
+
+    def __init__(self, name, buckets_ms=DEFAULT_BUCKETS_MS):
+        self.name = name
+        self.buckets_ms = tuple(buckets_ms)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * (len(self.buckets_ms) + 1)
+            self._count = 0
+            self._sum_ms = 0.0
+            self._max_ms = 0.0
+
+    def observe(self, seconds):
+        """Record one duration given in seconds"""
+        ms = seconds * 1000.0
+        index = len(self.buckets_ms)
+        for i, bound in enumerate(self.buckets_ms):
+            if ms <= bound:
+                index = i
+                break
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum_ms += ms
+            if ms > self._max_ms:
+                self._max_ms = ms
+
+    @contextmanager
+    def time(self):
+        """Context manager that observes the duration of its body"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def percentile(self, fraction):
+        """Approximate percentile (bucket upper bound) in milliseconds"""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+            max_ms = self._max_ms
+        if total == 0:
+            return 0.0
+        target = fraction * total
+        running = 0
+        for i, count in enumerate(counts):
+            running += count
+            if running >= target:
+                return round(min(self.buckets_ms[i], max_ms) if i < len(self.buckets_ms) else max_ms, 4)
+        return round(max_ms, 4)
+
+    def snapshot(self):
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+            sum_ms = self._sum_ms
+            max_ms = self._max_ms
+        buckets = {f"<={bound}": counts[i] for i, bound in enumerate(self.buckets_ms)}
+        buckets["+Inf"] = counts[-1]
+        return {
+            "count": total,
+            "mean_ms": round(sum_ms / total, 4) if total else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p90_ms": self.percentile(0.90),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(max_ms, 4),
+            "buckets": buckets
+        }
+
+
+class Counter:
+    """Thread-safe monotonically increasing counter"""
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._value = 0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        return self._value
+
+    def reset(self):
+        with self._lock:
+            self._value = 0
+
+
+class MetricsRegistry:
+    """Named collection of histograms and counters, created on first use"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+
+    def histogram(self, name, buckets_ms=DEFAULT_BUCKETS_MS):
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = LatencyHistogram(name, buckets_ms)
+            return self._histograms[name]
+
+    def counter(self, name):
+        with self._lock:
+            if name not in self._counters:
+                self._counters[name] = Counter(name)
+            return self._counters[name]
+
+    def gauge(self, name, read):
+        """Register read() as a point-in-time value reported with every snapshot"""
+        with self._lock:
+            self._gauges[name] = read
+
+    def reset(self):
+        with self._lock:
+            metrics = list(self._histograms.values()) + list(self._counters.values())
+        for metric in metrics:
+            metric.reset()
+
+    def snapshot(self):
+        with self._lock:
+            histograms = dict(self._histograms)
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+        return {
+            "histograms": {name: h.snapshot() for name, h in sorted(histograms.items())},
+            "counters": {name: c.value for name, c in sorted(counters.items())},
+            "gauges": {name: read() for name, read in sorted(gauges.items())}
+        }
+
+
+# Process-wide registry shared by the caption server and its helpers
+METRICS = MetricsRegistry()
@@ -0,0 +1,76 @@
+"""
+Recognizer Phrase Lists
+The custom phrases and Bible books that bias speech recognition, compiled once
+(deduplicated, in dictionary order) whenever the dictionary changes rather than
+rebuilt from the dictionary on every recognizer start and retry.
+
+Each recognizer remembers which version of the list it was given. Restarting a
+recognizer that is already current costs nothing, a recognizer that only
+missed additions gets just the new phrases (while it keeps recognizing), and
+only a removal clears and reloads its list, since the Speech SDK cannot take
+back a single phrase.
+"""
+
+import logging
+import threading
+import weakref
+
+from caption_metrics import METRICS
+
+
+class PhraseLists:
+    """The compiled phrase list and the version each recognizer has applied"""
+
+    def __init__(self, metrics=METRICS):
+        self._lock = threading.Lock()
+        self.version = 0
+        self._phrases = ()
+        self._members = frozenset()
+        self._applied = weakref.WeakKeyDictionary()
+        self.apply_time = metrics.histogram("phrase_list_apply_ms")
+        self.full_loads = metrics.counter("phrase_list_full_loads")
+        self.incremental = metrics.counter("phrase_list_incremental_updates")
+        self.unchanged = metrics.counter("phrase_list_unchanged")
+        metrics.gauge("phrase_list_size", lambda: len(self._phrases))
+
+    @property
+    def phrases(self):
+        return self._phrases
+
+    def update(self, phrases):
+        """Compile a new phrase list; returns the (added, removed) phrases"""
+        compiled = tuple(dict.fromkeys(phrase.strip() for phrase in phrases if phrase and phrase.strip()))
+        members = frozenset(compiled)
+        with self._lock:
+            added = [phrase for phrase in compiled if phrase not in self._members]
+            removed = [phrase for phrase in self._phrases if phrase not in members]
+            if added or removed:
+                self._phrases, self._members = compiled, members
+                self.version += 1
+        if added or removed:
+            logging.info(f"[SpeechCaption] Phrase list version {self.version}: {len(compiled)} phrases "
+                         f"({len(added)} added, {len(removed)} removed)")
+        return added, removed
+
+    def current(self, recognizer):
+        with self._lock:
+            applied = self._applied.get(recognizer)
+            return applied is not None and applied[0] == self.version
+
+    def apply(self, recognizer):
+        """Bring one recognizer's phrase list up to date (call on the recognizer control thread)"""
+        with self._lock:
+            version, phrases, members = self.version, self._phrases, self._members
+            applied = self._applied.get(recognizer)
+        if applied is not None and applied[0] == version:
+            self.unchanged.inc()
+            return
+        with self.apply_time.time():
+            if applied is not None and applied[1] <= members:
+                recognizer.add_phrases([phrase for phrase in phrases if phrase not in applied[1]])
+                self.incremental.inc()
+            else:
+                recognizer.set_phrases(phrases)
+                self.full_loads.inc()
+        with self._lock:
+            self._applied[recognizer] = (version, members)
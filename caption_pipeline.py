@@ -0,0 +1,173 @@
+"""
+Caption Pipeline
+The path from a recognizer event to queued WebSocket frames as explicit stages
+(correct, layout, encode, fan-out), each a single consumer task on the event
+loop with a bounded queue in front of it. Updates arrive already ordered and
+stamped by the caption writer (the ingest stage) and stay in that order.
+
+When a queue is full, the oldest undelivered interim update with the same key
+is dropped in favour of the new one; finals are never dropped. Every stage
+records its queue depth, queue wait and processing time, so /metrics shows
+which stage is eating the latency budget.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+
+from caption_metrics import METRICS
+
+DEFAULT_STAGE_QUEUE = 64
+
+
+class CaptionUpdate:
+    """One unit of work moving through the pipeline; stages fill in streams and deliveries"""
+
+    __slots__ = ("kind", "data", "final", "created_at", "stamp", "queued_at", "streams", "deliveries")
+
+    def __init__(self, kind, data=None, final=True, created_at=None):
+        self.kind = kind
+        self.data = data if data is not None else {}
+        self.final = final
+        # perf_counter() when the recognizer event was received, for end-to-end latency
+        self.created_at = created_at if created_at is not None else time.perf_counter()
+        self.stamp = None
+        self.queued_at = None
+        self.streams = []
+        self.deliveries = []
+
+    @property
+    def key(self):
+        """Updates with the same key supersede each other while interim"""
+        return (self.kind, tuple(sorted(self.data)))
+
+
+class StageQueue:
+    """Bounded FIFO in front of one stage; only touched from the event loop thread"""
+
+    def __init__(self, maxsize, dropped):
+        self.maxsize = maxsize
+        self.dropped = dropped
+        self._items = deque()
+        self._ready = asyncio.Event()
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, item):
+        if len(self._items) >= self.maxsize and not item.final:
+            key = item.key
+            for queued in self._items:
+                if not queued.final and queued.key == key:
+                    self._items.remove(queued)
+                    self.dropped.inc()
+                    break
+        item.queued_at = time.perf_counter()
+        self._items.append(item)
+        self._ready.set()
+
+    async def get(self):
+        while not self._items:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._items.popleft()
+
+    def drain(self):
+        items = list(self._items)
+        self._items.clear()
+        return items
+
+
+class _Stage:
+    __slots__ = ("name", "handler", "queue", "wait", "process", "errors")
+
+    def __init__(self, name, handler, maxsize, metrics):
+        self.name = name
+        self.handler = handler
+        self.queue = None
+        self.wait = metrics.histogram(f"pipeline_{name}_wait_ms")
+        self.process = metrics.histogram(f"pipeline_{name}_ms")
+        self.errors = metrics.counter(f"pipeline_{name}_errors")
+
+
+class CaptionPipeline:
+    """
+    Stages given as (name, handler) pairs. handler(update) returns the update for the
+    next stage, or None when there is nothing further to do. Before bind() (and after
+    unbind()) updates run through every stage inline in the caller's thread.
+    """
+
+    def __init__(self, stages, maxsize=DEFAULT_STAGE_QUEUE, metrics=METRICS):
+        self.maxsize = maxsize
+        self._metrics = metrics
+        self._stages = [_Stage(name, handler, maxsize, metrics) for name, handler in stages]
+        self._tasks = []
+        self.total = metrics.histogram("pipeline_total_ms")
+        for stage in self._stages:
+            metrics.gauge(f"pipeline_{stage.name}_depth", lambda stage=stage: len(stage.queue) if stage.queue else 0)
+
+    @property
+    def running(self):
+        return bool(self._tasks)
+
+    def bind(self, loop):
+        """Start one consumer task per stage (call from inside the running loop)"""
+        for stage in self._stages:
+            stage.queue = StageQueue(self.maxsize, self._metrics.counter(f"pipeline_{stage.name}_dropped"))
+        self._tasks = [loop.create_task(self._worker(index)) for index in range(len(self._stages))]
+        logging.info(f"[SpeechCaption] Caption pipeline running: {' -> '.join(stage.name for stage in self._stages)}")
+
+    def unbind(self):
+        """Stop the stage tasks and finish anything still queued inline"""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        for index, stage in enumerate(self._stages):
+            if stage.queue is None:
+                continue
+            for update in stage.queue.drain():
+                self._run_inline(update, index)
+            stage.queue = None
+
+    def feed(self, update):
+        """Hand an update to the first stage; must be called on the loop thread while running"""
+        if not self._tasks:
+            self._run_inline(update, 0)
+            return
+        self._stages[0].queue.put(update)
+
+    def _handle(self, stage, update):
+        start = time.perf_counter()
+        try:
+            return stage.handler(update)
+        except Exception as e:
+            stage.errors.inc()
+            logging.error(f"[SpeechCaption] Caption pipeline stage {stage.name} failed: {e}")
+            return None
+        finally:
+            stage.process.observe(time.perf_counter() - start)
+
+    def _run_inline(self, update, index):
+        for stage in self._stages[index:]:
+            update = self._handle(stage, update)
+            if update is None:
+                return
+        self.total.observe(time.perf_counter() - update.created_at)
+
+    async def _worker(self, index):
+        stage = self._stages[index]
+        following = self._stages[index + 1] if index + 1 < len(self._stages) else None
+        try:
+            while True:
+                update = await stage.queue.get()
+                stage.wait.observe(time.perf_counter() - update.queued_at)
+                update = self._handle(stage, update)
+                if update is None:
+                    continue
+                if following is None:
+                    self.total.observe(time.perf_counter() - update.created_at)
+                else:
+                    following.queue.put(update)
+        except asyncio.CancelledError:
+            pass
@@ -0,0 +1,225 @@
+"""
+Caption Stream Protocol
+Sequence-numbered caption streams with an opt-in delta encoding.
+
+Every caption stream ("production", "user:<lang>", "profile:<name>") publishes the full text of
+its latest frame. Each changed frame gets a process-wide monotonic sequence
+number; unchanged frames are suppressed. Protocol 2 clients acknowledge the
+last frame they applied and receive only the changed suffix relative to that
+frame, plus a full keyframe periodically or whenever their base is unknown.
+
+Protocol 2 messages (server -> client):
+    {"type": "caption_key",   "stream": s, "seq": n, "ts": t, "text": full, "final": f}
+    {"type": "caption_delta", "stream": s, "seq": n, "ts": t, "base": b, "drop": d, "keep": k, "append": tail, "final": f}
+        text = text_of(b).slice(d, d + k) + tail   (d and k in UTF-16 code units, as in JavaScript)
+    "drop" is omitted when 0 and "final" when false. "ts" is the server time (epoch
+    milliseconds) the caption was dispatched, omitted for frames sent on subscribe. Dropping whole leading lines lets
+    the scrolling user-view history shift without resending every line.
+    The text of a "profile:<name>" stream is the profile's laid-out lines joined by "\n".
+
+Protocol 2 messages (client -> server):
+    {"type": "hello", "protocol": 2, "language": l, "profile": p, "last_seq": n}   (language, profile, last_seq optional)
+    {"type": "ack", "stream": s, "seq": n}
+    {"type": "resync", "stream": s}
+
+Recently published frames are also kept in one fixed-size ring buffer shared by
+all clients, so a reconnecting client that reports its last seq can be caught
+up from memory without any per-client history.
+"""
+
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+
+LEGACY_PROTOCOL = 1
+DELTA_PROTOCOL = 2
+
+DEFAULT_KEYFRAME_INTERVAL = 50
+DEFAULT_RECENT_FRAMES = 64
+DEFAULT_RING_SIZE = 512
+
+
+def utf16_length(text):
+    """Length of text in UTF-16 code units (JavaScript string length)"""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def common_prefix_length(a, b):
+    limit = min(len(a), len(b))
+    i = 0
+    while i < limit and a[i] == b[i]:
+        i += 1
+    return i
+
+
+class StreamFrame:
+    # legacy_text and key_text cache the encoded protocol 1 / keyframe forms for all clients
+    __slots__ = ("stream", "seq", "text", "final", "keyframe", "ts", "legacy_text", "key_text")
+
+    def __init__(self, stream, seq, text, final, keyframe, ts=None):
+        self.stream = stream
+        self.seq = seq
+        self.text = text
+        self.final = final
+        self.keyframe = keyframe
+        self.ts = ts
+        self.legacy_text = None
+        self.key_text = None
+
+
+class CaptionRingBuffer:
+    """Fixed-capacity buffer of the most recent frames across all streams, in seq order"""
+
+    def __init__(self, capacity=DEFAULT_RING_SIZE):
+        self._frames = deque(maxlen=capacity)
+
+    def append(self, frame):
+        self._frames.append(frame)
+
+    def since(self, stream, last_seq):
+        """
+        Frames of stream newer than last_seq, oldest first, or None when the
+        buffer no longer reaches back to last_seq (caller should send a snapshot)
+        """
+        if self._frames and self._frames[0].seq > last_seq + 1:
+            return None
+        missed = []
+        for frame in reversed(self._frames):
+            if frame.seq <= last_seq:
+                break
+            if frame.stream == stream:
+                missed.append(frame)
+        missed.reverse()
+        return missed
+
+
+class _StreamState:
+    __slots__ = ("recent", "since_keyframe", "last")
+
+    def __init__(self):
+        self.recent = OrderedDict()
+        self.since_keyframe = 0
+        self.last = None
+
+
+class CaptionStreams:
+    """
+    Per-stream latest text and recent frame texts, keyed by global sequence number.
+    encode serializes a payload dict; legacy_payload builds the protocol 1 payload of a frame.
+    """
+
+    def __init__(self, encode, legacy_payload, keyframe_interval=DEFAULT_KEYFRAME_INTERVAL,
+                 recent_frames=DEFAULT_RECENT_FRAMES, ring_size=DEFAULT_RING_SIZE):
+        self.encode = encode
+        self.legacy_payload = legacy_payload
+        self.keyframe_interval = keyframe_interval
+        self.recent_frames = recent_frames
+        self.ring = CaptionRingBuffer(ring_size)
+        self._lock = threading.Lock()
+        # Seeded from the wall clock so numbers keep increasing across server restarts
+        # and a reconnecting page never mistakes new frames for stale ones
+        self._seq = itertools.count(int(time.time() * 1000))
+        self._streams = {}
+
+    def publish(self, stream, text, final=False, ts=None):
+        """
+        Record a new frame; returns a StreamFrame, or None when text is unchanged.
+        ts is the server dispatch time in seconds, sent to clients in milliseconds.
+        """
+        with self._lock:
+            state = self._streams.get(stream)
+            if state is None:
+                state = self._streams[stream] = _StreamState()
+            last = state.last
+            if last is not None and last.text == text and (last.final or not final):
+                return None
+            seq = next(self._seq)
+            keyframe = last is None or state.since_keyframe >= self.keyframe_interval
+            state.since_keyframe = 0 if keyframe else state.since_keyframe + 1
+            frame = StreamFrame(stream, seq, text, final, keyframe, None if ts is None else int(ts * 1000))
+            state.recent[seq] = text
+            while len(state.recent) > self.recent_frames:
+                state.recent.popitem(last=False)
+            state.last = frame
+            self.ring.append(frame)
+            return frame
+
+    def latest(self, stream):
+        with self._lock:
+            state = self._streams.get(stream)
+            return state.last if state else None
+
+    def has_frame(self, stream, seq):
+        with self._lock:
+            state = self._streams.get(stream)
+            return state is not None and seq in state.recent
+
+    def missed_frames(self, stream, last_seq):
+        """Frames a client that last saw last_seq should get: missed finals plus the latest, or None"""
+        with self._lock:
+            missed = self.ring.since(stream, last_seq)
+        if not missed:
+            return missed
+        # Interims superseded by a later frame are not worth replaying
+        return [frame for frame in missed[:-1] if frame.final] + [missed[-1]]
+
+    def reset(self, stream=None):
+        with self._lock:
+            if stream is None:
+                self._streams.clear()
+            else:
+                self._streams.pop(stream, None)
+
+    def keyframe_payload(self, frame):
+        payload = {"type": "caption_key", "stream": frame.stream, "seq": frame.seq, "text": frame.text}
+        if frame.ts is not None:
+            payload["ts"] = frame.ts
+        if frame.final:
+            payload["final"] = True
+        return payload
+
+    def legacy_text(self, frame):
+        if frame.legacy_text is None:
+            frame.legacy_text = self.encode(self.legacy_payload(frame))
+        return frame.legacy_text
+
+    def keyframe_text(self, frame):
+        if frame.key_text is None:
+            frame.key_text = self.encode(self.keyframe_payload(frame))
+        return frame.key_text
+
+    def delta_text(self, frame, base_seq):
+        """Encoded delta (or shared keyframe) for a client whose acknowledged base is base_seq"""
+        payload = self.delta_payload(frame, base_seq)
+        if payload["type"] == "caption_key":
+            return self.keyframe_text(frame)
+        return self.encode(payload)
+
+    def delta_payload(self, frame, base_seq):
+        """Delta against base_seq, or a keyframe when the base is unknown or a keyframe is due"""
+        if frame.keyframe or base_seq is None:
+            return self.keyframe_payload(frame)
+        with self._lock:
+            state = self._streams.get(frame.stream)
+            base_text = state.recent.get(base_seq) if state else None
+        if base_text is None:
+            return self.keyframe_payload(frame)
+        drop, keep = 0, common_prefix_length(base_text, frame.text)
+        # Also try the base with whole leading lines scrolled off
+        newline = base_text.find("\n")
+        while newline != -1 and keep < len(frame.text):
+            candidate = common_prefix_length(base_text[newline + 1:], frame.text)
+            if candidate > keep:
+                drop, keep = newline + 1, candidate
+            newline = base_text.find("\n", newline + 1)
+        payload = {"type": "caption_delta", "stream": frame.stream, "seq": frame.seq, "base": base_seq}
+        if frame.ts is not None:
+            payload["ts"] = frame.ts
+        if drop:
+            payload["drop"] = utf16_length(base_text[:drop])
+        payload["keep"] = utf16_length(frame.text[:keep])
+        payload["append"] = frame.text[keep:]
+        if frame.final:
+            payload["final"] = True
+        return payload
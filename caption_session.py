@@ -0,0 +1,183 @@
+"""
+Caption Session
+The production and user-view caption state of one running service, which both
+recognizer callback threads, the caption scheduler and the API handlers touch.
+
+Every change goes through a CaptionSession method that holds the session lock
+for a few assignments, so writers are serialized and each update is applied as
+a whole. Readers get immutable values: history entries are tuples, snapshots are
+named tuples, and nothing handed out is ever mutated afterwards, so a reader
+never needs the lock once it has its copy.
+"""
+
+import threading
+import time
+from collections import deque, namedtuple
+from types import MappingProxyType
+
+ProductionState = namedtuple("ProductionState", "caption display_text history last_event")
+UserViewState = namedtuple("UserViewState", "history interim")
+SessionSnapshot = namedtuple("SessionSnapshot", "version production user transcript last_caption")
+
+
+class CaptionSession:
+    """Caption state with serialized updates and lock-free snapshots for readers"""
+
+    __slots__ = (
+        "_lock", "version", "max_transcript_lines",
+        "production_caption", "production_display_text", "production_history", "production_last_event",
+        "last_caption", "_transcript", "_user_history", "_user_interim", "_user_speech_start", "_snapshot"
+    )
+
+    def __init__(self, languages=(), max_transcript_lines=1000):
+        self._lock = threading.Lock()
+        self.version = 0
+        self.max_transcript_lines = max_transcript_lines
+        self.production_caption = ""
+        self.production_display_text = ""  # Full current utterance, laid out per display profile
+        self.production_history = ""  # Accumulated finalized production text
+        self.production_last_event = time.monotonic()  # For pause detection between utterances
+        self.last_caption = ""
+        self._transcript = deque(maxlen=max_transcript_lines)
+        self._user_history = {}
+        self._user_interim = {}
+        self._user_speech_start = {}
+        self._snapshot = None
+        self.add_languages(languages)
+
+    def _changed(self):
+        # Called with the lock held
+        self.version += 1
+        self._snapshot = None
+
+    # Languages
+    def add_languages(self, languages):
+        with self._lock:
+            for language in languages:
+                self._user_history.setdefault(language, ())
+                self._user_interim.setdefault(language, "")
+            self._changed()
+
+    def has_language(self, language):
+        return language in self._user_history
+
+    def languages(self):
+        with self._lock:
+            return tuple(self._user_history)
+
+    # Production view
+    def update_production(self, caption, display_text, final_text=None):
+        """New production text; final_text (a finalized utterance) also goes to the transcript"""
+        with self._lock:
+            self.production_last_event = time.monotonic()
+            self.production_caption = caption
+            self.production_display_text = display_text
+            self.last_caption = caption
+            if final_text is not None:
+                self._transcript.append(final_text)
+                if self.production_history:
+                    self.production_history += " " + final_text
+                else:
+                    self.production_history = final_text
+            self._changed()
+            return ProductionState(caption, display_text, self.production_history, self.production_last_event)
+
+    def clear_production_after(self, last_event):
+        """
+        Blank the production display, but only if no speech event arrived since last_event
+        and there is something to clear; returns True when it was cleared
+        """
+        with self._lock:
+            if self.production_last_event != last_event or not self.production_caption.strip():
+                return False
+            self.production_caption = ""
+            self.production_display_text = ""
+            self.last_caption = ""
+            self._changed()
+            return True
+
+    def reset_production_history(self):
+        with self._lock:
+            self.production_history = ""
+            self._changed()
+
+    # User view
+    def user_final(self, language, text, max_lines):
+        """A finalized caption for language: appended to its history unless it repeats the last one"""
+        with self._lock:
+            history = self._user_history.get(language)
+            if history is None:
+                return
+            if not history or text != history[-1]:
+                self._user_history[language] = (history + (text,))[-max_lines:]
+            self._user_interim[language] = ""
+            self._changed()
+
+    def user_interim(self, language, text):
+        """Latest interim text for language; returns True when it starts a new utterance"""
+        with self._lock:
+            if language not in self._user_history:
+                return False
+            self._user_interim[language] = text
+            started = language not in self._user_speech_start
+            if started:
+                self._user_speech_start[language] = time.time()
+            self._changed()
+            return started
+
+    def finalize_user_interims(self, max_lines):
+        """Move every language's pending interim text into its history; returns the languages finalized"""
+        finalized = []
+        with self._lock:
+            for language, interim in self._user_interim.items():
+                if not interim or interim.strip() == "":
+                    continue
+                history = self._user_history[language]
+                if not history or interim != history[-1]:
+                    self._user_history[language] = (history + (interim,))[-max_lines:]
+                self._user_interim[language] = ""
+                self._user_speech_start.pop(language, None)
+                finalized.append(language)
+            if finalized:
+                self._changed()
+        return finalized
+
+    def user_view(self, language):
+        with self._lock:
+            return UserViewState(self._user_history.get(language, ()), self._user_interim.get(language, ""))
+
+    # Whole session
+    def clear(self):
+        """Clear both views and the transcript, keeping the known languages"""
+        with self._lock:
+            self.production_caption = ""
+            self.production_display_text = ""
+            self.production_history = ""
+            self.last_caption = ""
+            self._transcript.clear()
+            self._user_history = dict.fromkeys(self._user_history, ())
+            self._user_interim = dict.fromkeys(self._user_interim, "")
+            self._user_speech_start.clear()
+            self._changed()
+
+    def transcript(self):
+        with self._lock:
+            return tuple(self._transcript)
+
+    def snapshot(self):
+        """Immutable view of the whole session, rebuilt only after a change"""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = SessionSnapshot(
+                    self.version,
+                    ProductionState(self.production_caption, self.production_display_text,
+                                    self.production_history, self.production_last_event),
+                    MappingProxyType({language: UserViewState(history, self._user_interim.get(language, ""))
+                                      for language, history in self._user_history.items()}),
+                    tuple(self._transcript),
+                    self.last_caption
+                )
+            return self._snapshot
@@ -0,0 +1,120 @@
+"""
+Translation Targets
+The translation recognizer translates only into the languages user views are
+watching, instead of into every supported language all the time. Fewer targets
+mean smaller recognizer events, less work per event and lower translation
+latency.
+
+A language becomes a target as soon as a user view subscribes to it. It is
+dropped only after nobody has watched it for linger_seconds, so a viewer
+reloading the page or switching languages back and forth does not make the
+target set flap. Pinned languages are always translated; with dynamic off every
+language is pinned, as before. The Speech SDK needs at least one target, so the
+last one is kept until another language replaces it.
+"""
+
+import logging
+import threading
+from functools import partial
+
+from caption_metrics import METRICS
+
+DEFAULT_LINGER_SECONDS = 120.0
+
+
+class TranslationTargets:
+    """
+    Target languages (dictionary codes) following the user views' viewer counts.
+    apply(targets) installs a new target set, a sorted tuple; it is called from the
+    event loop or the scheduler thread, so it must hand the SDK work off.
+    """
+
+    def __init__(self, languages, scheduler, apply, linger_seconds=DEFAULT_LINGER_SECONDS,
+                 pinned=(), dynamic=True, metrics=METRICS):
+        self._scheduler = scheduler
+        self._apply = apply
+        self.linger_seconds = linger_seconds
+        self.dynamic = dynamic
+        self._lock = threading.Lock()
+        self._languages = list(languages)
+        self._pinned = set(pinned) & set(self._languages) if dynamic else set(self._languages)
+        self._viewers = {}
+        self._targets = set(self._pinned) or set(self._languages[:1])
+        self.added = metrics.counter("translation_targets_added")
+        self.removed = metrics.counter("translation_targets_removed")
+        metrics.gauge("translation_targets", lambda: len(self._targets))
+
+    @property
+    def targets(self):
+        with self._lock:
+            return tuple(sorted(self._targets))
+
+    def status(self):
+        with self._lock:
+            return {
+                "targets": sorted(self._targets),
+                "pinned": sorted(self._pinned),
+                "viewers": {language: count for language, count in sorted(self._viewers.items()) if count},
+                "leaving": sorted(language for language in self._targets if self._scheduler.pending(self._key(language)))
+            }
+
+    def set_languages(self, languages):
+        """The supported languages changed (dictionary edit): drop targets that went away"""
+        with self._lock:
+            self._languages = list(languages)
+            supported = set(self._languages)
+            self._pinned = self._pinned & supported if self.dynamic else supported
+            targets = (self._targets & supported) | self._pinned or set(self._languages[:1])
+            if targets == self._targets:
+                return
+            self._targets = targets
+            self._linger_unwatched()
+            targets = tuple(sorted(targets))
+        logging.info(f"[SpeechCaption] Supported languages changed (targets: {', '.join(targets)})")
+        self._apply(targets)
+
+    def viewers_changed(self, language, count):
+        """A user view channel now has count viewers (call on the event loop)"""
+        with self._lock:
+            if language not in self._languages:
+                return
+            self._viewers[language] = count
+            if count > 0:
+                self._scheduler.cancel(self._key(language))
+                if language in self._targets:
+                    return
+                self._targets.add(language)
+                # A target kept only because the SDK needs one can start lingering now
+                self._linger_unwatched()
+                targets = tuple(sorted(self._targets))
+            else:
+                self._linger_unwatched()
+                return
+        self.added.inc()
+        logging.info(f"[SpeechCaption] Translating into {language} (targets: {', '.join(targets)})")
+        self._apply(targets)
+
+    @staticmethod
+    def _key(language):
+        return f"translation_target:{language}"
+
+    def _linger_unwatched(self):
+        for language in self._targets:
+            if language in self._pinned or self._viewers.get(language, 0) > 0:
+                continue
+            # reschedule=False: a language already lingering keeps its original deadline
+            self._scheduler.schedule(self._key(language), self.linger_seconds,
+                                     partial(self._expire, language), reschedule=False)
+
+    def _expire(self, language):
+        # Runs on the scheduler thread once nobody has watched language for linger_seconds
+        with self._lock:
+            if language not in self._targets or language in self._pinned or self._viewers.get(language, 0) > 0:
+                return
+            if len(self._targets) == 1:
+                return
+            self._targets.discard(language)
+            targets = tuple(sorted(self._targets))
+        self.removed.inc()
+        logging.info(f"[SpeechCaption] No longer translating into {language} (targets: {', '.join(targets)})")
+        self._apply(targets)
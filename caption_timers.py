@@ -0,0 +1,181 @@
+"""
+Caption Timers
+One scheduler thread for every caption deadline (user-view auto-finalize,
+debounce, production pause-clear) instead of a threading.Timer, and so a new
+OS thread, per recognizer event.
+
+Deadlines are keyed: scheduling a key that is already pending moves its
+deadline, and cancelling only marks it. Postponing a deadline (the common case,
+since every interim result pushes auto-finalize back) touches no heap at all;
+the old heap entry is re-queued at the new deadline when it comes due.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+from caption_metrics import METRICS
+
+
+class _Deadline:
+    __slots__ = ("key", "due", "callback", "queued_due", "entry", "active")
+
+    def __init__(self, key):
+        self.key = key
+        self.due = 0.0
+        self.callback = None
+        self.queued_due = None
+        self.entry = None
+        self.active = False
+
+
+class CaptionScheduler:
+    """Keyed deadlines run on one daemon thread; callbacks must be quick or hand work off"""
+
+    def __init__(self, name="caption-timers", metrics=METRICS):
+        self.name = name
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._heap = []
+        self._deadlines = {}
+        self._entries = itertools.count()
+        self._thread = None
+        self._running = False
+        self.scheduled = metrics.counter("timers_scheduled")
+        self.rescheduled = metrics.counter("timers_rescheduled")
+        self.cancelled = metrics.counter("timers_cancelled")
+        self.fired = metrics.counter("timers_fired")
+        self.allocated = metrics.counter("timers_allocated")
+        self.threads_started = metrics.counter("timers_threads_started")
+        # How late each callback started relative to its deadline
+        self.drift = metrics.histogram("timers_fire_drift_ms")
+        metrics.gauge("timers_pending", self.pending_count)
+        metrics.gauge("threads_active", threading.active_count)
+
+    def start(self):
+        with self._lock:
+            self._start_locked()
+
+    def _start_locked(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        self.threads_started.inc()
+
+    def stop(self, timeout=1.0):
+        with self._lock:
+            self._running = False
+            self._wakeup.notify()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def schedule(self, key, delay, callback, reschedule=True):
+        """
+        Run callback after delay seconds. A pending key is moved to the new deadline, or
+        left alone when reschedule is False (a debounce that fires once per burst).
+        Returns True when the deadline was set or moved.
+        """
+        due = time.monotonic() + delay
+        with self._lock:
+            deadline = self._deadlines.get(key)
+            if deadline is None:
+                deadline = self._deadlines[key] = _Deadline(key)
+                self.allocated.inc()
+            if deadline.active:
+                if not reschedule:
+                    return False
+                self.rescheduled.inc()
+            else:
+                self.scheduled.inc()
+            deadline.due = due
+            deadline.callback = callback
+            deadline.active = True
+            if deadline.queued_due is None or due < deadline.queued_due:
+                self._push(deadline)
+            self._start_locked()
+        return True
+
+    def cancel(self, key):
+        """Drop a pending deadline; returns False when nothing was pending"""
+        with self._lock:
+            deadline = self._deadlines.get(key)
+            if deadline is None or not deadline.active:
+                return False
+            deadline.active = False
+            deadline.callback = None
+        self.cancelled.inc()
+        return True
+
+    def pending(self, key):
+        with self._lock:
+            deadline = self._deadlines.get(key)
+            return deadline is not None and deadline.active
+
+    def due_in(self, key):
+        """Seconds until key fires, or None when it is not pending"""
+        with self._lock:
+            deadline = self._deadlines.get(key)
+            if deadline is None or not deadline.active:
+                return None
+            return max(0.0, deadline.due - time.monotonic())
+
+    def pending_count(self):
+        with self._lock:
+            return sum(1 for deadline in self._deadlines.values() if deadline.active)
+
+    def _push(self, deadline):
+        # Called with the lock held; any earlier entry for this deadline becomes stale
+        deadline.entry = next(self._entries)
+        deadline.queued_due = deadline.due
+        heapq.heappush(self._heap, (deadline.due, deadline.entry, deadline))
+        if self._heap[0][2] is deadline:
+            self._wakeup.notify()
+
+    def _next_due(self):
+        # Called with the lock held: pops stale and postponed entries, returns the firing deadline or a wait
+        heap = self._heap
+        while heap:
+            due, entry, deadline = heap[0]
+            if entry != deadline.entry:
+                heapq.heappop(heap)
+                continue
+            if not deadline.active:
+                heapq.heappop(heap)
+                deadline.queued_due = None
+                continue
+            if deadline.due > due:
+                # Postponed since it was queued: re-queue at the current deadline
+                heapq.heappop(heap)
+                self._push(deadline)
+                continue
+            wait = due - time.monotonic()
+            if wait > 0:
+                return None, wait
+            heapq.heappop(heap)
+            deadline.queued_due = None
+            deadline.active = False
+            callback, deadline.callback = deadline.callback, None
+            return (deadline.key, due, callback), 0.0
+        return None, None
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._running:
+                    return
+                ready, wait = self._next_due()
+                if ready is None:
+                    self._wakeup.wait(wait)
+                    continue
+            key, due, callback = ready
+            self.drift.observe(max(0.0, time.monotonic() - due))
+            self.fired.inc()
+            try:
+                callback()
+            except Exception as e:
+                logging.error(f"[SpeechCaption] Caption timer {key!r} failed: {e}")
@@ -0,0 +1,213 @@
+"""
+Recognition Watchdog
+Detects a recognizer that is "running" but has gone quiet, from inside the
+process and within seconds.
+
+Every recognizer event pushes back that recognizer's stall deadline on the
+caption scheduler, so nothing polls while captions flow. When a deadline fires,
+the watchdog checks the audio meter: if there was sound during the quiet period,
+the recognizer has stalled and is restarted; if the room was silent, the
+deadline is simply armed again. A session-stopped event from the SDK while
+recognition should be running is a restart on its own. Every restart is
+recorded with its cause.
+"""
+
+import logging
+import math
+import time
+from collections import deque, namedtuple
+from functools import partial
+
+from caption_metrics import METRICS
+
+# Restart causes
+STALLED = "stalled"                  # no events for stall_seconds while audio was present
+SESSION_STOPPED = "session_stopped"  # the SDK session ended while recognition should be running
+NOT_RECOGNIZING = "not_recognizing"  # recognition should be running but is not (e.g. after an error)
+CANCELED = "canceled"                # the SDK canceled the recognizer with an error
+
+RestartRecord = namedtuple("RestartRecord", "at role cause detail")
+
+
+class AudioLevelMeter:
+    """RMS level of the default input device in dBFS, from its own sounddevice input stream"""
+
+    def __init__(self, threshold_dbfs=-45.0, samplerate=16000, block_seconds=0.1, metrics=METRICS):
+        self.threshold_dbfs = threshold_dbfs
+        self.samplerate = samplerate
+        self.block_seconds = block_seconds
+        self.level_dbfs = None
+        self.last_loud = None
+        self._stream = None
+        metrics.gauge("audio_level_dbfs", lambda: None if self.level_dbfs is None else round(self.level_dbfs, 1))
+
+    @property
+    def available(self):
+        return self._stream is not None
+
+    def start(self, device=None):
+        """Open the input stream; returns False (and the watchdog works without audio) when that fails"""
+        try:
+            import sounddevice as sd
+            self._stream = sd.InputStream(device=device, channels=1, samplerate=self.samplerate,
+                                          blocksize=int(self.samplerate * self.block_seconds), callback=self._on_block)
+            self._stream.start()
+        except Exception as e:
+            self._stream = None
+            logging.warning(f"[SpeechCaption] Audio level meter unavailable: {e}")
+            return False
+        logging.info(f"[SpeechCaption] Audio level meter running (speech above {self.threshold_dbfs} dBFS)")
+        return True
+
+    def stop(self):
+        stream, self._stream = self._stream, None
+        if stream is not None:
+            stream.stop()
+            stream.close()
+
+    def _on_block(self, indata, frames, time_info, status):
+        mean_square = float((indata.astype("float64") ** 2).mean()) if frames else 0.0
+        self.observe(10 * math.log10(mean_square) if mean_square > 0 else -120.0)
+
+    def observe(self, level_dbfs):
+        self.level_dbfs = level_dbfs
+        if level_dbfs >= self.threshold_dbfs:
+            self.last_loud = time.monotonic()
+
+    def audio_present(self, within):
+        """True when the level crossed the threshold in the last `within` seconds"""
+        return self.last_loud is not None and time.monotonic() - self.last_loud <= within
+
+
+class RecognitionWatchdog:
+    """
+    Stall deadlines per recognizer role on scheduler (a CaptionScheduler), armed only while
+    recognition should be running. restart(recognizer, cause, detail) performs a restart;
+    is_running() says whether recognition is actually up.
+    """
+
+    def __init__(self, scheduler, restart, is_running, meter=None, stall_seconds=8.0,
+                 silent_stall_seconds=120.0, history=50, metrics=METRICS):
+        self._scheduler = scheduler
+        self._restart = restart
+        self._is_running = is_running
+        self.meter = meter
+        self.stall_seconds = stall_seconds
+        # Without an audio meter silence and a stall look alike, so wait much longer
+        self.silent_stall_seconds = silent_stall_seconds
+        self._metrics = metrics
+        self._armed = {}
+        self._checks = {}
+        self.last_event = {}
+        self.session_started_at = {}
+        self.restarts = deque(maxlen=history)
+        self.restart_count = metrics.counter("watchdog_restarts")
+        self.idle = metrics.histogram("watchdog_idle_at_restart_ms")
+
+    def watch(self, recognizer):
+        """Connect to a recognizer's events (once, when it is created)"""
+        activity = partial(self._on_activity, recognizer)
+        recognizer.recognizing.connect(activity)
+        recognizer.recognized.connect(activity)
+        recognizer.session_started.connect(partial(self._on_session_started, recognizer))
+        recognizer.session_stopped.connect(partial(self._on_session_stopped, recognizer))
+        self._checks[id(recognizer)] = partial(self._check, recognizer)
+
+    def arm(self, recognizers):
+        """Start watching the running recognizers (replacing any watched before)"""
+        self.disarm()
+        now = time.monotonic()
+        for recognizer in recognizers:
+            if recognizer is None:
+                continue
+            self._armed[recognizer.role] = recognizer
+            self.last_event[recognizer.role] = now
+            self._schedule(recognizer, self._stall_after())
+
+    def disarm(self, recognizer=None):
+        roles = list(self._armed) if recognizer is None else [recognizer.role]
+        for role in roles:
+            if recognizer is None or self._armed.get(role) is recognizer:
+                self._armed.pop(role, None)
+                self._scheduler.cancel(self._key(role))
+
+    def armed(self, recognizer):
+        return self._armed.get(recognizer.role) is recognizer
+
+    def record(self, role, cause, detail=""):
+        """Note a restart (including ones not started by the watchdog, such as a failover)"""
+        self.restarts.append(RestartRecord(time.time(), role, cause, detail))
+        self.restart_count.inc()
+        self._metrics.counter(f"watchdog_restarts_{cause}").inc()
+        logging.warning(f"[SpeechCaption] Restarting {role} recognizer ({cause}): {detail}")
+
+    def seconds_since_event(self):
+        """Seconds since the most recent event of any armed recognizer, or None when none is armed"""
+        times = [self.last_event[role] for role in self._armed if role in self.last_event]
+        return round(time.monotonic() - max(times), 1) if times else None
+
+    def status(self):
+        now = time.monotonic()
+        return {
+            "armed": sorted(self._armed),
+            "seconds_since_event": {role: round(now - at, 1) for role, at in self.last_event.items()},
+            "audio_level_dbfs": None if self.meter is None or self.meter.level_dbfs is None else round(self.meter.level_dbfs, 1),
+            "audio_meter": self.meter is not None and self.meter.available,
+            "restarts": [record._asdict() for record in self.restarts]
+        }
+
+    @staticmethod
+    def _key(role):
+        return f"watchdog:{role}"
+
+    def _stall_after(self):
+        return self.stall_seconds if self.meter is not None and self.meter.available else self.silent_stall_seconds
+
+    def _schedule(self, recognizer, delay):
+        check = self._checks.get(id(recognizer))
+        if check is None:
+            check = self._checks[id(recognizer)] = partial(self._check, recognizer)
+        self._scheduler.schedule(self._key(recognizer.role), delay, check)
+
+    def _on_activity(self, recognizer, evt):
+        self.last_event[recognizer.role] = time.monotonic()
+        if self.armed(recognizer):
+            # Pushing back a pending deadline is just an assignment in the scheduler
+            self._schedule(recognizer, self._stall_after())
+
+    def _on_session_started(self, recognizer, evt):
+        self.session_started_at[recognizer.role] = time.time()
+        self._on_activity(recognizer, evt)
+
+    def _on_session_stopped(self, recognizer, evt):
+        if self.armed(recognizer) and self._is_running():
+            self._trigger(recognizer, SESSION_STOPPED, "the speech service session stopped")
+
+    def _check(self, recognizer):
+        # Runs on the scheduler thread when a stall deadline fires
+        if not self.armed(recognizer):
+            return
+        idle = time.monotonic() - self.last_event.get(recognizer.role, 0.0)
+        if not self._is_running():
+            self._trigger(recognizer, NOT_RECOGNIZING, f"recognition should be running; no events for {idle:.1f}s")
+        elif self.meter is not None and self.meter.available:
+            if self.meter.audio_present(within=self.stall_seconds):
+                self._trigger(recognizer, STALLED, f"no events for {idle:.1f}s while audio was at {self.meter.level_dbfs:.0f} dBFS")
+            else:
+                # A silent room: nothing to recognize, keep watching
+                self._schedule(recognizer, self.stall_seconds)
+        elif idle >= self.silent_stall_seconds:
+            self._trigger(recognizer, STALLED, f"no events for {idle:.1f}s (no audio meter)")
+        else:
+            self._schedule(recognizer, self.silent_stall_seconds - idle)
+
+    def _trigger(self, recognizer, cause, detail):
+        self.idle.observe(time.monotonic() - self.last_event.get(recognizer.role, time.monotonic()))
+        self.record(recognizer.role, cause, detail)
+        # The restarted (or replacement) recognizer gets a fresh deadline when it is armed again
+        self.last_event[recognizer.role] = time.monotonic()
+        self._schedule(recognizer, self._stall_after())
+        try:
+            self._restart(recognizer, cause, detail)
+        except Exception as e:
+            logging.error(f"[SpeechCaption] Watchdog restart of {recognizer.role} recognizer failed: {e}")
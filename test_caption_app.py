@@ -0,0 +1,28 @@
+"""
+Smoke test: captionStable imports and serves with the stub recognizer backend,
+so no Azure key or network is needed. Run with python -m unittest.
+"""
+
+import os
+import unittest
+
+os.environ.setdefault("RECOGNIZER_BACKEND", "stub")
+
+from fastapi.testclient import TestClient
+
+import captionStable
+
+
+class TestAppStartup(unittest.TestCase):
+    def test_health(self):
+        # Entering the client runs the startup hook, which binds the caption pipeline
+        with TestClient(captionStable.app) as client:
+            self.assertTrue(captionStable.caption_pipeline.running)
+            response = client.get("/health")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "ok")
+        self.assertFalse(response.json()["is_recognizing"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+"""
+Unit tests for caption_control: StandbyRecognizers failover, including failovers
+that race with stopping recognition. Run with python -m unittest.
+"""
+
+import time
+import unittest
+
+from caption_control import FAILOVER_RETRY, ExponentialBackoff, RecognizerControl, StandbyRecognizers
+from caption_metrics import MetricsRegistry
+
+
+class FakeRecognizer:
+    def __init__(self, name, fail_start=False):
+        self.name = name
+        self.fail_start = fail_start
+        self.running = False
+
+    def start_async(self):
+        def wait():
+            if self.fail_start:
+                raise RuntimeError(f"{self.name} failed to start")
+            self.running = True
+        return wait
+
+    def stop(self):
+        self.running = False
+
+
+class ManualScheduler:
+    """CaptionScheduler's keyed API; deadlines fire only when the test calls fire()"""
+
+    def __init__(self):
+        self.deadlines = {}
+
+    def schedule(self, key, delay, callback, reschedule=True):
+        self.deadlines[key] = callback
+        return True
+
+    def cancel(self, key):
+        return self.deadlines.pop(key, None) is not None
+
+    def fire(self, key):
+        return self.deadlines.pop(key)()
+
+
+class TestStandbyFailover(unittest.TestCase):
+    def setUp(self):
+        metrics = MetricsRegistry()
+        self.control = RecognizerControl(timeout=5.0, metrics=metrics)
+        self.scheduler = ManualScheduler()
+        self.built = 0
+        self.fail_builds = False
+        self.should_run = True
+        self.active = (FakeRecognizer("active production"), FakeRecognizer("active translation"))
+        for recognizer in self.active:
+            recognizer.running = True
+        self.activated = []
+        self.standby = StandbyRecognizers(self.control, self.build, lambda recognizer: None, lambda: self.active,
+                                          self.activate, self.scheduler, should_run=lambda: self.should_run,
+                                          backoff=ExponentialBackoff(0.0, 0.0), metrics=metrics)
+
+    def tearDown(self):
+        self.control.shutdown()
+
+    def build(self):
+        self.built += 1
+        return (FakeRecognizer(f"production {self.built}", self.fail_builds),
+                FakeRecognizer(f"translation {self.built}", self.fail_builds))
+
+    def activate(self, pair):
+        self.active = pair
+        self.activated.append(pair)
+
+    def test_failover_swaps_in_standby(self):
+        self.standby.prepare().result(5)
+        ready = self.standby._standby
+        self.assertTrue(self.standby.fail_over(self.active[1], time.perf_counter()).result(5))
+        self.assertEqual(self.activated, [ready])
+        self.assertTrue(all(recognizer.running for recognizer in ready))
+        self.assertFalse(self.standby.in_progress)
+        # A fresh standby is built right after
+        self.assertTrue(self.standby.ready)
+
+    def test_failover_after_stop_does_nothing(self):
+        self.standby.prepare().result(5)
+        failed = self.active[1]
+        self.should_run = False
+        self.assertFalse(self.standby.fail_over(failed, time.perf_counter()).result(5))
+        self.assertEqual(self.activated, [])
+        self.assertTrue(self.standby.ready)
+        self.assertFalse(self.standby.in_progress)
+
+    def test_stop_cancels_waiting_retry(self):
+        self.fail_builds = True
+        self.assertFalse(self.standby.fail_over(self.active[1], time.perf_counter()).result(5))
+        self.assertIn(FAILOVER_RETRY, self.scheduler.deadlines)
+        self.assertTrue(self.standby.in_progress)
+        self.should_run = False
+        self.standby.cancel_retry()
+        self.assertNotIn(FAILOVER_RETRY, self.scheduler.deadlines)
+        self.assertFalse(self.standby.in_progress)
+        self.assertEqual(self.activated, [])
+
+    def test_retry_firing_after_stop_does_nothing(self):
+        self.fail_builds = True
+        self.standby.fail_over(self.active[1], time.perf_counter()).result(5)
+        self.fail_builds = False
+        self.should_run = False
+        self.scheduler.fire(FAILOVER_RETRY).result(5)
+        self.assertEqual(self.activated, [])
+        self.assertFalse(self.standby.in_progress)
+
+    def test_stop_while_new_pair_starts(self):
+        self.standby.prepare().result(5)
+        ready = self.standby._standby
+        starting = ready[0].start_async
+
+        def start_async():
+            # Recognition is stopped while the SDK handshake is under way
+            self.should_run = False
+            return starting()
+        ready[0].start_async = start_async
+        self.assertFalse(self.standby.fail_over(self.active[1], time.perf_counter()).result(5))
+        self.assertEqual(self.activated, [])
+        self.assertFalse(any(recognizer.running for recognizer in ready))
+        # The unused pair becomes the standby again
+        self.assertIs(self.standby._standby, ready)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+Unit tests for caption_corrections: the compiled engine, IncrementalCorrector and
+CorrectionRegistry. Run with python -m unittest.
+"""
+
+import unittest
+
+from caption_corrections import CorrectionEngine, CorrectionRegistry, IncrementalCorrector
+
+DICTIONARY = {
+    "spelling_corrections": {"pslam": "Psalm", "mathew": "Matthew", "dave bearing": "Dave Buehring"},
+    "bible_books": ["Genesis", "Song of Solomon", "1 Corinthians"],
+    "custom_phrases": ["North Way"]
+}
+
+
+class TestCorrectionEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = CorrectionEngine.from_dictionary(DICTIONARY)
+
+    def test_corrections(self):
+        self.assertEqual(self.engine.correct("pslam 23"), "Psalm 23")
+        self.assertEqual(self.engine.correct("turn to song of solomon, chapter 2"), "turn to Song of Solomon, chapter 2")
+        self.assertEqual(self.engine.correct("(mathew) and 1 corinthians."), "(Matthew) and 1 Corinthians.")
+        self.assertEqual(self.engine.correct("welcome to north way"), "welcome to North Way")
+        self.assertEqual(self.engine.correct("hello world"), "hello world")
+
+    def test_partial_multi_word_entry_is_untouched(self):
+        self.assertEqual(self.engine.correct("a song of praise"), "a song of praise")
+
+    def test_one_word_books_need_chapter(self):
+        engine = CorrectionEngine.from_dictionary({"bible_books": ["Hechos", "Marcos", "1 Juan"],
+                                                   "bible_books_need_chapter": True})
+        self.assertEqual(engine.correct("lean hechos 2:38 y marcos 4, versículo 3"), "lean Hechos 2:38 y Marcos 4, versículo 3")
+        self.assertEqual(engine.correct("los hechos y los marcos (4)"), "los hechos y los marcos (4)")
+        self.assertEqual(engine.correct("hechos, 2"), "hechos, 2")
+        self.assertEqual(engine.correct("1 juan dijo"), "1 Juan dijo")
+
+
+class TestIncrementalCorrector(unittest.TestCase):
+    def setUp(self):
+        self.engine = CorrectionEngine.from_dictionary(DICTIONARY)
+        self.corrector = IncrementalCorrector(self.engine)
+
+    def test_growing_hypothesis_matches_full_pass(self):
+        words = "this morning pslam 23 then song of solomon and 1 corinthians with dave bearing".split()
+        for n in range(1, len(words) + 1):
+            text = " ".join(words[:n])
+            self.assertEqual(self.corrector.correct(text), self.engine.correct(text), text)
+
+    def test_growing_by_characters(self):
+        text = "read genesis and mathew"
+        for n in range(1, len(text) + 1):
+            self.assertEqual(self.corrector.correct(text[:n]), self.engine.correct(text[:n]), text[:n])
+
+    def test_rewritten_hypothesis_matches_full_pass(self):
+        for text in ("turn to song of", "turn to song of solomon", "turn to psalm", "turn to pslam 23",
+                     "we turn to pslam 23", "we turn"):
+            self.assertEqual(self.corrector.correct(text), self.engine.correct(text), text)
+
+    def test_chapter_after_book_arrives_later(self):
+        corrector = IncrementalCorrector(CorrectionEngine.from_dictionary(
+            {"bible_books": ["Hechos"], "bible_books_need_chapter": True}))
+        self.assertEqual(corrector.correct("lean hechos"), "lean hechos")
+        self.assertEqual(corrector.correct("lean hechos 2"), "lean Hechos 2")
+        self.assertEqual(corrector.correct("lean hechos dos"), "lean hechos dos")
+
+    def test_repeated_hypothesis_is_cached(self):
+        first = self.corrector.correct("pslam 23")
+        self.assertIs(self.corrector.correct("pslam 23"), first)
+
+    def test_reset_and_empty_text(self):
+        self.corrector.correct("pslam 23")
+        self.assertEqual(self.corrector.correct(""), "")
+        self.corrector.reset()
+        self.assertEqual(self.corrector.correct("mathew"), "Matthew")
+
+    def test_engine_without_entries_passes_through(self):
+        corrector = IncrementalCorrector(CorrectionEngine())
+        self.assertEqual(corrector.correct("pslam 23"), "pslam 23")
+
+
+class TestCorrectionRegistry(unittest.TestCase):
+    def test_rules_per_language(self):
+        registry = CorrectionRegistry()
+        self.assertEqual(registry.set_language("en-US", DICTIONARY), 7)
+        registry.set_language("es-ES", {"spelling_corrections": {"jesus": "Jesús"}})
+        self.assertEqual(registry.languages(), ["en-US", "es-ES"])
+        self.assertEqual(registry.correct("en-US", "pslam 23"), "Psalm 23")
+        self.assertEqual(registry.correct("es-ES", "jesus dijo"), "Jesús dijo")
+        self.assertEqual(registry.correct("fr-FR", "pslam 23"), "pslam 23")
+
+    def test_language_without_rules_is_removed(self):
+        registry = CorrectionRegistry()
+        registry.set_language("en-US", DICTIONARY)
+        self.assertEqual(registry.set_language("en-US", {}), 0)
+        self.assertEqual(registry.correct("en-US", "pslam 23"), "pslam 23")
+        self.assertEqual(registry.languages(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Unit tests for caption_dictionary: DictionaryStore updates and reloads.
+Run with python -m unittest.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from caption_dictionary import DictionaryStore
+
+
+class TestDictionaryStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "dictionary.json")
+        self.write({"bible_books": ["Genesis"], "spelling_corrections": {"pslam": "Psalm"}})
+        self.store = DictionaryStore(self.path)
+        self.changes = []
+        self.store.subscribe(lambda store, changed: self.changes.append(changed))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, data):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    def test_update_persists_and_notifies(self):
+        self.store.update(lambda dictionary: dictionary["custom_phrases"].append("North Way"))
+        self.assertEqual(self.store.version, 1)
+        self.assertEqual(self.changes, [{"custom_phrases"}])
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["custom_phrases"], ["North Way"])
+
+    def test_unchanged_update_is_not_written(self):
+        self.store.update(lambda dictionary: None)
+        self.assertEqual(self.store.version, 0)
+        self.assertEqual(self.changes, [])
+
+    def test_reload_picks_up_hand_edit(self):
+        self.write({"bible_books": ["Genesis", "Exodus"], "spelling_corrections": {"pslam": "Psalm"}})
+        self.assertEqual(self.store.reload(), {"bible_books"})
+        self.assertEqual(self.store.snapshot()["bible_books"], ["Genesis", "Exodus"])
+        self.assertEqual(self.changes, [{"bible_books"}])
+        self.assertEqual(self.store.reload(), set())
+        self.assertEqual(self.store.version, 1)
+
+    def test_broken_file_keeps_dictionary(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write('{"bible_books": ["Gen')
+        with self.assertRaises(ValueError):
+            self.store.reload()
+        self.assertEqual(self.store.snapshot()["bible_books"], ["Genesis"])
+        self.assertEqual(self.changes, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+Unit tests for caption_protocol: keyframes, deltas and ring buffer catch-up.
+Run with python -m unittest.
+"""
+
+import json
+import unittest
+
+from caption_protocol import CaptionStreams, utf16_length
+
+
+def apply_delta(base_text, payload):
+    # Mirrors the client: text_of(base).slice(drop, drop + keep) + append (BMP text only)
+    drop = payload.get("drop", 0)
+    return base_text[drop:drop + payload["keep"]] + payload["append"]
+
+
+class TestCaptionDeltas(unittest.TestCase):
+    def setUp(self):
+        self.streams = CaptionStreams(json.dumps, lambda frame: {"text": frame.text}, keyframe_interval=3)
+
+    def test_first_frame_is_keyframe(self):
+        frame = self.streams.publish("production", "hello")
+        self.assertTrue(frame.keyframe)
+        payload = self.streams.delta_payload(frame, None)
+        self.assertEqual(payload["type"], "caption_key")
+        self.assertEqual(payload["text"], "hello")
+        self.assertNotIn("final", payload)
+
+    def test_unchanged_text_is_suppressed(self):
+        self.streams.publish("production", "hello")
+        self.assertIsNone(self.streams.publish("production", "hello"))
+        # The same text becoming final is a new frame
+        self.assertIsNotNone(self.streams.publish("production", "hello", final=True))
+        self.assertIsNone(self.streams.publish("production", "hello", final=True))
+
+    def test_delta_appends_changed_suffix(self):
+        base = self.streams.publish("production", "turn to")
+        frame = self.streams.publish("production", "turn to Genesis", final=True)
+        payload = self.streams.delta_payload(frame, base.seq)
+        self.assertEqual(payload["type"], "caption_delta")
+        self.assertEqual(payload["base"], base.seq)
+        self.assertEqual(payload["keep"], len("turn to"))
+        self.assertEqual(payload["append"], " Genesis")
+        self.assertNotIn("drop", payload)
+        self.assertTrue(payload["final"])
+        self.assertEqual(apply_delta(base.text, payload), frame.text)
+
+    def test_delta_drops_scrolled_lines(self):
+        base = self.streams.publish("user:en-US", "line one\nline two")
+        frame = self.streams.publish("user:en-US", "line two\nline three")
+        payload = self.streams.delta_payload(frame, base.seq)
+        self.assertEqual(payload["drop"], len("line one\n"))
+        self.assertEqual(payload["keep"], len("line two"))
+        self.assertEqual(apply_delta(base.text, payload), frame.text)
+
+    def test_unknown_base_gets_keyframe(self):
+        self.streams.publish("production", "a")
+        frame = self.streams.publish("production", "ab")
+        self.assertEqual(self.streams.delta_payload(frame, frame.seq - 1000)["type"], "caption_key")
+
+    def test_keyframe_interval(self):
+        frames = [self.streams.publish("production", "x" * n) for n in range(1, 7)]
+        self.assertEqual([frame.keyframe for frame in frames], [True, False, False, False, True, False])
+
+    def test_lengths_in_utf16_code_units(self):
+        base = self.streams.publish("production", "praise \U0001F64C")
+        frame = self.streams.publish("production", "praise \U0001F64C amen")
+        payload = self.streams.delta_payload(frame, base.seq)
+        self.assertEqual(payload["keep"], utf16_length("praise \U0001F64C"))
+        self.assertEqual(payload["keep"], len("praise ") + 2)
+
+
+class TestRingCatchUp(unittest.TestCase):
+    def setUp(self):
+        self.streams = CaptionStreams(json.dumps, lambda frame: {"text": frame.text}, ring_size=8)
+
+    def test_missed_finals_and_latest(self):
+        seen = self.streams.publish("production", "one", final=True)
+        self.streams.publish("user:es-ES", "uno", final=True)
+        self.streams.publish("production", "tw")
+        two = self.streams.publish("production", "two", final=True)
+        self.streams.publish("production", "thr")
+        latest = self.streams.publish("production", "three")
+        missed = self.streams.missed_frames("production", seen.seq)
+        # Superseded interims and other streams are skipped; the latest frame always comes last
+        self.assertEqual(missed, [two, latest])
+
+    def test_up_to_date_client_misses_nothing(self):
+        latest = self.streams.publish("production", "one", final=True)
+        self.assertEqual(self.streams.missed_frames("production", latest.seq), [])
+
+    def test_client_older_than_ring_needs_snapshot(self):
+        first = self.streams.publish("production", "0", final=True)
+        for n in range(1, 10):
+            self.streams.publish("production", str(n), final=True)
+        self.assertIsNone(self.streams.missed_frames("production", first.seq))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Unit tests for caption_targets: TranslationTargets linger, pinning and the
+last-target rule. Deadlines run on a manual scheduler. Run with python -m unittest.
+"""
+
+import unittest
+
+from caption_metrics import MetricsRegistry
+from caption_targets import TranslationTargets
+
+LANGUAGES = ["en-US", "es-ES", "fr-FR", "de-DE"]
+
+
+class ManualScheduler:
+    """CaptionScheduler's keyed API; deadlines fire only when the test calls fire()"""
+
+    def __init__(self):
+        self.deadlines = {}
+
+    def schedule(self, key, delay, callback, reschedule=True):
+        if key in self.deadlines and not reschedule:
+            return False
+        self.deadlines[key] = (delay, callback)
+        return True
+
+    def cancel(self, key):
+        return self.deadlines.pop(key, None) is not None
+
+    def pending(self, key):
+        return key in self.deadlines
+
+    def fire(self, language):
+        _, callback = self.deadlines.pop(f"translation_target:{language}")
+        callback()
+
+
+class TestTranslationTargets(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = ManualScheduler()
+        self.applied = []
+
+    def make_targets(self, **options):
+        return TranslationTargets(LANGUAGES, self.scheduler, self.applied.append, linger_seconds=60,
+                                  metrics=MetricsRegistry(), **options)
+
+    def test_starts_with_pinned_languages(self):
+        targets = self.make_targets(pinned=["es-ES", "xx-XX"])
+        self.assertEqual(targets.targets, ("es-ES",))
+
+    def test_starts_with_one_target_when_nothing_pinned(self):
+        self.assertEqual(self.make_targets().targets, ("en-US",))
+
+    def test_static_targets_translate_everything(self):
+        targets = self.make_targets(dynamic=False)
+        self.assertEqual(targets.targets, tuple(sorted(LANGUAGES)))
+        targets.viewers_changed("fr-FR", 0)
+        self.assertEqual(self.scheduler.deadlines, {})
+
+    def test_subscribe_adds_target(self):
+        targets = self.make_targets(pinned=["en-US"])
+        targets.viewers_changed("fr-FR", 1)
+        self.assertEqual(targets.targets, ("en-US", "fr-FR"))
+        self.assertEqual(self.applied, [("en-US", "fr-FR")])
+        # More viewers of a language already translated change nothing
+        targets.viewers_changed("fr-FR", 2)
+        self.assertEqual(len(self.applied), 1)
+
+    def test_unwatched_language_lingers_then_expires(self):
+        targets = self.make_targets(pinned=["en-US"])
+        targets.viewers_changed("fr-FR", 1)
+        targets.viewers_changed("fr-FR", 0)
+        self.assertEqual(targets.targets, ("en-US", "fr-FR"))
+        self.assertEqual(targets.status()["leaving"], ["fr-FR"])
+        self.assertEqual(self.scheduler.deadlines["translation_target:fr-FR"][0], 60)
+        self.scheduler.fire("fr-FR")
+        self.assertEqual(targets.targets, ("en-US",))
+        self.assertEqual(self.applied[-1], ("en-US",))
+
+    def test_returning_viewer_cancels_linger(self):
+        targets = self.make_targets(pinned=["en-US"])
+        targets.viewers_changed("fr-FR", 1)
+        targets.viewers_changed("fr-FR", 0)
+        targets.viewers_changed("fr-FR", 1)
+        self.assertFalse(self.scheduler.pending("translation_target:fr-FR"))
+        self.assertEqual(targets.targets, ("en-US", "fr-FR"))
+        self.assertEqual(len(self.applied), 1)
+
+    def test_pinned_language_never_lingers(self):
+        targets = self.make_targets(pinned=["en-US"])
+        targets.viewers_changed("en-US", 1)
+        targets.viewers_changed("en-US", 0)
+        self.assertFalse(self.scheduler.pending("translation_target:en-US"))
+
+    def test_last_target_is_kept(self):
+        targets = self.make_targets()
+        # Once another language is watched, the placeholder target can go
+        targets.viewers_changed("de-DE", 1)
+        self.assertTrue(self.scheduler.pending("translation_target:en-US"))
+        self.scheduler.fire("en-US")
+        self.assertEqual(targets.targets, ("de-DE",))
+        # The Speech SDK needs one target, so the last one outlives its linger
+        targets.viewers_changed("de-DE", 0)
+        self.scheduler.fire("de-DE")
+        self.assertEqual(targets.targets, ("de-DE",))
+
+    def test_unsupported_language_is_ignored(self):
+        targets = self.make_targets(pinned=["en-US"])
+        targets.viewers_changed("xx-XX", 1)
+        self.assertEqual(targets.targets, ("en-US",))
+        self.assertEqual(self.applied, [])
+
+    def test_removed_language_is_dropped(self):
+        targets = self.make_targets(pinned=["en-US"])
+        targets.viewers_changed("fr-FR", 1)
+        targets.set_languages(["en-US", "es-ES"])
+        self.assertEqual(targets.targets, ("en-US",))
+        self.assertEqual(self.applied[-1], ("en-US",))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Unit tests for caption_timers: keyed deadlines, rescheduling and cancelling.
+Run with python -m unittest.
+"""
+
+import threading
+import time
+import unittest
+
+from caption_metrics import MetricsRegistry
+from caption_timers import CaptionScheduler
+
+
+class TestCaptionScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = CaptionScheduler(metrics=MetricsRegistry())
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def test_fires_once(self):
+        fired = []
+        self.scheduler.schedule("finalize", 0.02, lambda: fired.append(time.monotonic()))
+        time.sleep(0.2)
+        self.assertEqual(len(fired), 1)
+        self.assertFalse(self.scheduler.pending("finalize"))
+        self.assertIsNone(self.scheduler.due_in("finalize"))
+
+    def test_reschedule_moves_deadline(self):
+        fired = threading.Event()
+        self.scheduler.schedule("finalize", 0.05, fired.set)
+        self.assertTrue(self.scheduler.schedule("finalize", 0.4, fired.set))
+        self.assertGreater(self.scheduler.due_in("finalize"), 0.3)
+        self.assertFalse(fired.wait(0.15))
+        self.assertTrue(fired.wait(1.0))
+
+    def test_reschedule_earlier(self):
+        fired = threading.Event()
+        self.scheduler.schedule("finalize", 5.0, fired.set)
+        self.scheduler.schedule("finalize", 0.02, fired.set)
+        self.assertTrue(fired.wait(1.0))
+
+    def test_no_reschedule_keeps_deadline(self):
+        fired = []
+        self.scheduler.schedule("debounce", 0.05, lambda: fired.append("first"))
+        self.assertFalse(self.scheduler.schedule("debounce", 5.0, lambda: fired.append("second"), reschedule=False))
+        self.assertLess(self.scheduler.due_in("debounce"), 0.1)
+        time.sleep(0.25)
+        self.assertEqual(fired, ["first"])
+
+    def test_cancel(self):
+        fired = []
+        self.scheduler.schedule("pause_clear", 0.05, lambda: fired.append(True))
+        self.assertTrue(self.scheduler.cancel("pause_clear"))
+        self.assertFalse(self.scheduler.pending("pause_clear"))
+        self.assertFalse(self.scheduler.cancel("pause_clear"))
+        time.sleep(0.2)
+        self.assertEqual(fired, [])
+
+    def test_schedule_after_cancel(self):
+        fired = threading.Event()
+        self.scheduler.schedule("pause_clear", 0.05, lambda: None)
+        self.scheduler.cancel("pause_clear")
+        self.scheduler.schedule("pause_clear", 0.05, fired.set)
+        self.assertTrue(fired.wait(1.0))
+
+    def test_failing_callback_does_not_stop_scheduler(self):
+        fired = threading.Event()
+        self.scheduler.schedule("broken", 0.01, lambda: 1 / 0)
+        self.scheduler.schedule("next", 0.05, fired.set)
+        with self.assertLogs(level="ERROR"):
+            self.assertTrue(fired.wait(1.0))
+
+
+if __name__ == "__main__":
+    unittest.main()